@@ -0,0 +1,340 @@
+"""
+Mesures de performance des chemins critiques (démarrage, calculs, export, rendu)
+
+Chaque mesure donne la durée (médiane et minimum sur plusieurs répétitions)
+et le pic de mémoire allouée (tracemalloc, allocations NumPy comprises).
+Les résultats sont écrits en JSON et comparés à une référence enregistrée :
+une mesure plus lente ou plus gourmande que la référence au-delà du seuil
+est signalée et le code de sortie vaut 1. Les durées dépendant de la
+machine, la référence n'est pas livrée avec le projet : elle s'enregistre
+une fois par machine, et son absence donne le code de sortie 2.
+
+Usage, depuis la racine du projet :
+
+    python -m benchmarks.performances                         # tout, comparé à la référence
+    python -m benchmarks.performances --rapide --filtre export
+    python -m benchmarks.performances --enregistrer-reference # nouvelle référence
+
+Les mesures de démarrage lancent un nouvel interpréteur par répétition :
+import du cœur (modules.calculs, modules.export, mode batch) en regard de
+l'interpréteur seul. Elles échouent si le cœur charge tkinter.
+
+La vue (niveaux de détail et élimination hors champ, modules.vue) se mesure
+sans affichage, niveau de détail déjà en cache : c'est le coût d'une image
+pendant un zoom ou un déplacement.
+
+Le rendu (Interface.dessiner_tube) demande un affichage : sans DISPLAY, un
+serveur Xvfb est lancé s'il est installé, sinon ces mesures sont ignorées.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from modules.calculs import CalculateurCintrage, CalculMultiCintrage, ParametresCintrage, ParametresTube
+from modules.export import ExporteurPlans
+from modules.geometrie import GeometrieTube
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE = os.path.join(RACINE, "benchmarks", "reference.json")
+MODULES_COEUR = ("modules", "modules.calculs", "modules.export", "modules.batch")
+SEUIL = 1.3            # Rapport au-delà duquel une mesure est une régression
+PLANCHER_MS = 0.5      # Écart minimal en durée pour être signalé (bruit de mesure)
+PLANCHER_KO = 64       # Écart minimal en mémoire pour être signalé
+DUREE_MAX_S = 2.0      # Temps de mesure maximal par cas
+
+def programme_plan(nb_cintrages: int, ecart: float = 60.0) -> Tuple[ParametresTube, List[ParametresCintrage]]:
+    """Tube plan à cintrages de 45° (octogone parcouru en boucle), borné à toutes les échelles"""
+    cintrages = [ParametresCintrage(angle=45.0, rayon=20.0, position=ecart * (i + 1)) for i in range(nb_cintrages)]
+    return ParametresTube(diametre=20, epaisseur=1.5, longueur=ecart * (nb_cintrages + 1)), cintrages
+
+def geometrie_tube(nb_points: int) -> GeometrieTube:
+    """Vraie géométrie de tube d'environ nb_points points"""
+    params_tube, cintrages = programme_plan(max(1, nb_points // 42))
+    return CalculateurCintrage().calculer_geometrie(params_tube, cintrages)
+
+def mesurer(fonction: Callable, repetitions: int) -> Dict:
+    """
+    Durées de fonction() sur plusieurs répétitions (après un appel de mise en
+    route), puis pic de mémoire d'un appel supplémentaire sous tracemalloc
+    """
+    fonction()
+    durees = []
+    debut_mesure = time.perf_counter()
+    while len(durees) < repetitions and (not durees or time.perf_counter() - debut_mesure < DUREE_MAX_S):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+
+    tracemalloc.start()
+    try:
+        fonction()
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(durees), 4),
+        "min_ms": round(min(durees), 4),
+        "repetitions": len(durees),
+        "memoire_pic_ko": round(pic / 1024, 1)
+    }
+
+def _lancer_python(code: str):
+    processus = subprocess.run([sys.executable, "-c", code], cwd=RACINE, capture_output=True, text=True)
+    if processus.returncode:
+        raise RuntimeError(processus.stderr.strip() or f"Code de sortie {processus.returncode}")
+
+def cas_demarrage(rapide: bool) -> Iterator[Tuple[str, Dict, Callable]]:
+    yield "demarrage.interpreteur", {}, lambda: lambda: _lancer_python("pass")
+    for module in MODULES_COEUR:
+        code = (f"import sys; import {module}\n"
+                "if 'tkinter' in sys.modules: sys.exit('tkinter importé par le cœur')")
+        yield "demarrage.import", {"module": module}, lambda code=code: lambda: _lancer_python(code)
+
+def cas_calculs(rapide: bool) -> Iterator[Tuple[str, Dict, Callable]]:
+    calculateur = CalculateurCintrage()
+    for nb_cintrages in ((1, 100, 1000) if rapide else (1, 10, 100, 1000, 10000)):
+        for nb_points in ((40,) if rapide else (10, 40, 100)):
+            params_tube, cintrages = programme_plan(nb_cintrages)
+
+            def preparer(params_tube=params_tube, cintrages=cintrages, nb_points=nb_points):
+                calculateur.nb_points = nb_points
+                calculateur.multi_cintrage = CalculMultiCintrage()
+                calculateur.multi_cintrage.ajouter_cintrages(cintrages)
+
+                def calculer():
+                    calculateur.vider_cache()  # Calcul complet, sans le cache de géométrie
+                    calculateur.calculer_points_tube(params_tube)
+                return calculer
+            yield "calculs.calculer_points_tube", {"cintrages": nb_cintrages, "nb_points": nb_points}, preparer
+
+    for nb_cintrages in ((1000,) if rapide else (1000, 10000, 100000)):
+        params_tube, cintrages = programme_plan(nb_cintrages)
+
+        def preparer(params_tube=params_tube, cintrages=cintrages):
+            calculateur.multi_cintrage = CalculMultiCintrage()
+            calculateur.multi_cintrage.ajouter_cintrages(cintrages)
+            return lambda: calculateur.calculer_longueur_developpee(params_tube)
+        yield "calculs.calculer_longueur_developpee", {"cintrages": nb_cintrages}, preparer
+
+def cas_balayage(rapide: bool) -> Iterator[Tuple[str, Dict, Callable]]:
+    from modules.balayage import balayer
+
+    # Un million de combinaisons, réparties de deux façons sur les axes
+    for angles, rayons, coefficients in ((100, 100, 100), (1000, 1000, 1)):
+        def preparer(angles=angles, rayons=rayons, coefficients=coefficients):
+            axes = (np.linspace(1, 179, angles), np.linspace(5, 500, rayons), np.linspace(0.9, 1.0, coefficients))
+            return lambda: balayer(*axes, longueur=1000.0).carte("valeur_A")
+        yield "balayage.balayer", {"angles": angles, "rayons": rayons, "coefficients": coefficients}, preparer
+
+def cas_apercu(rapide: bool) -> Iterator[Tuple[str, Dict, Callable]]:
+    from modules.apercu import Apercu
+
+    for nb_cintrages in ((50,) if rapide else (50, 500)):
+        def preparer(nb_cintrages=nb_cintrages):
+            params_tube, cintrages = programme_plan(nb_cintrages)
+            apercu = Apercu(CalculateurCintrage())
+            apercu.mettre_a_jour(params_tube, cintrages)
+            milieu = nb_cintrages // 2
+            saisies = [ParametresCintrage(angle=30.0 + i, rayon=20.0, position=cintrages[milieu].position)
+                       for i in range(30)]
+            etat = {"saisie": 0}
+
+            def saisir():
+                # Frappe dans l'angle du cintrage du milieu : recalcul de ce cintrage seulement
+                etat["saisie"] = (etat["saisie"] + 1) % len(saisies)
+                programme = list(cintrages)
+                programme[milieu] = saisies[etat["saisie"]]
+                apercu.mettre_a_jour(params_tube, programme, milieu)
+            return saisir
+        yield "apercu.mettre_a_jour", {"cintrages": nb_cintrages}, preparer
+
+def cas_export(rapide: bool, dossier: str) -> Iterator[Tuple[str, Dict, Callable]]:
+    exporteur = ExporteurPlans()
+    for nb_points in ((10000, 100000) if rapide else (10000, 100000, 1000000)):
+        for mode in ("lignes", "polyligne"):
+            def preparer(nb_points=nb_points, mode=mode):
+                points = geometrie_tube(nb_points).points
+                chemin = os.path.join(dossier, f"bench_{mode}.dxf")
+                return lambda: exporteur.exporter_dxf(points, chemin, mode)
+            yield "export.exporter_dxf", {"points": nb_points, "mode": mode}, preparer
+
+        def preparer(nb_points=nb_points):
+            points = geometrie_tube(nb_points).points
+            chemin = os.path.join(dossier, "bench.svg")
+            return lambda: exporteur.exporter_svg(points, chemin)
+        yield "export.exporter_svg", {"points": nb_points}, preparer
+
+def cas_vue(rapide: bool) -> Iterator[Tuple[str, Dict, Callable]]:
+    from modules.vue import NiveauxDetail, Vue
+
+    largeur, hauteur = 1024, 600
+    for nb_points in ((100000,) if rapide else (100000, 1000000)):
+        for zoom in (1, 10, 100):
+            def preparer(nb_points=nb_points, zoom=zoom):
+                geometrie = geometrie_tube(nb_points)
+                niveaux = NiveauxDetail(geometrie.points, geometrie.indices_cintrages.ravel())
+                vue = Vue()
+                vue.ajuster(geometrie.points.min(axis=0), geometrie.points.max(axis=0), largeur, hauteur)
+                # Zoom sur un point du tube, ramené au centre
+                x, y = vue.vers_canvas(geometrie.points[geometrie.indices_cintrages[0, 0]])
+                vue.zoomer(zoom, x, y)
+                vue.deplacer(largeur / 2 - x, hauteur / 2 - y)
+                niveaux.points_niveau(vue.echelle)
+                return lambda: niveaux.morceaux_visibles(vue, largeur, hauteur)
+            yield "vue.morceaux_visibles", {"points": nb_points, "zoom": zoom}, preparer
+
+@contextmanager
+def affichage_virtuel():
+    """
+    Garantit un affichage X : celui de l'environnement, ou un Xvfb lancé pour
+    la durée des mesures. Produit None si aucun affichage n'est disponible.
+    """
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        yield os.environ.get("DISPLAY", "natif")
+        return
+    if not shutil.which("Xvfb"):
+        yield None
+        return
+    ecran = ":97"
+    serveur = subprocess.Popen(["Xvfb", ecran, "-screen", "0", "1280x1024x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = ecran
+    try:
+        time.sleep(0.5)
+        yield ecran
+    finally:
+        del os.environ["DISPLAY"]
+        serveur.terminate()
+        serveur.wait()
+
+def cas_rendu(rapide: bool, racine) -> Iterator[Tuple[str, Dict, Callable]]:
+    from modules.interface import Interface
+
+    interface = Interface(racine, CalculateurCintrage())
+    racine.update()
+    for nb_points in ((1000, 10000) if rapide else (1000, 10000, 100000)):
+        def preparer(nb_points=nb_points):
+            geometrie = geometrie_tube(nb_points)
+
+            def dessiner():
+                interface.dessiner_tube(geometrie.points, geometrie.indices_cintrages)
+                racine.update_idletasks()  # Inclut le dessin effectif par Tk
+            return dessiner
+        yield "interface.dessiner_tube", {"points": nb_points}, preparer
+
+def cle(nom: str, parametres: Dict) -> str:
+    return nom + "[" + ",".join(f"{k}={v}" for k, v in parametres.items()) + "]"
+
+def executer(rapide: bool = False, filtre: str = None, repetitions: int = 7, sortie_log=sys.stderr) -> Dict:
+    """
+    Exécute les mesures (filtrées par sous-chaîne du nom) et retourne le rapport
+    """
+    mesures = []
+    ignorees = []
+
+    def lancer(cas):
+        for nom, parametres, preparer in cas:
+            identifiant = cle(nom, parametres)
+            if filtre and filtre not in identifiant:
+                continue
+            resultat = {"cle": identifiant, "nom": nom, "parametres": parametres, **mesurer(preparer(), repetitions)}
+            mesures.append(resultat)
+            print(f"{identifiant:<70} {resultat['median_ms']:>10.3f} ms {resultat['memoire_pic_ko']:>10.1f} Ko",
+                  file=sortie_log)
+
+    lancer(cas_demarrage(rapide))
+    with tempfile.TemporaryDirectory() as dossier:
+        lancer(cas_calculs(rapide))
+        lancer(cas_apercu(rapide))
+        lancer(cas_balayage(rapide))
+        lancer(cas_export(rapide, dossier))
+    lancer(cas_vue(rapide))
+
+    if not filtre or filtre in "interface.dessiner_tube" or filtre.startswith("interface.dessiner_tube"):
+        with affichage_virtuel() as ecran:
+            if ecran is None:
+                ignorees.append({"nom": "interface.dessiner_tube", "raison": "aucun affichage (DISPLAY ou Xvfb)"})
+                print("interface.dessiner_tube ignoré : aucun affichage (DISPLAY ou Xvfb)", file=sortie_log)
+            else:
+                import tkinter as tk
+                racine = tk.Tk()
+                try:
+                    lancer(cas_rendu(rapide, racine))
+                finally:
+                    racine.destroy()
+
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plateforme": platform.platform(),
+        "rapide": rapide,
+        "mesures": mesures,
+        "ignorees": ignorees
+    }
+
+def comparer(rapport: Dict, reference: Dict, seuil: float = SEUIL) -> List[Dict]:
+    """
+    Régressions de rapport par rapport à la référence, sur la durée médiane
+    et le pic de mémoire des mesures présentes dans les deux
+    """
+    references = {m["cle"]: m for m in reference.get("mesures", [])}
+    regressions = []
+    for mesure in rapport["mesures"]:
+        ancienne = references.get(mesure["cle"])
+        if ancienne is None:
+            continue
+        for champ, plancher in (("median_ms", PLANCHER_MS), ("memoire_pic_ko", PLANCHER_KO)):
+            avant, apres = ancienne[champ], mesure[champ]
+            if apres > avant * seuil and apres - avant > plancher:
+                regressions.append({"cle": mesure["cle"], "mesure": champ, "reference": avant,
+                                    "actuel": apres, "rapport": round(apres / avant, 2) if avant else None})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance des calculs, exports et du rendu")
+    parser.add_argument("--rapide", action="store_true", help="Échelles réduites (contrôle rapide)")
+    parser.add_argument("--filtre", default=None, help="Ne lance que les mesures dont le nom contient ce texte")
+    parser.add_argument("--repetitions", type=int, default=7, help="Répétitions par mesure")
+    parser.add_argument("--sortie", default=None, help="Fichier JSON des résultats")
+    parser.add_argument("--reference", default=REFERENCE, help="Référence à laquelle comparer")
+    parser.add_argument("--seuil", type=float, default=SEUIL, help="Rapport signalé comme régression")
+    parser.add_argument("--enregistrer-reference", action="store_true",
+                        help="Enregistre les résultats comme nouvelle référence")
+    args = parser.parse_args(argv)
+
+    rapport = executer(args.rapide, args.filtre, args.repetitions)
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+
+    if args.enregistrer_reference:
+        with open(args.reference, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée : {args.reference}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.reference):
+        print(f"Pas de référence ({args.reference}) : utiliser --enregistrer-reference", file=sys.stderr)
+        return 2
+    with open(args.reference, encoding='utf-8') as f:
+        regressions = comparer(rapport, json.load(f), args.seuil)
+    for r in regressions:
+        print(f"RÉGRESSION {r['cle']} {r['mesure']}: {r['reference']} -> {r['actuel']} (x{r['rapport']})",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
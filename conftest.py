@@ -0,0 +1 @@
+"""Configuration pytest : la racine du projet est importable (paquet modules) depuis tests/"""
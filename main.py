@@ -1,20 +1,35 @@
+import argparse
 import tkinter as tk
-from tkinter import ttk, messagebox
-from modules.interface import Interface
-from modules.calculs import CalculateurCintrage, ParametresTube, ParametresCintrage
-from modules.export import ExporteurPlans
+from tkinter import messagebox
+from modules import instrumentation
+
+# L'interface, les calculs, les exports et les projets sont importés à la
+# création de la fenêtre ou à la première utilisation : les options de la
+# ligne de commande sont traitées sans les charger.
 
 class ApplicationCintrage:
     def __init__(self):
+        from modules.calculs import CalculateurCintrage
+        from modules.interface import Interface
+
         self.root = tk.Tk()
         self.root.title("Simulateur de Cintrage")
         self.root.geometry("1280x1024")
         
         self.calculateur = CalculateurCintrage()
         self.interface = Interface(self.root, self.calculateur)
-        self.exporteur = ExporteurPlans()
+        self._exporteur = None
         
         self.setup_menu()
+        self.root.protocol("WM_DELETE_WINDOW", self.quitter)
+
+    @property
+    def exporteur(self):
+        # Créé au premier export
+        if self._exporteur is None:
+            from modules.export import ExporteurPlans
+            self._exporteur = ExporteurPlans()
+        return self._exporteur
         
     def setup_menu(self):
         menubar = tk.Menu(self.root)
@@ -24,53 +39,141 @@ class ApplicationCintrage:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Fichier", menu=file_menu)
         file_menu.add_command(label="Nouveau projet", command=self.nouveau_projet)
+        file_menu.add_command(label="Ouvrir un projet...", command=self.ouvrir_projet)
+        file_menu.add_command(label="Enregistrer le projet...", command=self.enregistrer_projet)
+        file_menu.add_command(label="Ouvrir depuis la bibliothèque...", command=self.ouvrir_bibliotheque)
+        file_menu.add_separator()
         file_menu.add_command(label="Exporter en DXF", command=self.exporter_dxf)
         file_menu.add_command(label="Exporter en SVG", command=self.exporter_svg)
         file_menu.add_separator()
-        file_menu.add_command(label="Quitter", command=self.root.quit)
+        file_menu.add_command(label="Quitter", command=self.quitter)
 
     def nouveau_projet(self):
         self.interface.reinitialiser()
+
+    def ouvrir_projet(self):
+        from tkinter import filedialog
+        from modules.projet import charger_projet
+        chemin = filedialog.askopenfilename(title="Ouvrir un projet",
+                                            filetypes=[("Projet de cintrage", "*.json"), ("Tous les fichiers", "*")])
+        if not chemin:
+            return
+        try:
+            self.interface.charger_piece(charger_projet(chemin))
+        except (OSError, ValueError, KeyError) as e:
+            tk.messagebox.showerror("Erreur", f"Impossible d'ouvrir le projet: {str(e)}")
+
+    def enregistrer_projet(self):
+        from tkinter import filedialog
+        from modules.projet import enregistrer_projet
+        chemin = filedialog.asksaveasfilename(title="Enregistrer le projet", defaultextension=".json",
+                                              filetypes=[("Projet de cintrage", "*.json")])
+        if not chemin:
+            return
+        try:
+            enregistrer_projet(chemin, self.interface.piece_courante())
+            self.interface.status_var.set(f"Projet enregistré: {chemin}")
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Erreur", f"Impossible d'enregistrer le projet: {str(e)}")
+
+    def ouvrir_bibliotheque(self):
+        from tkinter import filedialog, simpledialog
+        from modules.projet import BibliothequePieces
+        chemin = filedialog.askopenfilename(title="Bibliothèque de pièces",
+                                            filetypes=[("Bibliothèque de pièces", "*.cbib"), ("Tous les fichiers", "*")])
+        if not chemin:
+            return
+        try:
+            with BibliothequePieces(chemin) as bibliotheque:
+                nom = simpledialog.askstring("Bibliothèque", f"Nom de la pièce ({len(bibliotheque)} pièces) :",
+                                             parent=self.root)
+                if not nom:
+                    return
+                piece = bibliotheque.charger(nom)
+            self.interface.charger_piece(piece)
+        except KeyError:
+            tk.messagebox.showerror("Erreur", f"Pièce introuvable: {nom}")
+        except (OSError, ValueError) as e:
+            tk.messagebox.showerror("Erreur", f"Impossible de lire la bibliothèque: {str(e)}")
         
-    def exporter_dxf(self):
+    def lire_parametres(self):
+        from modules.calculs import ParametresTube, ParametresCintrage
+        # Lecture des champs sur le thread Tk, avant tout calcul en arrière-plan
+        params_tube = ParametresTube(
+            diametre=float(self.interface.diametre_var.get()),
+            epaisseur=float(self.interface.epaisseur_var.get()),
+            longueur=float(self.interface.longueur_var.get())
+        )
+        params_cintrage = ParametresCintrage(
+            angle=float(self.interface.angle_var.get()),
+            rayon=float(self.interface.rayon_var.get()),
+            position=float(self.interface.position_var.get())
+        )
+        return params_tube, params_cintrage
+        
+    def exporter(self, format_export, nom_fichier, exporter_points):
         try:
-            params_tube = ParametresTube(
-                diametre=float(self.interface.diametre_var.get()),
-                epaisseur=float(self.interface.epaisseur_var.get()),
-                longueur=float(self.interface.longueur_var.get())
-            )
-            params_cintrage = ParametresCintrage(
-                angle=float(self.interface.angle_var.get()),
-                rayon=float(self.interface.rayon_var.get()),
-                position=float(self.interface.position_var.get())
-            )
-            points = self.calculateur.calculer_points_tube(params_tube, params_cintrage)
-            self.exporteur.exporter_dxf(points, "tube_cintre.dxf")
-            tk.messagebox.showinfo("Succès", "Le fichier DXF a été créé avec succès")
-        except Exception as e:
-            tk.messagebox.showerror("Erreur", f"Erreur lors de l'export DXF: {str(e)}")
+            params_tube, params_cintrage = self.lire_parametres()
+        except ValueError as e:
+            tk.messagebox.showerror("Erreur", f"Erreur lors de l'export {format_export}: {str(e)}")
+            return
+            
+        def tache(progression):
+            points = self.calculateur.calculer_points_array(params_tube, [params_cintrage])
+            progression(f"Écriture du fichier {format_export}...")
+            exporter_points(points, nom_fichier)
+            
+        def succes(_):
+            self.interface.status_var.set(f"Export {format_export} terminé")
+            tk.messagebox.showinfo("Succès", f"Le fichier {format_export} a été créé avec succès")
+            
+        def erreur(e):
+            self.interface.status_var.set(f"Erreur lors de l'export {format_export}")
+            tk.messagebox.showerror("Erreur", f"Erreur lors de l'export {format_export}: {str(e)}")
+            
+        self.interface.executer_en_arriere_plan("export", tache, succes,
+                                                f"Export {format_export} en cours...", erreur)
+        
+    def demander_fichier_export(self, format_export):
+        # Nom proposé : tube_cintre.dxf / .svg, sans écraser un fichier sans confirmation
+        from tkinter import filedialog
+        extension = "." + format_export.lower()
+        return filedialog.asksaveasfilename(title=f"Exporter en {format_export}", defaultextension=extension,
+                                            initialfile="tube_cintre" + extension,
+                                            filetypes=[(format_export, "*" + extension)])
+
+    def exporter_dxf(self):
+        nom_fichier = self.demander_fichier_export("DXF")
+        if nom_fichier:
+            self.exporter("DXF", nom_fichier, self.exporteur.exporter_dxf)
             
     def exporter_svg(self):
-        try:
-            params_tube = ParametresTube(
-                diametre=float(self.interface.diametre_var.get()),
-                epaisseur=float(self.interface.epaisseur_var.get()),
-                longueur=float(self.interface.longueur_var.get())
-            )
-            params_cintrage = ParametresCintrage(
-                angle=float(self.interface.angle_var.get()),
-                rayon=float(self.interface.rayon_var.get()),
-                position=float(self.interface.position_var.get())
-            )
-            points = self.calculateur.calculer_points_tube(params_tube, params_cintrage)
-            self.exporteur.exporter_svg(points, "tube_cintre.svg")
-            tk.messagebox.showinfo("Succès", "Le fichier SVG a été créé avec succès")
-        except Exception as e:
-            tk.messagebox.showerror("Erreur", f"Erreur lors de l'export SVG: {str(e)}")
+        nom_fichier = self.demander_fichier_export("SVG")
+        if nom_fichier:
+            self.exporter("SVG", nom_fichier, self.exporteur.exporter_svg)
+        
+    def quitter(self):
+        self.interface.fermer()
+        self.root.quit()
         
     def run(self):
         self.root.mainloop()
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulateur de cintrage")
+    parser.add_argument("--instrumentation", nargs="?", const="1", choices=("1", "statut"),
+                        help="Mesures des chemins critiques ('statut' : résumé dans la barre de statut)")
+    parser.add_argument("--statistiques", metavar="FICHIER", help="Écrit les mesures en JSON à la fermeture")
+    parser.add_argument("--profil", metavar="FICHIER", help="Capture cProfile de la session dans ce fichier")
+    args = parser.parse_args(argv)
+
+    if args.instrumentation or args.statistiques:
+        instrumentation.activer(True, args.instrumentation == "statut" or None)
+    with instrumentation.profil(args.profil):
+        app = ApplicationCintrage()
+        app.run()
+    if args.statistiques:
+        instrumentation.statistiques.vers_json(args.statistiques)
+
 if __name__ == "__main__":
-    app = ApplicationCintrage()
-    app.run()
+    main()
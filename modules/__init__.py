@@ -0,0 +1,48 @@
+"""
+Calculs de cintrage, exports et interface
+
+Le cœur (calculs, géométrie, exports, projets, débit, balayages) ne dépend que de NumPy
+et de la bibliothèque standard : il se charge sans tkinter ni affichage,
+pour le mode batch et les scripts. L'interface (modules.interface,
+modules.rendu) n'est importée que par l'application graphique.
+
+Les noms principaux du cœur sont accessibles depuis le paquet et chargés au
+premier accès seulement :
+
+    from modules import CalculateurCintrage, ParametresTube  # importe modules.calculs
+"""
+import importlib
+
+# Nom public -> module du cœur qui le définit
+_API = {
+    "ParametresTube": "calculs",
+    "ParametresCintrage": "calculs",
+    "CalculMultiCintrage": "calculs",
+    "CalculateurCintrage": "calculs",
+    "GeometrieTube": "geometrie",
+    "GeometrieIncrementale": "geometrie",
+    "TamponPoints": "points",
+    "ExportConfig": "export",
+    "ExporteurPlans": "export",
+    "Piece": "projet",
+    "charger_projet": "projet",
+    "enregistrer_projet": "projet",
+    "BibliothequePieces": "projet",
+    "CataloguePieces": "catalogue",
+    "planifier_decoupe": "decoupe",
+    "balayer": "balayage",
+    "SolveurInverse": "inverse",
+}
+
+__all__ = sorted(_API)
+
+def __getattr__(nom):
+    module = _API.get(nom)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+    valeur = getattr(importlib.import_module(f"{__name__}.{module}"), nom)
+    globals()[nom] = valeur  # Accès suivants sans passer par __getattr__
+    return valeur
+
+def __dir__():
+    return sorted(set(globals()) | set(_API))
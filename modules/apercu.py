@@ -0,0 +1,94 @@
+"""
+Aperçu en direct d'un programme de cintrage pendant la saisie
+
+Apercu garde la géométrie incrémentale (voir GeometrieIncrementale) du
+dernier programme prévisualisé. À chaque mise à jour, le programme est
+comparé à cette géométrie et seul ce qui a changé est recalculé :
+    - rien : la géométrie précédente est réutilisée telle quelle ;
+    - la longueur du tube : seul le segment final est recalculé ;
+    - un seul cintrage : son tronçon et le suivant sont recalculés, la
+      suite du tube est déplacée en bloc ;
+    - sinon (ajout, suppression, réglages de calcul) : calcul complet.
+Les programmes non plans (rotation) passent par le calcul complet du
+calculateur, mis en cache.
+
+Aucune dépendance à tkinter.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+import numpy as np
+from modules import instrumentation
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube, est_plan
+from modules.geometrie import GeometrieTube
+
+# Nature du recalcul fait par Apercu.mettre_a_jour
+AUCUN = "aucun"
+LONGUEUR = "longueur"
+CINTRAGE = "cintrage"
+COMPLET = "complet"
+
+@dataclass
+class ResultatApercu:
+    geometrie: GeometrieTube
+    cintrages: List[ParametresCintrage]  # Programme prévisualisé, trié par position
+    index: Optional[int]                 # Index du cintrage prévisualisé dans cintrages
+    recalcul: str                        # AUCUN, LONGUEUR, CINTRAGE ou COMPLET
+
+class Apercu:
+    def __init__(self, calculateur: CalculateurCintrage):
+        self.calculateur = calculateur
+        self._incrementale = None
+        self._reglages = None
+
+    def vider(self):
+        """Oublie la géométrie gardée : la prochaine mise à jour fait un calcul complet"""
+        self._incrementale = None
+
+    def mettre_a_jour(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage],
+                      index: Optional[int] = None) -> ResultatApercu:
+        """
+        Géométrie du programme, recalculée seulement là où il diffère du précédent
+
+        Args:
+            params_tube: Tube prévisualisé
+            cintrages: Programme prévisualisé, dans un ordre quelconque
+            index: Index dans cintrages du cintrage prévisualisé (mis en évidence)
+        """
+        ordre = sorted(range(len(cintrages)), key=lambda i: cintrages[i].position)
+        tries = [cintrages[i] for i in ordre]
+        index = ordre.index(index) if index is not None else None
+
+        if not est_plan(tries):
+            self._incrementale = None
+            return self._resultat(self.calculateur.calculer_geometrie(params_tube, tries), tries, index, COMPLET)
+
+        # Empreinte du calculateur : cintrages (rotation comprise) et réglages de calcul
+        calculateur = self.calculateur
+        _, programme, *reglages = calculateur.empreinte(params_tube, tries)
+        geometrie = self._incrementale
+        differents = None
+        if geometrie is not None and reglages == self._reglages and len(tries) == geometrie.positions.size:
+            programme = np.array(programme, dtype=np.float64).reshape(-1, 4)
+            # La géométrie gardée est plane : rotations nulles
+            actuel = np.column_stack((geometrie.positions, geometrie.angles, geometrie.rayons,
+                                      np.zeros(geometrie.positions.size)))
+            differents = (programme != actuel).any(axis=1).nonzero()[0]
+
+        if differents is None or len(differents) > 1:
+            self._incrementale = calculateur.creer_geometrie_incrementale(params_tube, tries)
+            self._reglages = reglages
+            recalcul = COMPLET
+        elif len(differents) == 1:
+            cintrage = tries[differents[0]]
+            geometrie.modifier_cintrage(int(differents[0]), cintrage.position, cintrage.angle, cintrage.rayon)
+            recalcul = CINTRAGE
+        else:
+            recalcul = AUCUN
+        if self._incrementale.longueur != params_tube.longueur:
+            self._incrementale.modifier_longueur(params_tube.longueur)
+            recalcul = LONGUEUR if recalcul == AUCUN else recalcul
+        return self._resultat(self._incrementale.geometrie, tries, index, recalcul)
+
+    def _resultat(self, geometrie, cintrages, index, recalcul) -> ResultatApercu:
+        instrumentation.compter("apercu." + recalcul)
+        return ResultatApercu(geometrie, cintrages, index, recalcul)
@@ -0,0 +1,148 @@
+"""
+Balayage de paramètres : angle, rayon et retour élastique
+
+Évalue en un seul appel, sur la grille de toutes les combinaisons d'angles,
+de rayons et de coefficients de retour élastique, les grandeurs données
+combinaison par combinaison par CalculateurCintrage :
+
+    angle_reel            angle à cintrer, angle / coefficient (calculer_retour_elastique)
+    rayon_effectif        rayon de la géométrie, rayon / coefficient
+    valeur_A              valeur A à retrancher, R x (tan(a/2) - a/2) (calculer_valeur_A)
+    longueur_developpee   tube de longueur donnée à un seul cintrage
+                          (calculer_longueur_developpee)
+
+Chaque grandeur est un tableau (angles, rayons, coefficients) en lecture
+seule. Les fonctions trigonométriques ne sont évaluées qu'une fois par
+angle, puis combinées aux autres axes par diffusion NumPy ; une grandeur
+qui ne dépend pas d'un axe y est diffusée sans copie. Un million de
+combinaisons se calcule en quelques millisecondes.
+
+Usage (carte de chaleur en CSV, axes en début:fin:pas ou en liste) :
+
+    python -m modules.balayage --angles 10:170:1 --rayons 20:200:2 \
+        --coefficients 0.95:1:0.005 --grandeur valeur_A --coefficient 0.975 --sortie carte.csv
+"""
+import argparse
+import csv
+import sys
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from modules.calculs import valeur_A
+from modules.export import ecriture_atomique
+
+GRANDEURS = ("angle_reel", "rayon_effectif", "valeur_A", "longueur_developpee")
+
+@dataclass
+class CarteChaleur:
+    """Grandeur sur la grille angles x rayons, pour un coefficient de retour élastique"""
+    grandeur: str
+    valeurs: np.ndarray        # (angles, rayons)
+    angles: np.ndarray
+    rayons: np.ndarray
+    coefficient: float
+
+    def vers_csv(self, chemin: str):
+        """Matrice en CSV : une ligne par angle, une colonne par rayon"""
+        with ecriture_atomique(chemin, 'w', newline='', encoding='utf-8') as f:
+            ecrivain = csv.writer(f)
+            ecrivain.writerow([f"{self.grandeur} (coefficient {self.coefficient:g}) angle\\rayon"]
+                              + [f"{r:g}" for r in self.rayons.tolist()])
+            for angle, ligne in zip(self.angles.tolist(), self.valeurs.tolist()):
+                ecrivain.writerow([f"{angle:g}"] + [f"{v:.6g}" for v in ligne])
+
+@dataclass
+class Balayage:
+    angles: np.ndarray                # (na,) degrés
+    rayons: np.ndarray                # (nr,) mm
+    coefficients: np.ndarray          # (nc,)
+    longueur: float                   # Longueur du tube des longueurs développées
+    angle_reel: np.ndarray            # (na, nr, nc)
+    rayon_effectif: np.ndarray        # (na, nr, nc)
+    valeur_A: np.ndarray              # (na, nr, nc), NaN à partir de 180°
+    longueur_developpee: np.ndarray   # (na, nr, nc)
+
+    @property
+    def forme(self):
+        return self.angle_reel.shape
+
+    def __len__(self) -> int:
+        return self.angle_reel.size
+
+    def carte(self, grandeur: str, coefficient: Optional[float] = None) -> CarteChaleur:
+        """
+        Carte de chaleur d'une grandeur pour le coefficient le plus proche de
+        coefficient (le premier du balayage par défaut)
+        """
+        if grandeur not in GRANDEURS:
+            raise ValueError(f"Grandeur inconnue: {grandeur} (attendu: {', '.join(GRANDEURS)})")
+        k = 0 if coefficient is None else int(np.abs(self.coefficients - coefficient).argmin())
+        return CarteChaleur(grandeur, getattr(self, grandeur)[:, :, k], self.angles, self.rayons,
+                            float(self.coefficients[k]))
+
+def balayer(angles, rayons, coefficients=0.975, longueur: float = 0.0) -> Balayage:
+    """
+    Évalue toutes les combinaisons angle x rayon x coefficient
+
+    Args:
+        angles: Angle(s) de cintrage désirés (degrés)
+        rayons: Rayon(s) de cintrage (mm)
+        coefficients: Coefficient(s) de retour élastique (CalculateurCintrage.coefficient_retour_elastique)
+        longueur: Longueur du tube avant cintrage ; 0 donne l'allongement dû au cintrage seul
+    """
+    # Copies : les axes du résultat sont en lecture seule sans toucher aux tableaux reçus
+    angles, rayons, coefficients = (np.array(axe, dtype=np.float64, ndmin=1).ravel()
+                                    for axe in (angles, rayons, coefficients))
+    if (coefficients <= 0).any():
+        raise ValueError("Les coefficients de retour élastique doivent être positifs")
+    forme = (angles.size, rayons.size, coefficients.size)
+    a = angles[:, None, None]
+    r = rayons[None, :, None]
+    inverses = (1.0 / coefficients)[None, None, :]
+
+    # Un calcul trigonométrique par angle, les produits par rayon pour toute la grille
+    angles_rad = np.radians(angles)
+    allongement = angles_rad - 2 * np.sin(angles_rad / 2)  # Arc moins corde, par mm de rayon
+    grandeurs = (
+        a * inverses,
+        r * inverses,
+        valeur_A(r, a),
+        longueur + r * allongement[:, None, None],
+    )
+    for axe in (angles, rayons, coefficients):
+        axe.flags.writeable = False
+    # Vues diffusées, en lecture seule
+    return Balayage(angles, rayons, coefficients, float(longueur),
+                    *(np.broadcast_to(grandeur, forme) for grandeur in grandeurs))
+
+def _axe(texte: str) -> np.ndarray:
+    """Axe de balayage : "debut:fin:pas" (fin comprise) ou valeurs séparées par des virgules"""
+    if ":" in texte:
+        debut, fin, pas = (float(x) for x in texte.split(":"))
+        if pas <= 0:
+            raise argparse.ArgumentTypeError(f"Pas invalide: {texte}")
+        return debut + pas * np.arange(int(np.floor((fin - debut) / pas + 1e-9)) + 1)
+    return np.array([float(x) for x in texte.split(",")])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balayage angle x rayon x retour élastique")
+    parser.add_argument("--angles", type=_axe, required=True, help="Angles (degrés) : debut:fin:pas ou a,b,c")
+    parser.add_argument("--rayons", type=_axe, required=True, help="Rayons (mm) : debut:fin:pas ou a,b,c")
+    parser.add_argument("--coefficients", type=_axe, default=np.array([0.975]),
+                        help="Coefficients de retour élastique : debut:fin:pas ou a,b,c")
+    parser.add_argument("--longueur", type=float, default=0.0, help="Longueur du tube avant cintrage (mm)")
+    parser.add_argument("--grandeur", default="valeur_A", choices=GRANDEURS)
+    parser.add_argument("--coefficient", type=float, default=None,
+                        help="Coefficient de la carte (le plus proche du balayage)")
+    parser.add_argument("--sortie", required=True, help="Carte de chaleur en CSV")
+    args = parser.parse_args(argv)
+
+    balayage = balayer(args.angles, args.rayons, args.coefficients, args.longueur)
+    carte = balayage.carte(args.grandeur, args.coefficient)
+    carte.vers_csv(args.sortie)
+    print(f"{len(balayage)} combinaisons, carte {args.grandeur} {carte.valeurs.shape[0]}x{carte.valeurs.shape[1]} "
+          f"(coefficient {carte.coefficient:g}) : {args.sortie}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Mode batch sans interface graphique
+
+Calcule et exporte des programmes de cintrage en parallèle à partir d'un
+fichier de pièces (JSON lines ou CSV). Usage :
+
+    python -m modules.batch pieces.jsonl --sortie manifeste.jsonl --dossier plans --workers 8
+
+Format JSON lines (une pièce par ligne) :
+    {"id": "P1", "tube": {"diametre": 20, "epaisseur": 1.5, "longueur": 1000},
+     "cintrages": [{"position": 200, "angle": 90, "rayon": 50, "rotation": 0}]}
+
+Format CSV (en-tête obligatoire) :
+    id,diametre,epaisseur,longueur,cintrages
+    P1,20,1.5,1000,200:90:50;600:45:50:90
+
+La rotation du plan de cintrage (degrés) est facultative, nulle par défaut.
+
+Avec --barres, un plan de débit des barres de stock (modules.decoupe) est
+écrit dans le dossier des plans (plan_decoupe.csv), à partir des longueurs
+développées des pièces et de leur champ facultatif "quantite" (1 par défaut) :
+
+    python -m modules.batch pieces.jsonl --barres 6000,3000:20 --trait-scie 3 --serrage 50
+
+Le manifeste contient une ligne JSON par pièce (résultat ou erreur), écrite
+dès que la pièce est terminée. Une pièce dont l'identifiant est déjà apparu
+dans le fichier n'est pas exportée et figure en erreur dans le manifeste.
+
+Les fichiers sont nommés d'après l'identifiant de la pièce (nom_fichier_piece)
+et écrits de façon atomique (fichier temporaire puis renommage). Pour un
+export en masse depuis un programme, exporter_pieces prend des pièces
+(modules.projet.Piece) et rend le résultat de chaque pièce ; le mode batch
+passe lui aussi par exporter_pieces.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from modules.calculs import CalculateurCintrage, CalculMultiCintrage, ParametresTube, ParametresCintrage
+from modules.decoupe import METHODES, exporter_plans_csv, plans_par_section
+from modules.export import MODES_DXF, ExporteurPlans
+from modules.projet import Piece
+
+FORMATS_EXPORT = ("dxf", "svg")
+
+# Objets de calcul propres à chaque processus de travail
+_calculateur = None
+_exporteur = None
+
+def lire_pieces(chemin: str) -> Iterator[Dict]:
+    """
+    Lit les pièces d'un fichier CSV ou JSON lines, une à une
+    Les lignes invalides sont transmises telles quelles pour être signalées dans le manifeste
+    """
+    with open(chemin, newline='', encoding='utf-8') as f:
+        if chemin.lower().endswith('.csv'):
+            for numero, ligne in enumerate(csv.DictReader(f), start=2):
+                yield {"ligne": numero, **ligne}
+        else:
+            for numero, ligne in enumerate(f, start=1):
+                if not ligne.strip():
+                    continue
+                try:
+                    piece = json.loads(ligne)
+                except json.JSONDecodeError as e:
+                    piece = {"erreur_lecture": str(e)}
+                yield {"ligne": numero, **piece}
+
+def _convertir_piece(piece: Dict):
+    """Convertit une pièce lue (JSON ou CSV) en paramètres de tube et de cintrages"""
+    if "erreur_lecture" in piece:
+        raise ValueError(f"JSON invalide: {piece['erreur_lecture']}")
+
+    if "tube" in piece:
+        tube = piece["tube"]
+        cintrages = [ParametresCintrage(angle=float(c["angle"]),
+                                        rayon=float(c["rayon"]),
+                                        position=float(c["position"]),
+                                        rotation=float(c.get("rotation", 0.0)))
+                     for c in piece.get("cintrages", [])]
+    else:
+        tube = piece
+        cintrages = []
+        for champ in filter(None, (piece.get("cintrages") or "").split(";")):
+            position, angle, rayon, *rotation = champ.split(":")
+            cintrages.append(ParametresCintrage(angle=float(angle), rayon=float(rayon), position=float(position),
+                                                rotation=float(rotation[0]) if rotation else 0.0))
+
+    params_tube = ParametresTube(
+        diametre=float(tube["diametre"]),
+        epaisseur=float(tube["epaisseur"]),
+        longueur=float(tube["longueur"])
+    )
+    return params_tube, cintrages
+
+def nom_fichier_piece(identifiant: str) -> str:
+    """
+    Nom de fichier sûr et déterministe à partir de l'identifiant d'une pièce
+    Si des caractères ont dû être remplacés, une empreinte de l'identifiant
+    est ajoutée : deux identifiants distincts ne donnent jamais le même nom.
+    """
+    nom = re.sub(r'[^A-Za-z0-9._-]+', '_', identifiant).lstrip('.') or "piece"
+    if nom != identifiant:
+        nom += "-" + hashlib.blake2b(identifiant.encode('utf-8'), digest_size=4).hexdigest()
+    return nom
+
+def _initialiser_processus():
+    global _calculateur, _exporteur
+    _calculateur = CalculateurCintrage()
+    _exporteur = ExporteurPlans()
+
+def _calculer_points(params_tube: ParametresTube, cintrages: List[ParametresCintrage]):
+    # Le conteneur multi-cintrage valide l'espacement des cintrages
+    _calculateur.multi_cintrage = CalculMultiCintrage()
+    _calculateur.multi_cintrage.ajouter_cintrages(cintrages)
+    return _calculateur.calculer_points_tube(params_tube)
+
+def _ecrire_fichier(identifiant: str, params_tube: ParametresTube, points, format_export: str,
+                    dossier: str, mode_dxf: str) -> str:
+    """Écrit un plan de la pièce (calculée par _calculer_points) et retourne son chemin"""
+    chemin = os.path.join(dossier, f"{nom_fichier_piece(identifiant)}.{format_export}")
+    if format_export == "dxf":
+        primitives = _calculateur.calculer_primitives(params_tube) if mode_dxf == "arcs" else None
+        _exporteur.exporter_dxf(points, chemin, mode_dxf, primitives)
+    elif format_export == "svg":
+        _exporteur.exporter_svg(points, chemin)
+    else:
+        raise ValueError(f"Format inconnu: {format_export}")
+    return chemin
+
+def _identifiant(piece: Dict) -> str:
+    """Identifiant d'une pièce lue, son numéro de ligne à défaut"""
+    return str(piece.get("id", f"ligne_{piece['ligne']}"))
+
+def piece_lue(piece: Dict, coefficient: float = 0.975) -> Piece:
+    """
+    Pièce (modules.projet.Piece) d'une ligne lue par lire_pieces, cintrages triés par position
+    coefficient : retour élastique des pièces qui n'en précisent pas
+    """
+    params_tube, cintrages = _convertir_piece(piece)
+    return Piece(_identifiant(piece), params_tube, sorted(cintrages, key=lambda c: c.position),
+                 float(piece.get("coefficient_retour_elastique", coefficient)))
+
+def _exporter_piece(piece: Piece, formats: Sequence[str], dossier: str, mode_dxf: str) -> Dict:
+    """Calcule une pièce et écrit chacun de ses fichiers, dans un processus de travail"""
+    debut = time.perf_counter()
+    try:
+        _calculateur.coefficient_retour_elastique = piece.coefficient_retour_elastique
+        points = _calculer_points(piece.tube, list(piece.cintrages))
+        longueur_dev = _calculateur.calculer_longueur_developpee(piece.tube)
+        fichiers = [_ecrire_fichier(piece.nom, piece.tube, points, format_export, dossier, mode_dxf)
+                    for format_export in formats]
+        return {
+            "id": piece.nom,
+            "statut": "ok",
+            "nb_cintrages": len(piece.cintrages),
+            "diametre": piece.tube.diametre,
+            "epaisseur": piece.tube.epaisseur,
+            "nb_points": len(points),
+            "longueur_developpee": round(longueur_dev, 3),
+            "fichiers": fichiers,
+            "duree_ms": round((time.perf_counter() - debut) * 1000, 3)
+        }
+    except Exception as e:
+        return {
+            "id": piece.nom,
+            "statut": "erreur",
+            "erreur": f"{type(e).__name__}: {e}",
+            "duree_ms": round((time.perf_counter() - debut) * 1000, 3)
+        }
+
+def exporter_pieces(taches: Iterable[Tuple], workers: int = None, mode_dxf: str = "lignes") -> Iterator[Dict]:
+    """
+    Exporte des pièces en parallèle dans un pool de processus borné
+
+    Args:
+        taches: (pièce, formats ("dxf", "svg"), dossier de sortie) par pièce, suivis
+            d'un dictionnaire facultatif recopié dans le résultat de la pièce
+        workers: Nombre de processus (défaut: nombre de CPU)
+        mode_dxf: Entités DXF, comme ExporteurPlans.exporter_dxf
+
+    Yields:
+        Un résultat par pièce, dès qu'elle est terminée : id, statut ("ok" ou
+        "erreur"), section, longueur développée et chemins des fichiers, ou
+        erreur, et durée (ms). Une pièce dont le fichier a déjà été écrit dans
+        le même dossier par ce lot (même identifiant) est en erreur.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_en_cours = workers * 4  # File d'attente bornée : la mémoire ne dépend pas de la taille du lot
+    dossiers = set()
+    cibles = set()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_processus) as executor:
+        en_cours = {}  # Tâche -> informations recopiées dans son résultat
+        for piece, formats, dossier, *informations in taches:
+            informations = informations[0] if informations else {}
+            # Une même cible ne doit être écrite qu'une fois par lot : la première pièce l'emporte
+            cible = (os.path.abspath(dossier), nom_fichier_piece(piece.nom))
+            if cible in cibles:
+                yield {"id": piece.nom, "statut": "erreur", **informations,
+                       "erreur": "Identifiant déjà présent dans ce lot pour ce dossier"}
+                continue
+            cibles.add(cible)
+            if dossier not in dossiers:
+                os.makedirs(dossier, exist_ok=True)
+                dossiers.add(dossier)
+
+            en_cours[executor.submit(_exporter_piece, piece, list(formats), dossier, mode_dxf)] = informations
+            if len(en_cours) >= max_en_cours:
+                for future in wait(en_cours, return_when=FIRST_COMPLETED)[0]:
+                    yield {**future.result(), **en_cours.pop(future)}
+        for future in wait(en_cours)[0]:
+            yield {**future.result(), **en_cours[future]}
+
+def executer_batch(chemin_entree: str, chemin_manifeste: str, dossier: str,
+                   formats: List[str], workers: int = None, mode_dxf: str = "lignes",
+                   sortie_log=sys.stderr, decoupe: Dict = None) -> Dict:
+    """
+    Traite toutes les pièces d'un fichier dans un pool de processus
+    Les résultats sont écrits dans le manifeste au fur et à mesure
+    decoupe (stock, trait_scie, serrage, methode) : arguments de plans_par_section
+    pour écrire le plan de débit des pièces réussies dans le dossier
+
+    Returns:
+        Un résumé: nombre de pièces, d'erreurs, durée et débit (pièces/s)
+    """
+    os.makedirs(dossier, exist_ok=True)
+    coefficient = CalculateurCintrage().coefficient_retour_elastique
+    nb_pieces = 0
+    nb_erreurs = 0
+    commande = []  # Pièces réussies, pour le plan de débit
+    debut = time.perf_counter()
+
+    with open(chemin_manifeste, 'w', encoding='utf-8') as manifeste:
+
+        def ecrire(resultat):
+            nonlocal nb_pieces, nb_erreurs
+            nb_pieces += 1
+            if resultat["statut"] != "ok":
+                nb_erreurs += 1
+            elif decoupe is not None:
+                commande.append((resultat["id"], resultat["diametre"], resultat["epaisseur"],
+                                 resultat["longueur_developpee"], resultat["quantite"]))
+            manifeste.write(json.dumps(resultat, ensure_ascii=False) + "\n")
+
+        def taches():
+            for ligne in lire_pieces(chemin_entree):
+                informations = {"ligne": ligne.get("ligne"), "quantite": int(ligne.get("quantite") or 1)}
+                try:
+                    piece = piece_lue(ligne, coefficient)
+                except Exception as e:
+                    # Ligne illisible : signalée sans passer par le pool
+                    ecrire({"id": _identifiant(ligne), "statut": "erreur", "ligne": informations["ligne"],
+                            "erreur": f"{type(e).__name__}: {e}"})
+                    continue
+                yield piece, formats, dossier, informations
+
+        for resultat in exporter_pieces(taches(), workers, mode_dxf):
+            ecrire(resultat)
+            manifeste.flush()
+
+    duree = time.perf_counter() - debut
+    resume = {
+        "pieces": nb_pieces,
+        "erreurs": nb_erreurs,
+        "duree_s": round(duree, 3),
+        "pieces_par_seconde": round(nb_pieces / duree, 1) if duree > 0 else 0.0
+    }
+    print(f"{nb_pieces} pièces traitées ({nb_erreurs} erreurs) en {duree:.2f} s "
+          f"- {resume['pieces_par_seconde']} pièces/s", file=sortie_log)
+
+    if decoupe is not None and commande:
+        plans = plans_par_section(commande, **decoupe)
+        chemin_plan = os.path.join(dossier, "plan_decoupe.csv")
+        exporter_plans_csv(plans, chemin_plan)
+        resume["decoupe"] = {section: plan.resume() for section, plan in plans.items()}
+        for section, plan in plans.items():
+            print(f"Débit {section}: {len(plan.barres)} barres, chute {plan.taux_chute:.1%}", file=sortie_log)
+        print(f"Plan de débit: {chemin_plan}", file=sortie_log)
+    return resume
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcul et export de programmes de cintrage en batch")
+    parser.add_argument("entree", help="Fichier de pièces (.jsonl ou .csv)")
+    parser.add_argument("--sortie", default="manifeste.jsonl", help="Manifeste des résultats (JSON lines)")
+    parser.add_argument("--dossier", default="plans", help="Dossier des fichiers exportés")
+    parser.add_argument("--formats", default="dxf,svg", help="Formats d'export séparés par des virgules (dxf, svg)")
+    parser.add_argument("--mode-dxf", default="lignes", choices=MODES_DXF,
+                        help="Entités DXF: lignes, polyligne (POLYLINE R12) ou arcs (LINE + ARC)")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut: nombre de CPU)")
+    parser.add_argument("--barres", default=None,
+                        help="Longueurs des barres de stock pour le plan de débit, séparées par des virgules, "
+                             "avec une quantité facultative (6000,3000:20)")
+    parser.add_argument("--trait-scie", type=float, default=0.0, help="Largeur du trait de scie (mm)")
+    parser.add_argument("--serrage", type=float, default=0.0, help="Longueur de serrage perdue par barre (mm)")
+    parser.add_argument("--methode-decoupe", default="bfd", choices=METHODES, help="Méthode du plan de débit")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    for format_export in formats:
+        if format_export not in FORMATS_EXPORT:
+            parser.error(f"Format inconnu: {format_export}")
+
+    decoupe = None
+    if args.barres:
+        stock = {}
+        try:
+            for champ in filter(None, (c.strip() for c in args.barres.split(","))):
+                longueur, *quantite = champ.split(":")
+                stock[float(longueur)] = int(quantite[0]) if quantite else None
+        except ValueError:
+            parser.error(f"Barres invalides: {args.barres}")
+        decoupe = {"stock": stock, "trait_scie": args.trait_scie, "serrage": args.serrage,
+                   "methode": args.methode_decoupe}
+
+    resume = executer_batch(args.entree, args.sortie, args.dossier, formats, args.workers, args.mode_dxf,
+                            decoupe=decoupe)
+    return 1 if resume["erreurs"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
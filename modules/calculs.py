@@ -1,6 +1,18 @@
 import math
-from dataclasses import dataclass
-from typing import List, Tuple
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from modules.geometrie import (Arc, GeometrieIncrementale, GeometrieTube, Ligne, calculer_geometrie_programme,
+                               calculer_primitives_programme, nombre_segments_arcs)
+from modules import instrumentation
+from modules.geometrie3d import (ProgrammeLRA, ProgrammeXYZ, ProgrammeYBC, calculer_geometrie_3d,
+                                 lra_vers_xyz, lra_vers_ybc)
+from modules.points import TamponPoints
+from modules.interference import (EtapeCintrage, Obstacle, ResultatInterference, verifier_auto_interference,
+                                  verifier_etapes_programme)
 
 @dataclass
 class ParametresTube:
@@ -13,32 +25,152 @@ class ParametresCintrage:
     angle: float
     rayon: float
     position: float  # Distance depuis le début du tube jusqu'au point de cintrage
+    rotation: float = 0.0  # Rotation du plan de cintrage par rapport au cintrage précédent (degrés)
     
+def est_plan(cintrages: Sequence[ParametresCintrage]) -> bool:
+    """Vrai si tous les cintrages sont dans le même plan (aucune rotation)"""
+    return all(c.rotation == 0 for c in cintrages)
+
+def valeur_A(rayons, angles):
+    """
+    Valeur A à retrancher par cintrage, pour tout angle : R x (tan(a/2) - a/2),
+    soit environ 0,215 x R à 90°. C'est l'écart, de chaque côté du cintrage,
+    entre la cote mesurée jusqu'à l'intersection des tangentes et la moitié
+    de l'arc. Vectorisée (rayons et angles diffusés l'un sur l'autre) ; NaN
+    à partir de 180°, où les tangentes ne se coupent plus.
+
+    Args:
+        rayons: Rayon(s) de cintrage (mm)
+        angles: Angle(s) de cintrage en degrés, signe ignoré
+    """
+    angles_rad = np.radians(np.abs(angles))
+    with np.errstate(invalid='ignore'):
+        return np.where(angles_rad < math.pi, rayons * (np.tan(angles_rad / 2) - angles_rad / 2), np.nan)
+
 class CalculMultiCintrage:
+    """
+    Liste des cintrages d'un tube, toujours triée par position
+
+    Chaque cintrage reçoit un identifiant stable qui ne change pas quand
+    d'autres cintrages sont ajoutés ou supprimés. Les positions sont
+    indexées pour une insertion par dichotomie : l'écart minimal n'est
+    vérifié qu'avec les deux voisins. L'écart minimal rendant les positions
+    uniques, l'index d'un identifiant se retrouve aussi par dichotomie, à
+    partir de sa position.
+    """
+    ECART_MINIMAL = 10  # minimum 10mm entre les cintrages
+    
     def __init__(self):
         self.cintrages: List[ParametresCintrage] = []
+        self.ids: List[int] = []
+        self._positions: List[float] = []
+        self._position_par_id: Dict[int, float] = {}
+        self._prochain_id = 1
         
-    def ajouter_cintrage(self, params: ParametresCintrage):
-        # Vérifier que la nouvelle position est valide par rapport aux cintrages existants
-        for cintrage in self.cintrages:
-            if abs(cintrage.position - params.position) < 10:  # minimum 10mm entre les cintrages
+    def ajouter_cintrage(self, params: ParametresCintrage) -> int:
+        """
+        Insère un cintrage à sa place et retourne son identifiant
+        """
+        index = bisect_left(self._positions, params.position)
+        self._verifier_voisins(index, params.position)
+        identifiant = self._prochain_id
+        self._prochain_id += 1
+        self.cintrages.insert(index, params)
+        self.ids.insert(index, identifiant)
+        self._positions.insert(index, params.position)
+        self._position_par_id[identifiant] = params.position
+        return identifiant
+        
+    def ajouter_cintrages(self, cintrages: Sequence[ParametresCintrage]) -> List[int]:
+        """
+        Ajoute un lot de cintrages avec un seul tri et une seule vérification
+        Aucun cintrage n'est ajouté si l'un d'eux est trop proche d'un autre
+
+        Returns:
+            Les identifiants attribués, dans l'ordre du lot
+        """
+        nouveaux_ids = list(range(self._prochain_id, self._prochain_id + len(cintrages)))
+        lot = sorted(zip(self._positions + [c.position for c in cintrages],
+                         self.ids + nouveaux_ids,
+                         self.cintrages + list(cintrages)),
+                     key=lambda x: x[0])
+        for (position_1, _, _), (position_2, _, _) in zip(lot, lot[1:]):
+            if position_2 - position_1 < self.ECART_MINIMAL:
                 raise ValueError("Les cintrages sont trop proches")
-        self.cintrages.append(params)
-        self.cintrages.sort(key=lambda x: x.position)  # Trier par position
+        self._positions = [x[0] for x in lot]
+        self.ids = [x[1] for x in lot]
+        self.cintrages = [x[2] for x in lot]
+        self._position_par_id.update(zip(nouveaux_ids, (c.position for c in cintrages)))
+        self._prochain_id += len(cintrages)
+        return nouveaux_ids
         
     def supprimer_cintrage(self, index: int):
         if 0 <= index < len(self.cintrages):
             self.cintrages.pop(index)
+            del self._position_par_id[self.ids.pop(index)]
+            self._positions.pop(index)
+            
+    def supprimer_cintrage_par_id(self, identifiant: int):
+        self.supprimer_cintrage(self.index_cintrage(identifiant))
+        
+    def index_cintrage(self, identifiant: int) -> int:
+        """
+        Index actuel du cintrage d'identifiant donné, -1 s'il n'existe pas
+        """
+        position = self._position_par_id.get(identifiant)
+        return -1 if position is None else bisect_left(self._positions, position)
+            
+    def modifier_cintrage(self, index: int, params: ParametresCintrage):
+        # Le cintrage est retiré puis réinséré à sa nouvelle place, avec le même identifiant
+        ancien = self.cintrages.pop(index)
+        identifiant = self.ids.pop(index)
+        self._positions.pop(index)
+        nouvel_index = bisect_left(self._positions, params.position)
+        try:
+            self._verifier_voisins(nouvel_index, params.position)
+        except ValueError:
+            self.cintrages.insert(index, ancien)
+            self.ids.insert(index, identifiant)
+            self._positions.insert(index, ancien.position)
+            raise
+        self.cintrages.insert(nouvel_index, params)
+        self.ids.insert(nouvel_index, identifiant)
+        self._positions.insert(nouvel_index, params.position)
+        self._position_par_id[identifiant] = params.position
+        
+    def vider(self):
+        self.cintrages.clear()
+        self.ids.clear()
+        self._positions.clear()
+        self._position_par_id.clear()
+        
+    def _verifier_voisins(self, index: int, position: float):
+        # La liste étant triée, seuls les voisins peuvent être trop proches
+        for voisin in (index - 1, index):
+            if 0 <= voisin < len(self._positions) and abs(self._positions[voisin] - position) < self.ECART_MINIMAL:
+                raise ValueError("Les cintrages sont trop proches")
     
 class CalculateurCintrage:
     def __init__(self):
         self.coefficient_retour_elastique = 0.975  # Facteur de correction pour le retour élastique
         self.multi_cintrage = CalculMultiCintrage()
+        # Tessellation des arcs : nombre fixe de segments, sauf si une flèche
+        # maximale (mm) ou un pas angulaire maximal (degrés) est défini
+        self.nb_points = 40
+        self.tolerance_corde: Optional[float] = None
+        self.pas_angulaire_max: Optional[float] = None
+        # Cache LRU des géométries calculées, indexé par l'empreinte du programme
+        self.taille_cache = 128
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_succes = 0
+        self._cache_echecs = 0
+        self._verrou_cache = threading.Lock()  # Calculs possibles depuis plusieurs threads
         
-    def calculer_points_tube(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage = None) -> List[Tuple[float, float]]:
+    def calculer_points_tube(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage = None) -> TamponPoints:
         """
         Calcule les points de contrôle pour dessiner le tube cintré
-        Retourne une liste de tuples (x, y) représentant les points du tube
+        Retourne un TamponPoints : les points du tube, sans copie du tableau
+        calculé, itérables comme des tuples (x, y)
         """
         if params_cintrage:
             # Mode cintrage unique
@@ -47,112 +179,247 @@ class CalculateurCintrage:
             # Mode multi-cintrage
             return self._calculer_points_multi_cintrage(params_tube)
             
-    def _calculer_points_cintrage_unique(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage) -> List[Tuple[float, float]]:
-        points = []
-        x_courant = 0
-        y_courant = 0
-        angle_courant = 0  # en radians, 0 = horizontal vers la droite
-        
-        # Point de départ
-        points.append((x_courant, y_courant))
-        
-        # Segment droit avant le cintrage
-        if params_cintrage.position > 0:
-            x_courant = params_cintrage.position
-            points.append((x_courant, y_courant))
-        
-        # Calcul de l'arc de cintrage
-        angle_rad = math.radians(params_cintrage.angle)
-        rayon_effectif = params_cintrage.rayon / self.coefficient_retour_elastique
-        
-        # Points de l'arc
-        nb_points = 40  # Plus de points pour un arc plus lisse
-        
-        # Centre de rotation pour l'arc
-        centre_x = x_courant - rayon_effectif * math.sin(angle_courant)
-        centre_y = y_courant + rayon_effectif * math.cos(angle_courant)
-        
-        for j in range(nb_points + 1):
-            t = j / nb_points
-            angle_arc = angle_rad * t
-            
-            # Rotation autour du centre
-            x = centre_x + rayon_effectif * (math.sin(angle_courant + angle_arc))
-            y = centre_y - rayon_effectif * (math.cos(angle_courant + angle_arc))
-            points.append((x, y))
-        
-        # Mise à jour de la position finale
-        x_courant = points[-1][0]
-        y_courant = points[-1][1]
-        angle_courant += angle_rad
-        
-        # Segment final
-        longueur_restante = params_tube.longueur - params_cintrage.position
-        if longueur_restante > 0:
-            x_final = x_courant + longueur_restante * math.cos(angle_courant)
-            y_final = y_courant + longueur_restante * math.sin(angle_courant)
-            points.append((x_final, y_final))
-            
-        return points
+    def calculer_points_array(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage]) -> np.ndarray:
+        """
+        Calcule les points du tube pour une liste de cintrages triée par position
+        Retourne un tableau NumPy (N, 2) des points (x, y) du tube, en lecture seule
+        """
+        return self.calculer_geometrie(params_tube, cintrages).points
         
-    def _calculer_points_multi_cintrage(self, params_tube: ParametresTube) -> List[Tuple[float, float]]:
-        if not self.multi_cintrage.cintrages:
-            # Si pas de cintrage, retourner un tube droit
-            return [(0, 0), (params_tube.longueur, 0)]
-            
-        points = []
-        x_courant = 0
-        y_courant = 0
-        angle_courant = 0  # en radians, 0 = horizontal vers la droite
-        
-        # Point de départ
-        points.append((x_courant, y_courant))
-        
-        for i, cintrage in enumerate(self.multi_cintrage.cintrages):
-            # Segment droit jusqu'au point de cintrage
-            distance_segment = cintrage.position - (0 if i == 0 else self.multi_cintrage.cintrages[i-1].position)
-            if distance_segment > 0:
-                x_courant += distance_segment * math.cos(angle_courant)
-                y_courant += distance_segment * math.sin(angle_courant)
-                points.append((x_courant, y_courant))
-            
-            # Calcul de l'arc de cintrage
-            angle_rad = math.radians(cintrage.angle)
-            rayon_effectif = cintrage.rayon / self.coefficient_retour_elastique
-            
-            # Points de l'arc
-            nb_points = 40  # Plus de points pour un arc plus lisse
-            
-            # Centre de rotation pour l'arc
-            centre_x = x_courant - rayon_effectif * math.sin(angle_courant)
-            centre_y = y_courant + rayon_effectif * math.cos(angle_courant)
-            
-            for j in range(nb_points + 1):
-                t = j / nb_points
-                angle_arc = angle_rad * t
-                
-                # Rotation autour du centre
-                x = centre_x + rayon_effectif * (math.sin(angle_courant + angle_arc))
-                y = centre_y - rayon_effectif * (math.cos(angle_courant + angle_arc))
-                points.append((x, y))
-            
-            # Mise à jour de la position et de l'angle
-            x_courant = points[-1][0]
-            y_courant = points[-1][1]
-            angle_courant += angle_rad
-        
-        # Segment final
-        longueur_restante = params_tube.longueur - (self.multi_cintrage.cintrages[-1].position if self.multi_cintrage.cintrages else 0)
-        if longueur_restante > 0:
-            x_final = x_courant + longueur_restante * math.cos(angle_courant)
-            y_final = y_courant + longueur_restante * math.sin(angle_courant)
-            points.append((x_final, y_final))
+    def calculer_geometrie(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage]) -> GeometrieTube:
+        """
+        Calcule les points du tube et l'index des cintrages dans ces points :
+        indices du premier et du dernier point de chaque arc et abscisse
+        curviligne de son début. Les tableaux retournés sont en lecture seule.
+
+        Le résultat est mis en cache : un programme identique (tube, cintrages,
+        retour élastique et tessellation) n'est calculé qu'une fois. La clé porte
+        sur les valeurs des cintrages, toute modification de
+        multi_cintrage.cintrages donne donc une nouvelle clé.
+        """
+        return self._geometrie_en_cache(self.empreinte(params_tube, cintrages), "calculs.geometrie",
+                                        self._calculer_geometrie, params_tube, cintrages)
+        
+    def _geometrie_en_cache(self, cle: tuple, chrono: str, calculer, params_tube: ParametresTube,
+                            cintrages: Sequence[ParametresCintrage]) -> GeometrieTube:
+        """
+        Géométrie de cle dans le cache LRU, sinon calculée par calculer(params_tube, cintrages),
+        rendue en lecture seule et mise en cache
+        """
+        with self._verrou_cache:
+            geometrie = self._cache.get(cle)
+            if geometrie is not None:
+                self._cache.move_to_end(cle)
+                self._cache_succes += 1
+                instrumentation.compter("calculs.cache_succes")
+                return geometrie
+            self._cache_echecs += 1
+        instrumentation.compter("calculs.cache_echecs")
+
+        with instrumentation.chrono(chrono):
+            geometrie = calculer(params_tube, cintrages)
+        instrumentation.compter("calculs.points", len(geometrie.points))
+        for tableau in (geometrie.points, geometrie.indices_cintrages, geometrie.abscisses_cintrages):
+            tableau.flags.writeable = False
+        with self._verrou_cache:
+            self._cache[cle] = geometrie
+            while len(self._cache) > self.taille_cache:
+                self._cache.popitem(last=False)  # Éviction du moins récemment utilisé
+        return geometrie
+        
+    def empreinte(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage]) -> tuple:
+        """
+        Empreinte hashable d'un programme de cintrage et des réglages de calcul
+        """
+        return (
+            astuple(params_tube),
+            tuple((c.position, c.angle, c.rayon, c.rotation) for c in cintrages),
+            self.coefficient_retour_elastique,
+            self.nb_points,
+            self.tolerance_corde,
+            self.pas_angulaire_max
+        )
+        
+    def statistiques_cache(self) -> dict:
+        """
+        Statistiques du cache de géométrie (succès, échecs, taille)
+        """
+        total = self._cache_succes + self._cache_echecs
+        return {
+            "succes": self._cache_succes,
+            "echecs": self._cache_echecs,
+            "taux_succes": self._cache_succes / total if total else 0.0,
+            "taille": len(self._cache),
+            "taille_max": self.taille_cache
+        }
+        
+    def vider_cache(self):
+        with self._verrou_cache:
+            self._cache.clear()
+        self._cache_succes = 0
+        self._cache_echecs = 0
+        
+    def _calculer_geometrie(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage]) -> GeometrieTube:
+        if not est_plan(cintrages):
+            # Vue de dessus (plan XY) d'un programme 3D
+            geometrie = self._calculer_geometrie_3d(params_tube, cintrages)
+            return GeometrieTube(geometrie.points[:, :2].copy(), geometrie.indices_cintrages,
+                                 geometrie.abscisses_cintrages)
+        angles = [c.angle for c in cintrages]
+        rayons = [c.rayon / self.coefficient_retour_elastique for c in cintrages]
+        nb_points = nombre_segments_arcs(angles, rayons, self.nb_points,
+                                         self.tolerance_corde, self.pas_angulaire_max)
+        return calculer_geometrie_programme(
+            params_tube.longueur,
+            [c.position for c in cintrages],
+            angles,
+            rayons,
+            nb_points
+        )
+        
+    def calculer_geometrie_3d(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None) -> GeometrieTube:
+        """
+        Calcule la ligne moyenne 3D du tube, points (N, 3), en tenant compte
+        de la rotation du plan de chaque cintrage. Mis en cache comme calculer_geometrie.
+        Par défaut, porte sur la liste des cintrages du mode multi-cintrage
+        """
+        if cintrages is None:
+            cintrages = self.multi_cintrage.cintrages
+        return self._geometrie_en_cache(("3d",) + self.empreinte(params_tube, cintrages), "calculs.geometrie_3d",
+                                        self._calculer_geometrie_3d, params_tube, cintrages)
+        
+    def _calculer_geometrie_3d(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage]) -> GeometrieTube:
+        angles = [c.angle for c in cintrages]
+        rayons = [c.rayon / self.coefficient_retour_elastique for c in cintrages]
+        nb_points = nombre_segments_arcs(angles, rayons, self.nb_points,
+                                         self.tolerance_corde, self.pas_angulaire_max)
+        return calculer_geometrie_3d(
+            params_tube.longueur,
+            [c.position for c in cintrages],
+            angles,
+            rayons,
+            [c.rotation for c in cintrages],
+            nb_points
+        )
+        
+    def programme_lra(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None) -> ProgrammeLRA:
+        """
+        Programme LRA du tube : longueur droite avant chaque cintrage et
+        segment final, rotation du plan, angle et rayon effectif
+        """
+        if cintrages is None:
+            cintrages = self.multi_cintrage.cintrages
+        positions = np.array([c.position for c in cintrages], dtype=np.float64)
+        return ProgrammeLRA(
+            np.diff(positions, prepend=0.0, append=params_tube.longueur),
+            np.array([c.rotation for c in cintrages], dtype=np.float64),
+            np.array([c.angle for c in cintrages], dtype=np.float64),
+            np.array([c.rayon for c in cintrages], dtype=np.float64) / self.coefficient_retour_elastique
+        )
+        
+    def programme_ybc(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None) -> ProgrammeYBC:
+        """Programme machine YBC (avance, rotation, angle compensé du retour élastique)"""
+        return lra_vers_ybc(self.programme_lra(params_tube, cintrages), self.coefficient_retour_elastique)
+        
+    def programme_xyz(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None) -> ProgrammeXYZ:
+        """Sommets des tangentes du tube en 3D"""
+        return lra_vers_xyz(self.programme_lra(params_tube, cintrages))
+        
+    def cintrages_depuis_lra(self, programme: ProgrammeLRA) -> Tuple[float, List[ParametresCintrage]]:
+        """
+        Cintrages correspondant à un programme LRA
+
+        Returns:
+            (longueur du tube, liste des cintrages triée par position)
+        """
+        positions = np.cumsum(programme.longueurs)
+        rayons = np.asarray(programme.rayons) * self.coefficient_retour_elastique
+        cintrages = [ParametresCintrage(angle=float(a), rayon=float(r), position=float(p), rotation=float(rot))
+                     for a, r, p, rot in zip(programme.angles, rayons, positions[:-1], programme.rotations)]
+        return float(positions[-1]), cintrages
+        
+    def verifier_interferences(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None,
+                               marge: float = None) -> ResultatInterference:
+        """
+        Vérifie que le tube cintré ne se traverse pas, avec son diamètre réel
+        Par défaut, porte sur la liste des cintrages du mode multi-cintrage
+        """
+        if cintrages is None:
+            cintrages = self.multi_cintrage.cintrages
+        geometrie = self.calculer_geometrie_3d(params_tube, cintrages)
+        with instrumentation.chrono("calculs.interferences"):
+            return verifier_auto_interference(geometrie.points, params_tube.diametre, marge=marge)
+        
+    def verifier_etapes(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None,
+                        obstacles: Sequence[Obstacle] = (), sous_etapes: int = 1,
+                        marge: float = None) -> List[EtapeCintrage]:
+        """
+        Vérifie chaque étape de fabrication : interférences du tube et collisions
+        avec les obstacles de la machine (voir modules.interference pour le repère machine)
+        """
+        if cintrages is None:
+            cintrages = self.multi_cintrage.cintrages
+        angles = [c.angle for c in cintrages]
+        rayons = [c.rayon / self.coefficient_retour_elastique for c in cintrages]
+        return verifier_etapes_programme(
+            params_tube.longueur,
+            [c.position for c in cintrages],
+            angles,
+            rayons,
+            [c.rotation for c in cintrages],
+            params_tube.diametre,
+            nombre_segments_arcs(angles, rayons, self.nb_points, self.tolerance_corde, self.pas_angulaire_max),
+            obstacles,
+            sous_etapes,
+            marge
+        )
+        
+    def creer_geometrie_incrementale(self, params_tube: ParametresTube, cintrages: Sequence[ParametresCintrage] = None) -> GeometrieIncrementale:
+        """
+        Crée une géométrie modifiable cintrage par cintrage, sans recalcul complet
+        Par défaut, elle porte sur la liste des cintrages du mode multi-cintrage
+        """
+        if cintrages is None:
+            cintrages = self.multi_cintrage.cintrages
+        if not est_plan(cintrages):
+            raise ValueError("La géométrie incrémentale ne porte que sur les programmes plans")
+        return GeometrieIncrementale(
+            params_tube.longueur,
+            [c.position for c in cintrages],
+            [c.angle for c in cintrages],
+            [c.rayon for c in cintrages],
+            self.coefficient_retour_elastique,
+            self.nb_points,
+            self.tolerance_corde,
+            self.pas_angulaire_max
+        )
+        
+    def calculer_primitives(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage = None) -> List[Union[Ligne, Arc]]:
+        """
+        Calcule les primitives exactes du tube (segments droits et arcs)
+        Les arcs sont décrits par leur centre, rayon et angles de début/fin, sans tessellation
+        """
+        cintrages = [params_cintrage] if params_cintrage else self.multi_cintrage.cintrages
+        if not est_plan(cintrages):
+            raise ValueError("Les primitives ne sont disponibles que pour les programmes plans")
+        return calculer_primitives_programme(
+            params_tube.longueur,
+            [c.position for c in cintrages],
+            [c.angle for c in cintrages],
+            [c.rayon / self.coefficient_retour_elastique for c in cintrages]
+        )
             
-        return points
+    def _calculer_points_cintrage_unique(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage) -> TamponPoints:
+        return TamponPoints(self.calculer_points_array(params_tube, [params_cintrage]))
+        
+    def _calculer_points_multi_cintrage(self, params_tube: ParametresTube) -> TamponPoints:
+        return TamponPoints(self.calculer_points_array(params_tube, self.multi_cintrage.cintrages))
         
-    def calculer_longueur_developpee(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage = None) -> float:
+    def calculer_longueur_developpee(self, params_tube: ParametresTube, params_cintrage: ParametresCintrage = None,
+                                     cintrages: Sequence[ParametresCintrage] = None) -> float:
         """
         Calcule la longueur totale développée nécessaire pour le tube
+        En mode multi-cintrage, cintrages remplace ceux de multi_cintrage s'il est donné
         """
         if params_cintrage:
             # Mode cintrage unique
@@ -162,7 +429,7 @@ class CalculateurCintrage:
         else:
             # Mode multi-cintrage
             longueur_totale = params_tube.longueur
-            for cintrage in self.multi_cintrage.cintrages:
+            for cintrage in (self.multi_cintrage.cintrages if cintrages is None else cintrages):
                 angle_rad = math.radians(cintrage.angle)
                 longueur_arc = angle_rad * cintrage.rayon
                 longueur_totale += (longueur_arc - 2 * cintrage.rayon * math.sin(angle_rad/2))
@@ -176,16 +443,16 @@ class CalculateurCintrage:
         
     def calculer_valeur_A(self, rayon: float, angle: float) -> float:
         """
-        Calcule la valeur A à retrancher pour obtenir la dimension désirée.
-        Cette valeur est théoriquement égale à 0,215 x R pour un angle de 90°.
+        Calcule la valeur A à retrancher pour obtenir la dimension désirée
+        (voir valeur_A) : environ 0,215 x R pour un angle de 90°.
         
         Args:
             rayon: Le rayon de cintrage
             angle: L'angle de cintrage en degrés
             
         Returns:
-            La valeur A à retrancher
+            La valeur A à retrancher (un tableau si rayon ou angle en est un),
+            NaN à partir de 180°
         """
-        if abs(angle - 90) < 0.1:  # On vérifie si l'angle est proche de 90°
-            return 0.215 * rayon
-        return 0  # Pour les autres angles, à implémenter selon les besoins
+        valeur = valeur_A(rayon, angle)
+        return valeur if np.ndim(valeur) else float(valeur)
@@ -0,0 +1,347 @@
+"""
+Catalogue des pièces, base SQLite indexée
+
+Chaque pièce est enregistrée avec ses paramètres, son programme de cintrage
+et des valeurs dérivées calculées une fois à l'insertion (longueur développée,
+rayons extrêmes, emprise 3D) pour rechercher les pièces existantes par
+dimensions et réutiliser l'outillage :
+
+    catalogue = CataloguePieces("catalogue.db")
+    catalogue.ajouter_pieces(pieces)
+    catalogue.rechercher(diametre=20, epaisseur=1.5, rayon=50, longueur_developpee=(900, 1100))
+
+Un critère est une cote nominale, comparée exactement, ou un intervalle
+(min, max) dont une borne peut valoir None. Les requêtes sont paramétrées et
+leur texte ne dépend que de la forme des critères : sqlite3 réutilise les
+requêtes préparées. Une cote nominale de diamètre et d'épaisseur permet de
+parcourir l'index pieces_tube directement sur l'intervalle de longueur développée.
+
+En ligne de commande :
+
+    python -m modules.catalogue catalogue.db importer pieces.jsonl
+    python -m modules.catalogue catalogue.db rechercher --diametre 20 --rayon 50
+"""
+import argparse
+import sqlite3
+import sys
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.geometrie import nombre_segments_arcs
+from modules.geometrie3d import echantillonner_tubes
+from modules.projet import Piece
+
+VERSION_SCHEMA = 1
+TAILLE_CACHE_KO = 65536  # Cache de pages SQLite : tout le catalogue de 100 000 pièces en mémoire
+TAILLE_LOT = 4096        # Pièces dont les valeurs dérivées sont calculées ensemble
+
+Critere = Union[None, float, Tuple[Optional[float], Optional[float]]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pieces (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL UNIQUE,
+    diametre REAL NOT NULL,
+    epaisseur REAL NOT NULL,
+    longueur REAL NOT NULL,
+    coefficient REAL NOT NULL,
+    nb_cintrages INTEGER NOT NULL,
+    rayon_min REAL,
+    rayon_max REAL,
+    longueur_developpee REAL NOT NULL,
+    x_min REAL, y_min REAL, z_min REAL,
+    x_max REAL, y_max REAL, z_max REAL
+);
+CREATE TABLE IF NOT EXISTS cintrages (
+    piece INTEGER NOT NULL REFERENCES pieces(id) ON DELETE CASCADE,
+    ordre INTEGER NOT NULL,
+    position REAL NOT NULL,
+    angle REAL NOT NULL,
+    rayon REAL NOT NULL,
+    rotation REAL NOT NULL,
+    PRIMARY KEY (piece, ordre)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pieces_tube ON pieces (diametre, epaisseur, longueur_developpee);
+CREATE INDEX IF NOT EXISTS pieces_longueur_developpee ON pieces (longueur_developpee);
+CREATE INDEX IF NOT EXISTS pieces_nb_cintrages ON pieces (nb_cintrages);
+CREATE INDEX IF NOT EXISTS cintrages_rayon ON cintrages (rayon, piece);
+"""
+
+COLONNES = ("nom, diametre, epaisseur, longueur, coefficient, nb_cintrages, rayon_min, rayon_max, "
+            "longueur_developpee, x_min, y_min, z_min, x_max, y_max, z_max")
+
+@dataclass
+class EntreeCatalogue:
+    nom: str
+    tube: ParametresTube
+    coefficient_retour_elastique: float
+    nb_cintrages: int
+    rayon_min: Optional[float]
+    rayon_max: Optional[float]
+    longueur_developpee: float
+    emprise: Tuple[Tuple[float, float, float], Tuple[float, float, float]]  # Coins minimum et maximum (x, y, z)
+
+    @classmethod
+    def depuis_ligne(cls, ligne) -> "EntreeCatalogue":
+        (nom, diametre, epaisseur, longueur, coefficient, nb_cintrages, rayon_min, rayon_max,
+         longueur_developpee, x_min, y_min, z_min, x_max, y_max, z_max) = ligne
+        return cls(nom, ParametresTube(diametre=diametre, epaisseur=epaisseur, longueur=longueur), coefficient,
+                   nb_cintrages, rayon_min, rayon_max, longueur_developpee,
+                   ((x_min, y_min, z_min), (x_max, y_max, z_max)))
+
+def _condition(colonne: str, critere: Critere, conditions: List[str], parametres: list):
+    """Ajoute la condition SQL d'un critère (cote nominale ou intervalle)"""
+    if not isinstance(critere, (tuple, list)):
+        conditions.append(f"{colonne} = ?")
+        parametres.append(critere)
+        return
+    minimum, maximum = critere
+    if minimum is not None:
+        conditions.append(f"{colonne} >= ?")
+        parametres.append(minimum)
+    if maximum is not None:
+        conditions.append(f"{colonne} <= ?")
+        parametres.append(maximum)
+
+class CataloguePieces:
+    def __init__(self, chemin: str = ":memory:", calculateur: CalculateurCintrage = None):
+        self.chemin = chemin
+        self.calculateur = calculateur or CalculateurCintrage()
+        # Transactions explicites (BEGIN/COMMIT) : une seule par insertion en lot
+        self.connexion = sqlite3.connect(chemin, isolation_level=None, cached_statements=256)
+        self.connexion.execute("PRAGMA foreign_keys = ON")
+        if chemin != ":memory:":
+            self.connexion.execute("PRAGMA journal_mode = WAL")
+            self.connexion.execute("PRAGMA synchronous = NORMAL")
+            self.connexion.execute(f"PRAGMA cache_size = {-TAILLE_CACHE_KO}")
+        version = self.connexion.execute("PRAGMA user_version").fetchone()[0]
+        if version > VERSION_SCHEMA:
+            self.connexion.close()
+            raise ValueError(f"Version de catalogue non prise en charge: {version}")
+        self.connexion.executescript(SCHEMA)
+        self.connexion.execute(f"PRAGMA user_version = {VERSION_SCHEMA}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def __len__(self) -> int:
+        return self.connexion.execute("SELECT COUNT(*) FROM pieces").fetchone()[0]
+
+    def __contains__(self, nom: str) -> bool:
+        return self.connexion.execute("SELECT 1 FROM pieces WHERE nom = ?", (nom,)).fetchone() is not None
+
+    def fermer(self):
+        self.connexion.close()
+
+    def valeurs_derivees(self, piece: Piece) -> tuple:
+        """Longueur développée, rayons extrêmes et emprise 3D (coins minimum et maximum) de la pièce"""
+        return self.valeurs_derivees_lot([piece])[0]
+
+    def valeurs_derivees_lot(self, pieces: Sequence[Piece]) -> List[tuple]:
+        """
+        Valeurs dérivées (voir valeurs_derivees) d'un lot de pièces, calculées
+        ensemble : les lignes moyennes de toutes les pièces sont échantillonnées
+        en un seul appel à echantillonner_tubes, chacune avec le coefficient de
+        retour élastique de sa pièce. Seuls les réglages de tessellation sont
+        lus dans self.calculateur, qui n'est pas modifié.
+        """
+        if not pieces:
+            return []
+        calculateur = self.calculateur
+        nombre = len(pieces)
+        nb_cintrages = np.array([len(p.cintrages) for p in pieces], dtype=np.intp)
+        longueurs = np.array([p.tube.longueur for p in pieces], dtype=np.float64)
+        coefficients = np.array([p.coefficient_retour_elastique for p in pieces], dtype=np.float64)
+        positions, angles, rayons, rotations = np.array(
+            [(c.position, c.angle, c.rayon, c.rotation) for p in pieces for c in p.cintrages],
+            dtype=np.float64).reshape(-1, 4).T
+        piece = np.repeat(np.arange(nombre), nb_cintrages)
+        cintrees = (nb_cintrages > 0).nonzero()[0]
+        premiers = (np.cumsum(nb_cintrages) - nb_cintrages)[cintrees]
+
+        # Longueur développée avec le rayon d'outil, comme calculer_longueur_developpee
+        angles_rad = np.radians(angles)
+        longueurs_developpees = longueurs + np.bincount(
+            piece, rayons * (angles_rad - 2 * np.sin(angles_rad / 2)), minlength=nombre)
+
+        # Emprise : boîte englobante des points de la ligne moyenne de chaque pièce
+        rayons_effectifs = rayons / coefficients[piece]
+        segments = nombre_segments_arcs(angles, rayons_effectifs, calculateur.nb_points,
+                                        calculateur.tolerance_corde, calculateur.pas_angulaire_max)
+        points, debuts = echantillonner_tubes(longueurs, nb_cintrages, positions, angles, rayons_effectifs,
+                                              rotations, segments)
+        minimum = np.minimum.reduceat(points, debuts[:-1])
+        maximum = np.maximum.reduceat(points, debuts[:-1])
+
+        rayons_min = rayons_max = np.zeros(0)
+        if cintrees.size:
+            rayons_min = np.minimum.reduceat(rayons, premiers)
+            rayons_max = np.maximum.reduceat(rayons, premiers)
+
+        rayons_min_pieces = [None] * nombre
+        rayons_max_pieces = [None] * nombre
+        for numero, r_min, r_max in zip(cintrees.tolist(), rayons_min.tolist(), rayons_max.tolist()):
+            rayons_min_pieces[numero] = r_min
+            rayons_max_pieces[numero] = r_max
+        return [(longueur, r_min, r_max, *coin_min, *coin_max)
+                for longueur, r_min, r_max, coin_min, coin_max in zip(
+                    longueurs_developpees.tolist(), rayons_min_pieces, rayons_max_pieces,
+                    minimum.tolist(), maximum.tolist())]
+
+    def ajouter_pieces(self, pieces: Iterable[Piece], remplacer: bool = False) -> int:
+        """
+        Insère un lot de pièces en une seule transaction
+        Une pièce déjà présente (même nom) est remplacée si remplacer est vrai,
+        sinon ValueError est levée et aucune pièce du lot n'est insérée.
+
+        Returns:
+            Le nombre de pièces insérées
+        """
+        lignes_pieces = []
+        lignes_cintrages = []
+        curseur = self.connexion.cursor()
+        curseur.execute("BEGIN IMMEDIATE")  # Réserve l'écriture : les identifiants suivants sont libres
+        try:
+            identifiant = curseur.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pieces").fetchone()[0]
+            pieces = iter(pieces)
+            while True:
+                lot = list(islice(pieces, TAILLE_LOT))
+                if not lot:
+                    break
+                for piece, valeurs in zip(lot, self.valeurs_derivees_lot(lot)):
+                    (longueur_developpee, rayon_min, rayon_max,
+                     x_min, y_min, z_min, x_max, y_max, z_max) = valeurs
+                    lignes_pieces.append((identifiant, piece.nom, piece.tube.diametre, piece.tube.epaisseur,
+                                          piece.tube.longueur, piece.coefficient_retour_elastique,
+                                          len(piece.cintrages), rayon_min, rayon_max, longueur_developpee,
+                                          x_min, y_min, z_min, x_max, y_max, z_max))
+                    lignes_cintrages.extend((identifiant, ordre, c.position, c.angle, c.rayon, c.rotation)
+                                            for ordre, c in enumerate(piece.cintrages))
+                    identifiant += 1
+            if remplacer:
+                curseur.executemany("DELETE FROM pieces WHERE nom = ?", ((ligne[1],) for ligne in lignes_pieces))
+            try:
+                curseur.executemany(f"INSERT INTO pieces (id, {COLONNES}) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", lignes_pieces)
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Pièce déjà présente dans le catalogue: {e}")
+            curseur.executemany("INSERT INTO cintrages VALUES (?, ?, ?, ?, ?, ?)", lignes_cintrages)
+            curseur.execute("COMMIT")
+        except BaseException:
+            curseur.execute("ROLLBACK")
+            raise
+        # Statistiques des index à jour pour le choix des plans de requête
+        curseur.execute("PRAGMA optimize")
+        return len(lignes_pieces)
+
+    def supprimer_piece(self, nom: str) -> bool:
+        curseur = self.connexion.execute("DELETE FROM pieces WHERE nom = ?", (nom,))
+        return curseur.rowcount > 0
+
+    def rechercher(self, diametre: Critere = None, epaisseur: Critere = None, longueur_developpee: Critere = None,
+                   nb_cintrages: Union[None, int, Tuple[Optional[int], Optional[int]]] = None,
+                   rayon: Critere = None, limite: Optional[int] = None) -> List[EntreeCatalogue]:
+        """
+        Pièces correspondant à tous les critères donnés, dans l'ordre d'insertion
+        rayon retient les pièces dont au moins un cintrage a ce rayon d'outil.
+        """
+        conditions = []
+        parametres = []
+        for colonne, critere in (("diametre", diametre), ("epaisseur", epaisseur),
+                                 ("longueur_developpee", longueur_developpee), ("nb_cintrages", nb_cintrages)):
+            if critere is not None:
+                _condition(colonne, critere, conditions, parametres)
+        if rayon is not None:
+            conditions_rayon = []
+            _condition("rayon", rayon, conditions_rayon, parametres)
+            # Avec un diamètre, l'index pieces_tube réduit d'abord les pièces et le rayon est vérifié
+            # pièce par pièce ; sinon l'index cintrages_rayon donne directement les pièces
+            if diametre is not None:
+                conditions.append("EXISTS (SELECT 1 FROM cintrages WHERE piece = pieces.id AND "
+                                  + " AND ".join(conditions_rayon) + ")")
+            else:
+                conditions.append("id IN (SELECT piece FROM cintrages WHERE " + " AND ".join(conditions_rayon) + ")")
+
+        requete = f"SELECT {COLONNES} FROM pieces"
+        if conditions:
+            requete += " WHERE " + " AND ".join(conditions)
+        requete += " ORDER BY id"
+        if limite is not None:
+            requete += " LIMIT ?"
+            parametres.append(limite)
+        return [EntreeCatalogue.depuis_ligne(ligne) for ligne in self.connexion.execute(requete, parametres)]
+
+    def entree(self, nom: str) -> Optional[EntreeCatalogue]:
+        ligne = self.connexion.execute(f"SELECT {COLONNES} FROM pieces WHERE nom = ?", (nom,)).fetchone()
+        return None if ligne is None else EntreeCatalogue.depuis_ligne(ligne)
+
+    def charger(self, nom: str) -> Piece:
+        """Pièce complète (programme de cintrage compris) à partir de son nom"""
+        ligne = self.connexion.execute(
+            "SELECT id, diametre, epaisseur, longueur, coefficient FROM pieces WHERE nom = ?", (nom,)).fetchone()
+        if ligne is None:
+            raise KeyError(nom)
+        identifiant, diametre, epaisseur, longueur, coefficient = ligne
+        cintrages = [ParametresCintrage(angle=angle, rayon=rayon, position=position, rotation=rotation)
+                     for position, angle, rayon, rotation in self.connexion.execute(
+                         "SELECT position, angle, rayon, rotation FROM cintrages WHERE piece = ? ORDER BY ordre",
+                         (identifiant,))]
+        return Piece(nom, ParametresTube(diametre=diametre, epaisseur=epaisseur, longueur=longueur),
+                     cintrages, coefficient)
+
+def _pieces_fichier(chemin: str, coefficient: float) -> Iterable[Piece]:
+    """Pièces d'une bibliothèque binaire ou d'un fichier du mode batch"""
+    if chemin.lower().endswith(".cbib"):
+        from modules.projet import BibliothequePieces
+        with BibliothequePieces(chemin) as bibliotheque:
+            for numero in range(len(bibliotheque)):
+                yield bibliotheque.charger(numero)
+        return
+
+    from modules.batch import lire_pieces, piece_lue
+    for piece in lire_pieces(chemin):
+        yield piece_lue(piece, coefficient)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catalogue des pièces (SQLite)")
+    parser.add_argument("catalogue", help="Fichier du catalogue (créé s'il n'existe pas)")
+    actions = parser.add_subparsers(dest="action", required=True)
+
+    importer = actions.add_parser("importer", help="Ajoute les pièces d'un fichier batch ou d'une bibliothèque")
+    importer.add_argument("entree", help="Fichier .jsonl, .csv ou bibliothèque .cbib")
+    importer.add_argument("--remplacer", action="store_true", help="Remplace les pièces de même nom")
+    importer.add_argument("--coefficient", type=float, default=0.975,
+                          help="Coefficient de retour élastique des pièces qui n'en précisent pas")
+
+    rechercher = actions.add_parser("rechercher", help="Recherche par dimensions")
+    for option in ("diametre", "epaisseur", "rayon"):
+        rechercher.add_argument(f"--{option}", type=float)
+    rechercher.add_argument("--longueur-min", type=float, help="Longueur développée minimale")
+    rechercher.add_argument("--longueur-max", type=float, help="Longueur développée maximale")
+    rechercher.add_argument("--nb-cintrages", type=int)
+    rechercher.add_argument("--limite", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with CataloguePieces(args.catalogue) as catalogue:
+        if args.action == "importer":
+            nombre = catalogue.ajouter_pieces(_pieces_fichier(args.entree, args.coefficient), args.remplacer)
+            print(f"{nombre} pièces ajoutées ({len(catalogue)} au catalogue)", file=sys.stderr)
+            return 0
+
+        longueur = None
+        if args.longueur_min is not None or args.longueur_max is not None:
+            longueur = (args.longueur_min, args.longueur_max)
+        for entree in catalogue.rechercher(args.diametre, args.epaisseur, longueur, args.nb_cintrages,
+                                           args.rayon, limite=args.limite):
+            print(f"{entree.nom}\tø{entree.tube.diametre:g}x{entree.tube.epaisseur:g}\t"
+                  f"{entree.nb_cintrages} cintrages\tL dév. {entree.longueur_developpee:.1f} mm")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
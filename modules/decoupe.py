@@ -0,0 +1,304 @@
+"""
+Plan de débit des barres de stock
+
+Répartit les longueurs de coupe d'une commande (longueurs développées ×
+quantités) dans des barres de stock en limitant la chute. Chaque pièce
+consomme sa longueur plus un trait de scie ; chaque barre perd en plus la
+longueur de serrage (prise de la barre, inutilisable) :
+
+    somme(longueur + trait_scie) <= longueur_barre - serrage
+
+Méthodes :
+    ffd    première barre qui convient, pièces par longueur décroissante
+           (arbre de segments des places restantes : O(n log n))
+    bfd    barre qui laisse la plus petite place (liste triée, bisect)
+    exact  séparation et évaluation pour les petites commandes (au plus
+           LIMITE_EXACTE pièces), partant de la solution bfd
+
+Avec plusieurs longueurs de stock, ffd et bfd ouvrent la plus longue barre
+disponible puis raccourcissent chaque barre à la plus courte longueur qui
+contient ses coupes. Les pièces de sections différentes ne partagent pas de
+barre : un plan par section (voir plans_par_section).
+"""
+import bisect
+import csv
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+METHODES = ("ffd", "bfd", "exact")
+LIMITE_EXACTE = 40            # Nombre de pièces maximal en mode exact
+NOEUDS_MAX_EXACT = 200000     # Au-delà, le mode exact rend la meilleure solution trouvée
+EPSILON = 1e-9
+
+# Stock : longueurs en quantité illimitée, ou {longueur: quantité (None = illimitée)}
+Stock = Union[Sequence[float], Dict[float, Optional[int]]]
+
+@dataclass
+class Coupe:
+    nom: str
+    longueur: float
+    position: float = 0.0  # Début de la coupe depuis l'extrémité libre de la barre
+
+@dataclass
+class BarreDecoupee:
+    longueur: float
+    coupes: List[Coupe] = field(default_factory=list)
+    chute: float = 0.0  # Longueur restante, serrage compris
+
+@dataclass
+class PlanDecoupe:
+    barres: List[BarreDecoupee]
+    trait_scie: float = 0.0
+    serrage: float = 0.0
+    methode: str = "bfd"
+
+    @property
+    def longueur_pieces(self) -> float:
+        return sum(c.longueur for b in self.barres for c in b.coupes)
+
+    @property
+    def longueur_barres(self) -> float:
+        return sum(b.longueur for b in self.barres)
+
+    @property
+    def taux_chute(self) -> float:
+        """Part de la longueur des barres qui n'est pas livrée en pièces (traits de scie compris)"""
+        total = self.longueur_barres
+        return 1 - self.longueur_pieces / total if total else 0.0
+
+    def barres_par_longueur(self) -> Dict[float, int]:
+        nombres = {}
+        for barre in self.barres:
+            nombres[barre.longueur] = nombres.get(barre.longueur, 0) + 1
+        return dict(sorted(nombres.items()))
+
+    def resume(self) -> dict:
+        return {
+            "methode": self.methode,
+            "barres": len(self.barres),
+            "barres_par_longueur": {f"{l:g}": n for l, n in self.barres_par_longueur().items()},
+            "pieces": sum(len(b.coupes) for b in self.barres),
+            "longueur_barres": round(self.longueur_barres, 3),
+            "longueur_pieces": round(self.longueur_pieces, 3),
+            "taux_chute": round(self.taux_chute, 5)
+        }
+
+def _stock(stock: Stock) -> Dict[float, Optional[int]]:
+    quantites = stock if isinstance(stock, dict) else {longueur: None for longueur in stock}
+    quantites = {float(l): q for l, q in quantites.items() if q is None or q > 0}
+    if not quantites:
+        raise ValueError("Aucune barre de stock")
+    return dict(sorted(quantites.items()))
+
+def _prendre(quantites: Dict[float, Optional[int]], longueur: float):
+    if quantites[longueur] is not None:
+        quantites[longueur] -= 1
+
+def _plus_longue(quantites: Dict[float, Optional[int]], taille: float, serrage: float) -> float:
+    """Plus longue barre disponible, si elle peut recevoir une pièce de cette taille"""
+    for longueur in reversed(quantites):
+        if quantites[longueur] != 0:
+            if longueur - serrage + EPSILON >= taille:
+                return longueur
+            break
+    raise ValueError(f"Aucune barre disponible pour une coupe de {taille:g} mm")
+
+def _raccourcir(barres: List[List], stock: Dict[float, Optional[int]], serrage: float) -> List[float]:
+    """
+    Longueur de stock de chaque barre : la plus courte disponible qui contient
+    ses coupes, les barres les moins remplies servies en premier
+    """
+    quantites = dict(stock)
+    longueurs = list(quantites)
+    choix = [0.0] * len(barres)
+    for numero in sorted(range(len(barres)), key=lambda i: barres[i][0]):
+        occupe = barres[numero][0]
+        for longueur in longueurs[bisect.bisect_left(longueurs, occupe + serrage - EPSILON):]:
+            if quantites[longueur] != 0:
+                _prendre(quantites, longueur)
+                choix[numero] = longueur
+                break
+        else:
+            raise ValueError("Barres de stock insuffisantes pour la commande")
+    return choix
+
+def _ffd(tailles: List[Tuple[float, int]], stock, serrage: float) -> List[List]:
+    """First fit decreasing : arbre de segments des places restantes (maximum par nœud)"""
+    quantites = dict(stock)
+    taille_arbre = 1
+    while taille_arbre < max(1, len(tailles)):
+        taille_arbre *= 2
+    arbre = [-1.0] * (2 * taille_arbre)
+    barres = []  # [occupé, capacité, [indices des pièces]]
+    for taille, indice in tailles:
+        if arbre[1] + EPSILON >= taille:
+            # Descente vers la première barre (à gauche) qui a assez de place
+            noeud = 1
+            while noeud < taille_arbre:
+                noeud = 2 * noeud if arbre[2 * noeud] + EPSILON >= taille else 2 * noeud + 1
+            numero = noeud - taille_arbre
+        else:
+            longueur = _plus_longue(quantites, taille, serrage)
+            _prendre(quantites, longueur)
+            numero = len(barres)
+            barres.append([0.0, longueur - serrage, []])
+        barre = barres[numero]
+        barre[0] += taille
+        barre[2].append(indice)
+        noeud = numero + taille_arbre
+        arbre[noeud] = barre[1] - barre[0]
+        noeud //= 2
+        while noeud:
+            arbre[noeud] = max(arbre[2 * noeud], arbre[2 * noeud + 1])
+            noeud //= 2
+    return barres
+
+def _bfd(tailles: List[Tuple[float, int]], stock, serrage: float) -> List[List]:
+    """Best fit decreasing : places restantes triées, recherche par bisect"""
+    quantites = dict(stock)
+    places = []    # Places restantes triées
+    numeros = []   # Barre correspondant à chaque place
+    barres = []
+    for taille, indice in tailles:
+        rang = bisect.bisect_left(places, taille - EPSILON)
+        if rang < len(places):
+            places.pop(rang)
+            numero = numeros.pop(rang)
+        else:
+            longueur = _plus_longue(quantites, taille, serrage)
+            _prendre(quantites, longueur)
+            numero = len(barres)
+            barres.append([0.0, longueur - serrage, []])
+        barre = barres[numero]
+        barre[0] += taille
+        barre[2].append(indice)
+        rang = bisect.bisect_left(places, barre[1] - barre[0])
+        places.insert(rang, barre[1] - barre[0])
+        numeros.insert(rang, numero)
+    return barres
+
+def _exact(tailles: List[Tuple[float, int]], stock, serrage: float) -> List[List]:
+    """
+    Séparation et évaluation : minimise la longueur totale des barres utilisées
+    La recherche part de la solution bfd raccourcie et s'arrête après NOEUDS_MAX_EXACT nœuds.
+    """
+    initiales = _bfd(tailles, stock, serrage)
+    longueurs_initiales = _raccourcir(initiales, stock, serrage)
+    meilleur = [sum(longueurs_initiales),
+                [[b[0], l - serrage, b[2], l] for l, b in zip(longueurs_initiales, initiales)]]
+    # Coût minimal d'une unité de capacité, pour la borne inférieure
+    cout_unitaire = min(l / (l - serrage) for l in stock if l > serrage)
+    restes = [0.0] * (len(tailles) + 1)
+    for i in range(len(tailles) - 1, -1, -1):
+        restes[i] = restes[i + 1] + tailles[i][0]
+    quantites = dict(stock)
+    ouvertes = []  # [occupé, capacité, [indices], longueur]
+    noeuds = 0
+
+    def explorer(i: int, cout: float, libre: float):
+        nonlocal noeuds
+        noeuds += 1
+        if noeuds > NOEUDS_MAX_EXACT:
+            return
+        if i == len(tailles):
+            if cout < meilleur[0] - EPSILON:
+                meilleur[0] = cout
+                meilleur[1] = [[b[0], b[1], list(b[2]), b[3]] for b in ouvertes]
+            return
+        if cout + max(0.0, restes[i] - libre) * cout_unitaire >= meilleur[0] - EPSILON:
+            return
+        taille, indice = tailles[i]
+        essayees = set()
+        for barre in ouvertes:
+            place = barre[1] - barre[0]
+            cle = (barre[3], round(place, 6))
+            if place + EPSILON < taille or cle in essayees:
+                continue
+            essayees.add(cle)
+            barre[0] += taille
+            barre[2].append(indice)
+            explorer(i + 1, cout, libre - taille)
+            barre[2].pop()
+            barre[0] -= taille
+        for longueur in quantites:
+            if quantites[longueur] == 0 or longueur - serrage + EPSILON < taille:
+                continue
+            _prendre(quantites, longueur)
+            ouvertes.append([taille, longueur - serrage, [indice], longueur])
+            explorer(i + 1, cout + longueur, libre + longueur - serrage - taille)
+            ouvertes.pop()
+            if quantites[longueur] is not None:
+                quantites[longueur] += 1
+
+    explorer(0, 0.0, 0.0)
+    return meilleur[1]
+
+def planifier_decoupe(commande: Iterable[Tuple[str, float, int]], stock: Stock, trait_scie: float = 0.0,
+                      serrage: float = 0.0, methode: str = "bfd") -> PlanDecoupe:
+    """
+    Calcule un plan de débit
+
+    Args:
+        commande: (nom, longueur de coupe (mm), quantité) par pièce
+        stock: Longueurs de barre disponibles, ou {longueur: quantité}
+        trait_scie: Largeur du trait de scie, comptée après chaque pièce (mm)
+        serrage: Longueur inutilisable par barre, prise de la barre (mm)
+        methode: "ffd", "bfd" ou "exact" (petites commandes)
+    """
+    if methode not in METHODES:
+        raise ValueError(f"Méthode de débit inconnue: {methode}")
+    stock = _stock(stock)
+    pieces = []
+    for nom, longueur, quantite in commande:
+        if longueur <= 0:
+            raise ValueError(f"Longueur de coupe invalide pour {nom}: {longueur}")
+        pieces.extend([(nom, float(longueur))] * int(quantite))
+    if methode == "exact" and len(pieces) > LIMITE_EXACTE:
+        raise ValueError(f"Mode exact limité à {LIMITE_EXACTE} pièces ({len(pieces)} demandées)")
+
+    # Pièces par taille consommée décroissante (longueur + trait de scie)
+    tailles = sorted(((longueur + trait_scie, i) for i, (_, longueur) in enumerate(pieces)), reverse=True)
+    if methode == "exact":
+        barres = _exact(tailles, stock, serrage)
+        longueurs = [b[3] for b in barres]
+    else:
+        barres = (_ffd if methode == "ffd" else _bfd)(tailles, stock, serrage)
+        longueurs = _raccourcir(barres, stock, serrage)
+
+    plan = []
+    for (occupe, _, indices, *_), longueur in sorted(zip(barres, longueurs), key=lambda b: (-b[1], -b[0][0])):
+        barre = BarreDecoupee(longueur, chute=longueur - occupe)
+        position = 0.0
+        for indice in indices:
+            nom, longueur_coupe = pieces[indice]
+            barre.coupes.append(Coupe(nom, longueur_coupe, position))
+            position += longueur_coupe + trait_scie
+        plan.append(barre)
+    return PlanDecoupe(plan, trait_scie, serrage, methode)
+
+def plans_par_section(commande: Iterable[Tuple[str, float, float, float, int]], stock: Stock,
+                      trait_scie: float = 0.0, serrage: float = 0.0, methode: str = "bfd") -> Dict[str, PlanDecoupe]:
+    """
+    Un plan de débit par section de tube ("diamètre x épaisseur")
+
+    Args:
+        commande: (nom, diamètre, épaisseur, longueur de coupe, quantité) par pièce
+        Les autres arguments comme planifier_decoupe
+    """
+    sections = {}
+    for nom, diametre, epaisseur, longueur, quantite in commande:
+        sections.setdefault(f"{diametre:g}x{epaisseur:g}", []).append((nom, longueur, quantite))
+    return {section: planifier_decoupe(pieces, stock, trait_scie, serrage, methode)
+            for section, pieces in sorted(sections.items())}
+
+def exporter_plans_csv(plans: Dict[str, PlanDecoupe], chemin: str):
+    """Écrit les plans de débit en CSV : une ligne par coupe"""
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        ecrivain = csv.writer(f)
+        ecrivain.writerow(["section", "barre", "longueur_barre", "ordre", "piece", "longueur_coupe", "position",
+                           "chute_barre"])
+        for section, plan in plans.items():
+            for numero, barre in enumerate(plan.barres, start=1):
+                for ordre, coupe in enumerate(barre.coupes, start=1):
+                    ecrivain.writerow([section, numero, f"{barre.longueur:g}", ordre, coupe.nom,
+                                       f"{coupe.longueur:.3f}", f"{coupe.position:.3f}", f"{barre.chute:.3f}"])
@@ -1,7 +1,38 @@
 import math
-from typing import List, Tuple
-import xml.etree.ElementTree as ET
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, Sequence, Tuple, Union
+from html import escape
 from dataclasses import dataclass
+import numpy as np
+from modules import instrumentation
+from modules.geometrie import Arc, Ligne
+from modules.points import TamponPoints
+
+Points = Union[TamponPoints, np.ndarray, Sequence[Tuple[float, float]]]
+
+MODES_DXF = ("lignes", "polyligne", "arcs")
+TAILLE_TAMPON = 1 << 20  # Tampon d'écriture des fichiers (1 Mo)
+POINTS_PAR_BLOC = 4096   # Nombre de points formatés par bloc d'écriture
+
+@contextmanager
+def ecriture_atomique(chemin: str, mode: str = 'w', **options):
+    """
+    Ouvre un fichier temporaire à côté de chemin, renommé en chemin (os.replace)
+    seulement si le bloc se termine sans erreur : un lecteur ne voit jamais de
+    fichier à moitié écrit, et un export interrompu laisse l'ancien fichier intact
+    """
+    dossier, nom = os.path.split(os.path.abspath(chemin))
+    temporaire = os.path.join(dossier, f".{nom}.{uuid.uuid4().hex[:12]}.tmp")
+    try:
+        with open(temporaire, mode.replace('w', 'x'), **options) as f:
+            yield f
+        os.replace(temporaire, chemin)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.unlink(temporaire)
+        raise
 
 @dataclass
 class ExportConfig:
@@ -9,69 +40,187 @@ class ExportConfig:
     marge: float = 10.0
     couleur_ligne: str = "#000000"
     epaisseur_ligne: float = 1.0
+    precision: int = 4  # Nombre de décimales des coordonnées exportées
+    mode_dxf: str = "lignes"  # "lignes", "polyligne" (POLYLINE R12) ou "arcs" (LINE + ARC)
 
 class ExporteurPlans:
     def __init__(self):
         self.config = ExportConfig()
     
-    def exporter_svg(self, points: List[Tuple[float, float]], nom_fichier: str):
+    def exporter_svg(self, points: Points, nom_fichier: str):
         """
         Exporte le dessin du tube en format SVG
         """
-        # Calcul des dimensions
-        x_min = min(p[0] for p in points)
-        x_max = max(p[0] for p in points)
-        y_min = min(p[1] for p in points)
-        y_max = max(p[1] for p in points)
-        
-        largeur = (x_max - x_min) * self.config.echelle + 2 * self.config.marge
-        hauteur = (y_max - y_min) * self.config.echelle + 2 * self.config.marge
-        
-        # Création du document SVG
-        svg = ET.Element('svg')
-        svg.set('width', str(largeur))
-        svg.set('height', str(hauteur))
-        svg.set('xmlns', 'http://www.w3.org/2000/svg')
-        
-        # Création du chemin
-        path_data = f"M {self.config.marge},{self.config.marge}"
-        for x, y in points:
-            x_scaled = x * self.config.echelle + self.config.marge
-            y_scaled = y * self.config.echelle + self.config.marge
-            path_data += f" L {x_scaled},{y_scaled}"
-        
-        path = ET.SubElement(svg, 'path')
-        path.set('d', path_data)
-        path.set('stroke', self.config.couleur_ligne)
-        path.set('stroke-width', str(self.config.epaisseur_ligne))
-        path.set('fill', 'none')
-        
-        # Sauvegarde du fichier
-        tree = ET.ElementTree(svg)
-        tree.write(nom_fichier)
-    
-    def exporter_dxf(self, points: List[Tuple[float, float]], nom_fichier: str):
+        self.exporter_svg_planche([points], nom_fichier, colonnes=1)
+
+    @instrumentation.chronometre("export.svg")
+    def exporter_svg_planche(self, pieces: Iterable, nom_fichier: str, colonnes: Optional[int] = None):
+        """
+        Exporte plusieurs tubes sur une même planche SVG, disposés en grille
+
+        Args:
+            pieces: Points de chaque tube, ou couples (nom, points) pour afficher un libellé
+            nom_fichier: Fichier de destination
+            colonnes: Nombre de colonnes de la grille (par défaut, grille carrée)
+        """
+        echelle = self.config.echelle
+        marge = self.config.marge
+
+        # Emprise de chaque pièce, calculée en une passe vectorisée
+        planche = []
+        for piece in pieces:
+            nom, points = piece if isinstance(piece, tuple) and len(piece) == 2 and isinstance(piece[0], str) \
+                else (None, piece)
+            tableau = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            if len(tableau) == 0:
+                continue
+            planche.append((nom, tableau, tableau.min(axis=0), tableau.max(axis=0)))
+        if not planche:
+            raise ValueError("Aucun point à exporter")
+
+        # Cellules de la grille dimensionnées sur la plus grande pièce
+        colonnes = colonnes or math.ceil(math.sqrt(len(planche)))
+        lignes = math.ceil(len(planche) / colonnes)
+        largeur_cellule = max(x_max - x_min for _, _, (x_min, _), (x_max, _) in planche) * echelle + 2 * marge
+        hauteur_cellule = max(y_max - y_min for _, _, (_, y_min), (_, y_max) in planche) * echelle + 2 * marge
+
+        nombre = f"%.{self.config.precision}f"
+        with ecriture_atomique(nom_fichier, 'w', encoding='utf-8', buffering=TAILLE_TAMPON) as f:
+            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{nombre}" height="{nombre}">\n'
+                    % (colonnes * largeur_cellule, lignes * hauteur_cellule))
+            for i, (nom, tableau, minimum, _) in enumerate(planche):
+                # Décalage de la pièce dans sa cellule
+                dx = (i % colonnes) * largeur_cellule + marge - minimum[0] * echelle
+                dy = (i // colonnes) * hauteur_cellule + marge - minimum[1] * echelle
+                if nom is not None:
+                    f.write(f'<text x="{nombre}" y="{nombre}" font-size="{nombre}">%s</text>\n'
+                            % (dx + minimum[0] * echelle, dy + minimum[1] * echelle - marge / 4,
+                               marge / 2, escape(nom, quote=False)))
+                f.write('<path d="')
+                for bloc in self._generer_chemin_svg(tableau, echelle, dx, dy, nombre):
+                    f.write(bloc)
+                f.write(f'" stroke="{self.config.couleur_ligne}" '
+                        f'stroke-width="{self.config.epaisseur_ligne}" fill="none"/>\n')
+            f.write('</svg>\n')
+        if instrumentation.ACTIF:
+            instrumentation.compter("export.points", sum(len(tableau) for _, tableau, _, _ in planche))
+            instrumentation.compter("export.octets", os.path.getsize(nom_fichier))
+
+    def _generer_chemin_svg(self, tableau: np.ndarray, echelle: float, dx: float, dy: float,
+                            nombre: str) -> Iterator[str]:
+        """Données du chemin SVG par blocs, en temps linéaire"""
+        modele = f" L {nombre},{nombre}"
+        # Un seul tampon de bloc, transformé sur place
+        tampon = TamponPoints.vide(min(len(tableau), POINTS_PAR_BLOC))
+        for debut in range(0, len(tableau), POINTS_PAR_BLOC):
+            source = TamponPoints(tableau[debut:debut + POINTS_PAR_BLOC])
+            bloc = source.transformer(echelle, dx, dy, tampon[:len(source)]).tableau
+            texte = (modele * len(bloc)) % tuple(bloc.ravel().tolist())
+            # Le premier point ouvre le chemin
+            yield "M" + texte[2:] if debut == 0 else texte
+
+    @instrumentation.chronometre("export.dxf")
+    def exporter_dxf(self, points: Points, nom_fichier: str,
+                     mode: Optional[str] = None, primitives: Optional[Sequence[Union[Ligne, Arc]]] = None):
         """
         Exporte le dessin du tube en format DXF
+
+        Args:
+            points: Points du tube
+            nom_fichier: Fichier de destination
+            mode: "lignes" (une entité LINE par segment), "polyligne" (une POLYLINE R12)
+                ou "arcs" (LINE et ARC exacts), par défaut config.mode_dxf
+            primitives: Primitives exactes du tube, obligatoires en mode "arcs"
+                (voir CalculateurCintrage.calculer_primitives)
+        """
+        with ecriture_atomique(nom_fichier, 'w', buffering=TAILLE_TAMPON) as f:
+            for bloc in self.generer_dxf(points, mode, primitives):
+                f.write(bloc)
+        if instrumentation.ACTIF:
+            instrumentation.compter("export.points", len(points))
+            instrumentation.compter("export.octets", os.path.getsize(nom_fichier))
+
+    def generer_dxf(self, points: Points, mode: Optional[str] = None,
+                    primitives: Optional[Sequence[Union[Ligne, Arc]]] = None) -> Iterator[str]:
+        """
+        Génère le contenu DXF par gros blocs de texte
+        """
+        mode = mode or self.config.mode_dxf
+        if mode not in MODES_DXF:
+            raise ValueError(f"Mode DXF inconnu: {mode}")
+        if mode == "arcs" and primitives is None:
+            raise ValueError("Le mode DXF 'arcs' nécessite les primitives du tube")
+
+        tableau = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        nombre = f"%.{self.config.precision}f"
+
+        yield self._entete_dxf(tableau, nombre)
+
+        # Entités
+        yield "0\nSECTION\n2\nENTITIES\n"
+        if mode == "polyligne":
+            # Polyligne R12 (AC1009) : POLYLINE, un VERTEX par point, puis SEQEND
+            yield "0\nPOLYLINE\n8\n0\n66\n1\n10\n0.0\n20\n0.0\n30\n0.0\n70\n0\n"
+            modele = f"0\nVERTEX\n8\n0\n10\n{nombre}\n20\n{nombre}\n30\n0.0\n"
+            for debut in range(0, len(tableau), POINTS_PAR_BLOC):
+                bloc = tableau[debut:debut + POINTS_PAR_BLOC]
+                yield (modele * len(bloc)) % tuple(bloc.ravel().tolist())
+            yield "0\nSEQEND\n8\n0\n"
+        elif mode == "lignes":
+            modele = (f"0\nLINE\n8\n0\n10\n{nombre}\n20\n{nombre}\n30\n0\n"
+                      f"11\n{nombre}\n21\n{nombre}\n31\n0\n")
+            # Chaque ligne relie un point au suivant : les extrémités sont
+            # copiées bloc par bloc dans un tampon réutilisé
+            nb_segments = max(len(tableau) - 1, 0)
+            segments = np.empty((min(nb_segments, POINTS_PAR_BLOC), 4))
+            for debut in range(0, nb_segments, POINTS_PAR_BLOC):
+                fin = min(debut + POINTS_PAR_BLOC, nb_segments)
+                bloc = segments[:fin - debut]
+                bloc[:, :2] = tableau[debut:fin]
+                bloc[:, 2:] = tableau[debut + 1:fin + 1]
+                yield (modele * len(bloc)) % tuple(bloc.ravel().tolist())
+        else:
+            morceaux = []
+            for primitive in primitives:
+                if isinstance(primitive, Arc):
+                    # Les arcs DXF sont toujours décrits dans le sens trigonométrique
+                    debut = min(primitive.angle_debut, primitive.angle_fin) % 360
+                    fin = max(primitive.angle_debut, primitive.angle_fin) % 360
+                    morceaux.append(
+                        f"0\nARC\n8\n0\n10\n{nombre}\n20\n{nombre}\n30\n0\n40\n{nombre}\n"
+                        f"50\n{nombre}\n51\n{nombre}\n"
+                        % (primitive.centre_x, primitive.centre_y, primitive.rayon, debut, fin))
+                else:
+                    morceaux.append(
+                        f"0\nLINE\n8\n0\n10\n{nombre}\n20\n{nombre}\n30\n0\n"
+                        f"11\n{nombre}\n21\n{nombre}\n31\n0\n"
+                        % (primitive.x1, primitive.y1, primitive.x2, primitive.y2))
+            yield "".join(morceaux)
+
+        # Fin du fichier DXF
+        yield "0\nENDSEC\n0\nEOF\n"
+
+    def _entete_dxf(self, tableau: np.ndarray, nombre: str) -> str:
+        """
+        Sections HEADER et TABLES (version, emprise, type de ligne et calque 0)
+        R12 ne connaît pas $INSUNITS : les coordonnées sont en mm sans unité déclarée
         """
-        with open(nom_fichier, 'w') as f:
-            # En-tête DXF
-            f.write("0\nSECTION\n2\nENTITIES\n")
-            
-            # Écriture des lignes
-            for i in range(len(points) - 1):
-                x1, y1 = points[i]
-                x2, y2 = points[i + 1]
-                
-                # Ligne DXF
-                f.write("0\nLINE\n")
-                f.write("8\n0\n")  # Calque 0
-                f.write(f"10\n{x1}\n")  # Point de départ X
-                f.write(f"20\n{y1}\n")  # Point de départ Y
-                f.write("30\n0\n")      # Point de départ Z
-                f.write(f"11\n{x2}\n")  # Point d'arrivée X
-                f.write(f"21\n{y2}\n")  # Point d'arrivée Y
-                f.write("31\n0\n")      # Point d'arrivée Z
-            
-            # Fin du fichier DXF
-            f.write("0\nENDSEC\n0\nEOF\n")
+        if len(tableau):
+            (x_min, y_min), (x_max, y_max) = tableau.min(axis=0), tableau.max(axis=0)
+        else:
+            x_min = y_min = x_max = y_max = 0.0
+        return (
+            "0\nSECTION\n2\nHEADER\n"
+            "9\n$ACADVER\n1\nAC1009\n"
+            f"9\n$EXTMIN\n10\n{nombre}\n20\n{nombre}\n30\n0\n"
+            f"9\n$EXTMAX\n10\n{nombre}\n20\n{nombre}\n30\n0\n"
+            "0\nENDSEC\n"
+            "0\nSECTION\n2\nTABLES\n"
+            "0\nTABLE\n2\nLTYPE\n70\n1\n"
+            "0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n40\n0.0\n"
+            "0\nENDTAB\n"
+            "0\nTABLE\n2\nLAYER\n70\n1\n"
+            "0\nLAYER\n2\n0\n70\n0\n62\n7\n6\nCONTINUOUS\n"
+            "0\nENDTAB\n"
+            "0\nENDSEC\n"
+        ) % (x_min, y_min, x_max, y_max)
@@ -0,0 +1,419 @@
+"""
+Moteur géométrique vectorisé (NumPy) pour le calcul des points du tube.
+
+Tous les arcs et segments droits d'un programme de cintrage sont calculés en
+une seule passe d'opérations sur tableaux : cap cumulé, centres des arcs et
+points d'échantillonnage. Le résultat est un tableau (N, 2) de float64.
+
+Tolérance : les points obtenus sont identiques à ceux de l'ancien calcul
+point par point (boucle `math.sin`/`math.cos`) à TOLERANCE_EQUIVALENCE près.
+Seul l'ordre des additions des déplacements cumulés diffère, l'écart relatif
+reste donc de l'ordre de l'epsilon machine (~1e-12 mm sur un tube de 10 m).
+"""
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Union
+import numpy as np
+
+TOLERANCE_EQUIVALENCE = 1e-9  # mm, écart maximal garanti avec l'ancien calcul
+
+@dataclass
+class Ligne:
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+
+@dataclass
+class Arc:
+    centre_x: float
+    centre_y: float
+    rayon: float
+    angle_debut: float  # degrés, sens trigonométrique depuis l'axe x
+    angle_fin: float    # inférieur à angle_debut pour un arc en sens horaire
+
+@dataclass
+class GeometrieTube:
+    points: np.ndarray               # (N, 2) points (x, y) du tube
+    indices_cintrages: np.ndarray    # (n, 2) indices du premier et du dernier point de chaque arc
+    abscisses_cintrages: np.ndarray  # (n,) abscisse curviligne du début de chaque arc (mm)
+
+def nombre_segments_arcs(angles, rayons, nb_points: int = 40,
+                         tolerance_corde: Optional[float] = None,
+                         pas_angulaire_max: Optional[float] = None) -> np.ndarray:
+    """
+    Calcule le nombre de segments de chaque arc
+
+    Sans tolérance ni pas angulaire, chaque arc a nb_points segments. Sinon le
+    pas retenu est le plus petit entre le pas angulaire maximal et celui qui
+    garantit une flèche (écart corde/arc) inférieure à tolerance_corde.
+
+    Args:
+        angles: Angles des arcs (degrés)
+        rayons: Rayons effectifs des arcs (mm)
+        nb_points: Nombre de segments par arc en mode fixe
+        tolerance_corde: Écart maximal entre la corde et l'arc (mm), strictement positif ;
+            au-delà du rayon, l'arc est coupé en demi-tours
+        pas_angulaire_max: Pas angulaire maximal (degrés), strictement positif
+    """
+    if tolerance_corde is not None and not tolerance_corde > 0:
+        raise ValueError(f"La tolérance de corde doit être positive: {tolerance_corde}")
+    if pas_angulaire_max is not None and not pas_angulaire_max > 0:
+        raise ValueError(f"Le pas angulaire maximal doit être positif: {pas_angulaire_max}")
+    angles_rad = np.abs(np.radians(np.asarray(angles, dtype=np.float64)))
+    if tolerance_corde is None and pas_angulaire_max is None:
+        return np.full(angles_rad.shape, nb_points, dtype=np.intp)
+
+    pas = np.full(angles_rad.shape, math.pi)
+    if tolerance_corde is not None:
+        # Flèche d'une corde de pas p sur un rayon R : R * (1 - cos(p / 2)), au plus R pour p = pi
+        with np.errstate(divide='ignore'):
+            rapport = 1 - np.minimum(tolerance_corde / np.abs(np.asarray(rayons, dtype=np.float64)), 1.0)
+        pas = np.minimum(pas, 2 * np.arccos(rapport))
+    if pas_angulaire_max is not None:
+        pas = np.minimum(pas, math.radians(pas_angulaire_max))
+
+    return np.maximum(1, np.ceil(angles_rad / pas - 1e-9)).astype(np.intp)
+
+def _parcourir_programme(positions, angles, rayons):
+    """Caps, points de début et centres de tous les arcs d'un programme"""
+    positions = np.asarray(positions, dtype=np.float64)
+    angles_rad = np.radians(np.asarray(angles, dtype=np.float64))
+    rayons = np.asarray(rayons, dtype=np.float64)
+
+    # Cap au début et à la fin de chaque arc (0 = horizontal vers la droite)
+    cap_fin = np.cumsum(angles_rad)
+    cap_debut = np.concatenate(([0.0], cap_fin[:-1]))
+
+    # Déplacements des segments droits puis des arcs (cordes)
+    distances = np.diff(positions, prepend=0.0)
+    avec_droit = distances > 0
+    distances_droites = np.where(avec_droit, distances, 0.0)
+    droit_x = distances_droites * np.cos(cap_debut)
+    droit_y = distances_droites * np.sin(cap_debut)
+    corde_x = rayons * (np.sin(cap_fin) - np.sin(cap_debut))
+    corde_y = rayons * (np.cos(cap_debut) - np.cos(cap_fin))
+
+    # Point de début de chaque arc
+    debut_x = np.concatenate(([0.0], np.cumsum(droit_x + corde_x)[:-1])) + droit_x
+    debut_y = np.concatenate(([0.0], np.cumsum(droit_y + corde_y)[:-1])) + droit_y
+
+    # Centres de rotation des arcs
+    centre_x = debut_x - rayons * np.sin(cap_debut)
+    centre_y = debut_y + rayons * np.cos(cap_debut)
+
+    return angles_rad, rayons, cap_debut, cap_fin, avec_droit, debut_x, debut_y, centre_x, centre_y
+
+def _indices_arcs(segments: np.ndarray, avec_droit: np.ndarray) -> np.ndarray:
+    """Indices du premier et du dernier point de chaque arc dans le tableau des points"""
+    tailles = segments + 1 + avec_droit
+    debuts_blocs = 1 + np.concatenate(([0], np.cumsum(tailles)[:-1]))
+    debuts_arcs = debuts_blocs + avec_droit
+    return np.column_stack((debuts_arcs, debuts_arcs + segments)).astype(np.intp)
+
+def _abscisses_arcs(positions: np.ndarray, angles_rad: np.ndarray, rayons: np.ndarray) -> np.ndarray:
+    """Abscisse curviligne du début de chaque arc, le long du tube dessiné"""
+    distances = np.maximum(np.diff(positions, prepend=0.0), 0.0)
+    longueurs_arcs = rayons * np.abs(angles_rad)
+    return np.cumsum(distances) + np.concatenate(([0.0], np.cumsum(longueurs_arcs)[:-1]))
+
+def calculer_points_programme(longueur: float, positions, angles, rayons,
+                              nb_points: Union[int, np.ndarray] = 40) -> np.ndarray:
+    """
+    Calcule les points d'un tube à partir d'un programme de cintrage
+
+    Args:
+        longueur: Longueur totale du tube
+        positions: Positions des cintrages (mm), triées
+        angles: Angles de cintrage (degrés)
+        rayons: Rayons effectifs des arcs (mm), retour élastique déjà appliqué
+        nb_points: Nombre de segments par arc, commun ou par arc (voir nombre_segments_arcs)
+
+    Returns:
+        Un tableau (N, 2) des points (x, y) du tube
+    """
+    return calculer_geometrie_programme(longueur, positions, angles, rayons, nb_points).points
+
+def calculer_geometrie_programme(longueur: float, positions, angles, rayons,
+                                 nb_points: Union[int, np.ndarray] = 40) -> GeometrieTube:
+    """
+    Calcule les points d'un tube et l'index des cintrages dans ces points
+    Mêmes arguments que calculer_points_programme
+    """
+    if len(positions) == 0:
+        # Tube droit
+        return GeometrieTube(np.array([[0.0, 0.0], [longueur, 0.0]]),
+                             np.zeros((0, 2), dtype=np.intp), np.zeros(0))
+
+    (angles_rad, rayons, cap_debut, cap_fin, avec_droit,
+     debut_x, debut_y, centre_x, centre_y) = _parcourir_programme(positions, angles, rayons)
+    nb_arcs = angles_rad.size
+    segments = np.broadcast_to(np.asarray(nb_points, dtype=np.intp), (nb_arcs,))
+
+    # Chaque arc occupe un bloc : fin du segment droit puis segments + 1 points
+    tailles = segments + 2
+    fins_blocs = np.cumsum(tailles)
+    arc = np.repeat(np.arange(nb_arcs), tailles)
+    j = np.arange(fins_blocs[-1]) - np.repeat(fins_blocs - tailles, tailles)
+
+    # Le point de fin de segment droit n'existe que si le segment a une longueur
+    masque = (j > 0) | avec_droit[arc]
+    arc = arc[masque]
+    j = j[masque]
+
+    t = (j - 1) / segments[arc]
+    angles_arc = cap_debut[arc] + angles_rad[arc] * t
+    points = np.empty((arc.size + 1, 2))
+    points[0] = 0.0
+    points[1:, 0] = centre_x[arc] + rayons[arc] * np.sin(angles_arc)
+    points[1:, 1] = centre_y[arc] - rayons[arc] * np.cos(angles_arc)
+    droits = np.flatnonzero(j == 0) + 1
+    points[droits, 0] = debut_x[arc[droits - 1]]
+    points[droits, 1] = debut_y[arc[droits - 1]]
+
+    # Segment final
+    longueur_restante = longueur - float(positions[-1])
+    if longueur_restante > 0:
+        x_fin, y_fin = points[-1]
+        point_final = [[x_fin + longueur_restante * np.cos(cap_fin[-1]),
+                        y_fin + longueur_restante * np.sin(cap_fin[-1])]]
+        points = np.concatenate((points, point_final))
+
+    return GeometrieTube(points, _indices_arcs(segments, avec_droit),
+                         _abscisses_arcs(np.asarray(positions, dtype=np.float64), angles_rad, rayons))
+
+def calculer_primitives_programme(longueur: float, positions, angles, rayons) -> List[Union[Ligne, Arc]]:
+    """
+    Décrit le tube par ses primitives exactes, sans tessellation
+
+    Returns:
+        La liste ordonnée des segments droits (Ligne) et des arcs (Arc) du tube
+    """
+    if len(positions) == 0:
+        return [Ligne(0.0, 0.0, float(longueur), 0.0)] if longueur > 0 else []
+
+    (angles_rad, rayons, cap_debut, cap_fin, avec_droit,
+     debut_x, debut_y, centre_x, centre_y) = _parcourir_programme(positions, angles, rayons)
+    fin_x = centre_x + rayons * np.sin(cap_fin)
+    fin_y = centre_y - rayons * np.cos(cap_fin)
+
+    # Angle polaire d'un point de l'arc vu du centre : cap - 90°
+    angles_debut = np.degrees(cap_debut) - 90
+    angles_fin = np.degrees(cap_fin) - 90
+
+    primitives = []
+    x_courant, y_courant = 0.0, 0.0
+    for i in range(angles_rad.size):
+        if avec_droit[i]:
+            primitives.append(Ligne(x_courant, y_courant, float(debut_x[i]), float(debut_y[i])))
+        primitives.append(Arc(float(centre_x[i]), float(centre_y[i]), float(rayons[i]),
+                              float(angles_debut[i]), float(angles_fin[i])))
+        x_courant, y_courant = float(fin_x[i]), float(fin_y[i])
+
+    # Segment final
+    longueur_restante = longueur - float(positions[-1])
+    if longueur_restante > 0:
+        primitives.append(Ligne(x_courant, y_courant,
+                                x_courant + longueur_restante * math.cos(cap_fin[-1]),
+                                y_courant + longueur_restante * math.sin(cap_fin[-1])))
+    return primitives
+
+def _geometrie_locale(distances, angles_rad, rayons, segments):
+    """
+    Points de chaque tronçon (segment droit puis arc) dans son repère local :
+    départ à l'origine, cap 0. Retourne les points concaténés, la taille de
+    chaque tronçon et le point et cap de fin de chaque tronçon.
+    """
+    avec_droit = distances > 0
+    distances = np.where(avec_droit, distances, 0.0)
+    tailles = segments + 1 + avec_droit
+    fins_blocs = np.cumsum(tailles)
+    troncon = np.repeat(np.arange(distances.size), tailles)
+    j = np.arange(fins_blocs[-1] if distances.size else 0) - np.repeat(fins_blocs - tailles, tailles)
+
+    # Index de l'échantillon sur l'arc (-1 pour la fin du segment droit)
+    k = j - avec_droit[troncon]
+    angles_arc = angles_rad[troncon] * (np.maximum(k, 0) / segments[troncon])
+    points = np.empty((troncon.size, 2))
+    points[:, 0] = distances[troncon] + rayons[troncon] * np.sin(angles_arc)
+    points[:, 1] = rayons[troncon] * (1 - np.cos(angles_arc))
+    droits = k < 0
+    points[droits, 0] = distances[troncon[droits]]
+    points[droits, 1] = 0.0
+
+    fins = np.column_stack((distances + rayons * np.sin(angles_rad), rayons * (1 - np.cos(angles_rad))))
+    return points, tailles, fins
+
+def _placer(points: np.ndarray, x: float, y: float, cap: float) -> np.ndarray:
+    """Rotation de cap puis translation (x, y) d'un tableau de points"""
+    c, s = math.cos(cap), math.sin(cap)
+    resultat = np.empty_like(points)
+    resultat[:, 0] = x + c * points[:, 0] - s * points[:, 1]
+    resultat[:, 1] = y + s * points[:, 0] + c * points[:, 1]
+    return resultat
+
+class GeometrieIncrementale:
+    """
+    Géométrie d'un programme de cintrage recalculée de façon incrémentale
+
+    Chaque cintrage conserve la géométrie locale de son tronçon (segment droit
+    qui le précède puis arc) et la transformation cumulée (x, y, cap) au début
+    de ce tronçon. Modifier le cintrage k ne recalcule que les tronçons k et
+    k + 1 ; tout ce qui précède est réutilisé et tout ce qui suit est déplacé
+    par une seule rotation et translation.
+    """
+    def __init__(self, longueur: float, positions, angles, rayons, coefficient_retour_elastique: float = 1.0,
+                 nb_points: int = 40, tolerance_corde: Optional[float] = None,
+                 pas_angulaire_max: Optional[float] = None):
+        """
+        Args:
+            longueur: Longueur totale du tube
+            positions: Positions des cintrages (mm), triées
+            angles: Angles de cintrage (degrés)
+            rayons: Rayons de cintrage (mm), divisés par coefficient_retour_elastique
+            coefficient_retour_elastique: Facteur de correction du retour élastique
+            nb_points, tolerance_corde, pas_angulaire_max: Tessellation (voir nombre_segments_arcs)
+        """
+        self.coefficient_retour_elastique = coefficient_retour_elastique
+        self.nb_points = nb_points
+        self.tolerance_corde = tolerance_corde
+        self.pas_angulaire_max = pas_angulaire_max
+        self._construire(longueur, positions, angles, rayons)
+
+    def _construire(self, longueur, positions, angles, rayons):
+        """Calcul complet de tous les tronçons"""
+        self.longueur = float(longueur)
+        self.positions = np.array(positions, dtype=np.float64)
+        self.angles = np.array(angles, dtype=np.float64)
+        self.rayons = np.array(rayons, dtype=np.float64)
+        nb = self.positions.size
+
+        rayons_effectifs = self.rayons / self.coefficient_retour_elastique
+        angles_rad = np.radians(self.angles)
+        segments = self._segments(self.angles, rayons_effectifs)
+        self.segments = segments.copy()
+        locaux, tailles, fins = _geometrie_locale(np.diff(self.positions, prepend=0.0), angles_rad,
+                                                  rayons_effectifs, segments)
+        self.locaux = np.split(locaux, np.cumsum(tailles)[:-1]) if nb else []
+
+        # Transformation au début de chaque tronçon (le dernier est le segment final)
+        self.caps = np.concatenate(([0.0], np.cumsum(angles_rad)))
+        self.departs = np.zeros((nb + 1, 2))
+        if nb:
+            c, s = np.cos(self.caps[:-1]), np.sin(self.caps[:-1])
+            self.departs[1:, 0] = np.cumsum(c * fins[:, 0] - s * fins[:, 1])
+            self.departs[1:, 1] = np.cumsum(s * fins[:, 0] + c * fins[:, 1])
+
+        # Points du monde : rotation et translation de chaque tronçon en une passe
+        troncon = np.repeat(np.arange(nb), tailles)
+        c, s = np.cos(self.caps[troncon]), np.sin(self.caps[troncon])
+        monde = np.empty_like(locaux)
+        monde[:, 0] = self.departs[troncon, 0] + c * locaux[:, 0] - s * locaux[:, 1]
+        monde[:, 1] = self.departs[troncon, 1] + s * locaux[:, 0] + c * locaux[:, 1]
+        self.debuts = np.concatenate(([1], 1 + np.cumsum(tailles))).astype(np.intp)
+        self._points = np.concatenate((np.zeros((1, 2)), monde, self._segment_final()))
+
+    def _segments(self, angles, rayons_effectifs) -> np.ndarray:
+        return nombre_segments_arcs(angles, rayons_effectifs, self.nb_points,
+                                    self.tolerance_corde, self.pas_angulaire_max)
+
+    def _segment_final(self) -> np.ndarray:
+        """Points du monde du segment droit final"""
+        if self.positions.size == 0:
+            return np.array([[self.longueur, 0.0]])
+        longueur_restante = self.longueur - self.positions[-1]
+        if longueur_restante <= 0:
+            return np.zeros((0, 2))
+        x, y = self.departs[-1]
+        cap = self.caps[-1]
+        return np.array([[x + longueur_restante * math.cos(cap), y + longueur_restante * math.sin(cap)]])
+
+    @property
+    def points(self) -> np.ndarray:
+        """Tableau (N, 2) des points du tube"""
+        return self._points
+
+    @property
+    def indices_cintrages(self) -> np.ndarray:
+        """Indices (n, 2) du premier et du dernier point de chaque arc"""
+        fins = self.debuts[1:] - 1
+        return np.column_stack((fins - self.segments, fins))
+
+    @property
+    def abscisses_cintrages(self) -> np.ndarray:
+        """Abscisse curviligne du début de chaque arc"""
+        return _abscisses_arcs(self.positions, np.radians(self.angles),
+                               self.rayons / self.coefficient_retour_elastique)
+
+    @property
+    def geometrie(self) -> GeometrieTube:
+        return GeometrieTube(self._points, self.indices_cintrages, self.abscisses_cintrages)
+
+    def modifier_longueur(self, longueur: float):
+        """Seul le segment final dépend de la longueur du tube"""
+        self.longueur = float(longueur)
+        self._points = np.concatenate((self._points[:self.debuts[-1]], self._segment_final()))
+
+    def modifier_cintrage(self, index: int, position: float = None, angle: float = None, rayon: float = None):
+        """
+        Modifie le cintrage index et met à jour la géométrie en aval uniquement
+        """
+        nb = self.positions.size
+        if not 0 <= index < nb:
+            raise IndexError(f"Cintrage {index} inexistant")
+        position = self.positions[index] if position is None else float(position)
+        angle = self.angles[index] if angle is None else float(angle)
+        rayon = self.rayons[index] if rayon is None else float(rayon)
+
+        # Un changement d'ordre des cintrages impose un calcul complet
+        if (index > 0 and position < self.positions[index - 1]) or \
+           (index < nb - 1 and position > self.positions[index + 1]):
+            positions, angles, rayons = self.positions.copy(), self.angles.copy(), self.rayons.copy()
+            positions[index], angles[index], rayons[index] = position, angle, rayon
+            ordre = np.argsort(positions, kind='stable')
+            self._construire(self.longueur, positions[ordre], angles[ordre], rayons[ordre])
+            return
+
+        self.positions[index], self.angles[index], self.rayons[index] = position, angle, rayon
+
+        # Tronçons à recalculer : celui du cintrage modifié et le suivant, dont le
+        # segment droit dépend de la position modifiée
+        fin = min(index + 2, nb)
+        precedente = self.positions[index - 1] if index > 0 else 0.0
+        distances = np.diff(self.positions[index:fin], prepend=precedente)
+        rayons_effectifs = self.rayons[index:fin] / self.coefficient_retour_elastique
+        angles_rad = np.radians(self.angles[index:fin])
+        self.segments[index:fin] = self._segments(self.angles[index:fin], rayons_effectifs)
+        locaux, tailles, fins = _geometrie_locale(distances, angles_rad, rayons_effectifs,
+                                                  self.segments[index:fin])
+        self.locaux[index:fin] = np.split(locaux, np.cumsum(tailles)[:-1])
+
+        # Transformation au début du reste du tube, avant modification
+        ancien_depart = self.departs[fin].copy()
+        ancien_cap = self.caps[fin]
+        debut_reste = self.debuts[fin]
+
+        morceaux = [self._points[:self.debuts[index]]]
+        for i in range(index, fin):
+            morceaux.append(_placer(self.locaux[i], self.departs[i, 0], self.departs[i, 1], self.caps[i]))
+            c, s = math.cos(self.caps[i]), math.sin(self.caps[i])
+            fin_x, fin_y = fins[i - index]
+            self.departs[i + 1] = (self.departs[i, 0] + c * fin_x - s * fin_y,
+                                   self.departs[i, 1] + s * fin_x + c * fin_y)
+            self.caps[i + 1] = self.caps[i] + angles_rad[i - index]
+            self.debuts[i + 1] = self.debuts[i] + tailles[i - index]
+
+        # Le reste du tube subit une seule rotation et translation
+        rotation = self.caps[fin] - ancien_cap
+        reste = self._points[debut_reste:]
+        morceaux.append(_placer(reste - ancien_depart, self.departs[fin, 0], self.departs[fin, 1], rotation))
+        if fin < nb:
+            self.departs[fin + 1:] = _placer(self.departs[fin + 1:] - ancien_depart,
+                                             self.departs[fin, 0], self.departs[fin, 1], rotation)
+            self.caps[fin + 1:] += rotation
+            self.debuts[fin + 1:] += self.debuts[fin] - debut_reste
+
+        self._points = np.concatenate(morceaux)
+        if fin == nb:
+            # Le segment final dépend de la position du dernier cintrage
+            self.modifier_longueur(self.longueur)
@@ -0,0 +1,282 @@
+"""
+Moteur géométrique 3D : programmes de cintrage avec rotation du plan de cintrage.
+
+Chaque tronçon (segment droit, rotation du tube autour de son axe puis arc)
+est une transformation homogène 4x4. Les transformations de tous les tronçons
+sont construites en un seul tableau (n, 4, 4) puis composées par un produit
+préfixe parallèle (log2(n) produits matriciels groupés).
+
+Repère local du tube : x dans l'axe du tube, y vers le centre du cintrage
+quand la rotation est nulle, z = x ^ y. Le tube part de l'origine selon +x
+dans le plan XY : sans rotation, le résultat est celui du moteur plan
+(modules.geometrie) avec z = 0.
+
+Représentations d'un programme :
+    XYZ : sommets des tangentes (intersections des segments droits prolongés) et rayons
+    LRA : longueur droite avant chaque cintrage (L), rotation du plan (R), angle (A)
+    YBC : comme LRA, avec l'angle machine C compensé du retour élastique
+"""
+from dataclasses import dataclass
+import numpy as np
+from modules.geometrie import GeometrieTube, _abscisses_arcs, _indices_arcs
+
+@dataclass
+class ProgrammeLRA:
+    longueurs: np.ndarray  # (n + 1,) longueurs droites avant chaque cintrage, puis segment final (mm)
+    rotations: np.ndarray  # (n,) rotation du plan de cintrage par rapport au précédent (degrés)
+    angles: np.ndarray     # (n,) angles de cintrage (degrés)
+    rayons: np.ndarray     # (n,) rayons effectifs (mm)
+
+@dataclass
+class ProgrammeYBC:
+    avances: np.ndarray    # Y : (n + 1,) avance du chariot avant chaque cintrage, puis avance finale (mm)
+    rotations: np.ndarray  # B : (n,) rotation du tube (degrés)
+    angles: np.ndarray     # C : (n,) angle machine, retour élastique compensé (degrés)
+    rayons: np.ndarray     # (n,) rayons de cintrage (mm)
+
+@dataclass
+class ProgrammeXYZ:
+    sommets: np.ndarray  # (n + 2, 3) début du tube, sommets des tangentes, fin du tube
+    rayons: np.ndarray   # (n,) rayons effectifs (mm)
+
+def _rotations_x(angles_rad: np.ndarray) -> np.ndarray:
+    """Rotations homogènes (n, 4, 4) autour de l'axe x"""
+    m = np.zeros((angles_rad.size, 4, 4))
+    c, s = np.cos(angles_rad), np.sin(angles_rad)
+    m[:, 0, 0] = m[:, 3, 3] = 1.0
+    m[:, 1, 1], m[:, 1, 2] = c, -s
+    m[:, 2, 1], m[:, 2, 2] = s, c
+    return m
+
+def _transformations_arcs(angles_rad: np.ndarray, rayons: np.ndarray) -> np.ndarray:
+    """Transformations homogènes (n, 4, 4) du début à la fin de chaque arc"""
+    m = np.zeros((angles_rad.size, 4, 4))
+    c, s = np.cos(angles_rad), np.sin(angles_rad)
+    m[:, 0, 0], m[:, 0, 1] = c, -s
+    m[:, 1, 0], m[:, 1, 1] = s, c
+    m[:, 2, 2] = m[:, 3, 3] = 1.0
+    m[:, 0, 3] = rayons * s
+    m[:, 1, 3] = rayons * (1 - c)
+    return m
+
+def produits_prefixes(matrices: np.ndarray, groupes: np.ndarray = None) -> np.ndarray:
+    """
+    Produits cumulés M0, M0·M1, M0·M1·M2... d'un tableau (n, k, k)
+    Calculés en log2(n) produits matriciels groupés (balayage de Hillis-Steele)
+
+    Avec groupes (n,), numéro croissant du programme de chaque matrice, les
+    produits repartent de zéro à chaque programme : plusieurs programmes
+    sont ainsi composés en un seul appel
+    """
+    produits = matrices.copy()
+    pas = 1
+    while pas < len(produits):
+        if groupes is None:
+            produits[pas:] = produits[:-pas] @ produits[pas:]
+        else:
+            meme_groupe = groupes[:-pas] == groupes[pas:]
+            produits[pas:][meme_groupe] = produits[:-pas][meme_groupe] @ produits[pas:][meme_groupe]
+        pas *= 2
+    return produits
+
+def reperes_programme(distances, rotations, angles, rayons, groupes=None):
+    """
+    Repères de début d'arc et repère final d'un programme
+
+    Avec groupes (n,), numéro croissant du programme de chaque cintrage (voir
+    produits_prefixes), plusieurs programmes sont traités en un seul appel
+
+    Returns:
+        (reperes_arcs, repere_final) : tableau (n, 4, 4) des repères au début de
+        chaque arc (après segment droit et rotation) et repère (4, 4) à la fin du
+        dernier arc ; avec groupes, un repère final par programme (programmes, 4, 4)
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    nb = distances.size
+    translations = np.broadcast_to(np.eye(4), (nb, 4, 4)).copy()
+    translations[:, 0, 3] = distances
+    avant_arcs = translations @ _rotations_x(np.radians(np.asarray(rotations, dtype=np.float64)))
+    arcs = _transformations_arcs(np.radians(np.asarray(angles, dtype=np.float64)),
+                                 np.asarray(rayons, dtype=np.float64))
+    troncons = produits_prefixes(avant_arcs @ arcs, groupes)
+    debuts = np.concatenate((np.eye(4)[None], troncons[:-1]))
+    if groupes is None:
+        return debuts @ avant_arcs, troncons[-1]
+    groupes = np.asarray(groupes)
+    premiers = np.concatenate(([True], groupes[1:] != groupes[:-1]))
+    debuts[premiers] = np.eye(4)
+    return debuts @ avant_arcs, troncons[np.concatenate((premiers[1:], [True]))]
+
+def echantillonner_tubes(longueurs, nb_cintrages, positions, angles, rayons, rotations, nb_points=40):
+    """
+    Lignes moyennes 3D de plusieurs tubes, calculées en un seul passage
+
+    Les cintrages de tous les tubes sont mis bout à bout (positions triées
+    dans chaque tube) ; les repères sont composés par reperes_programme avec
+    un groupe par tube. Les points de chaque tube sont disposés comme ceux de
+    calculer_geometrie_3d : début du tube, puis pour chaque cintrage la fin du
+    segment droit (s'il existe) et les points de l'arc, puis la fin du tube.
+
+    Args:
+        longueurs: Longueur totale de chaque tube (tubes,)
+        nb_cintrages: Nombre de cintrages de chaque tube (tubes,)
+        positions, angles, rayons, rotations: Cintrages de tous les tubes (n,), comme calculer_geometrie_3d
+        nb_points: Nombre de segments par arc, commun ou par arc
+
+    Returns:
+        (points, debuts) : points (N, 3) de tous les tubes et indice du
+        premier point de chaque tube (tubes + 1,), debuts[-1] valant N
+    """
+    longueurs = np.asarray(longueurs, dtype=np.float64)
+    nb_cintrages = np.asarray(nb_cintrages, dtype=np.intp)
+    positions = np.asarray(positions, dtype=np.float64)
+    angles_rad = np.radians(np.asarray(angles, dtype=np.float64))
+    rayons = np.asarray(rayons, dtype=np.float64)
+    nombre = longueurs.size
+    tube = np.repeat(np.arange(nombre), nb_cintrages)
+    cintres = (nb_cintrages > 0).nonzero()[0]
+    premiers = (np.cumsum(nb_cintrages) - nb_cintrages)[cintres]
+    derniers = premiers + nb_cintrages[cintres] - 1
+
+    distances = np.diff(positions, prepend=0.0)
+    distances[premiers] = positions[premiers]
+    avec_droit = distances > 0
+    segments = np.broadcast_to(np.asarray(nb_points, dtype=np.intp), positions.shape)
+    restantes = longueurs[cintres] - positions[derniers]
+
+    # Nombre de points de chaque tube : début, blocs des cintrages, fin
+    tailles = segments + 1
+    blocs = tailles + avec_droit
+    nb_points_tubes = np.full(nombre, 2, dtype=np.intp)
+    nb_points_tubes[cintres] = 1 + np.bincount(tube, blocs, minlength=nombre)[cintres].astype(np.intp) + (restantes > 0)
+    debuts = np.concatenate(([0], np.cumsum(nb_points_tubes)))
+    points = np.zeros((debuts[-1], 3))
+
+    droits = (nb_cintrages == 0).nonzero()[0]
+    points[debuts[droits] + 1, 0] = longueurs[droits]
+    if positions.size == 0:
+        return points, debuts
+
+    reperes, finaux = reperes_programme(np.where(avec_droit, distances, 0.0), rotations, angles, rayons, tube)
+
+    # Points de chaque arc dans son repère local, puis passage au repère du monde
+    fins_blocs = np.cumsum(tailles)
+    arc = np.repeat(np.arange(positions.size), tailles)
+    j = np.arange(fins_blocs[-1]) - np.repeat(fins_blocs - tailles, tailles)
+    angles_arc = angles_rad[arc] * (j / segments[arc])
+    reperes_points = reperes[arc, :3]
+    echantillons = (reperes_points[:, :, 0] * (rayons[arc] * np.sin(angles_arc))[:, None]
+                    + reperes_points[:, :, 1] * (rayons[arc] * (1 - np.cos(angles_arc)))[:, None]
+                    + reperes_points[:, :, 3])
+
+    # Début de chaque arc : début du tube, blocs précédents du même tube, segment droit
+    fins = np.cumsum(blocs)
+    precedents = fins - blocs - np.repeat((fins - blocs)[premiers], nb_cintrages[cintres])
+    debuts_arcs = debuts[tube] + 1 + precedents + avec_droit
+    points[np.repeat(debuts_arcs, tailles) + j] = echantillons
+    points[debuts_arcs[avec_droit] - 1] = reperes[avec_droit, :3, 3]
+
+    # Segment final
+    finales = restantes > 0
+    points[debuts[cintres[finales] + 1] - 1] = (finaux[finales, :3, 0] * restantes[finales, None]
+                                                 + finaux[finales, :3, 3])
+    return points, debuts
+
+def calculer_geometrie_3d(longueur: float, positions, angles, rayons, rotations, nb_points=40) -> GeometrieTube:
+    """
+    Calcule la ligne moyenne 3D d'un tube
+
+    Args:
+        longueur: Longueur totale du tube
+        positions: Positions des cintrages (mm), triées
+        angles: Angles de cintrage (degrés)
+        rayons: Rayons effectifs des arcs (mm), retour élastique déjà appliqué
+        rotations: Rotation du plan de chaque cintrage par rapport au précédent (degrés)
+        nb_points: Nombre de segments par arc, commun ou par arc
+
+    Returns:
+        Une GeometrieTube dont les points sont un tableau (N, 3)
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    points, _ = echantillonner_tubes([longueur], [positions.size], positions, angles, rayons, rotations, nb_points)
+    if positions.size == 0:
+        return GeometrieTube(points, np.zeros((0, 2), dtype=np.intp), np.zeros(0))
+
+    angles_rad = np.radians(np.asarray(angles, dtype=np.float64))
+    rayons = np.asarray(rayons, dtype=np.float64)
+    segments = np.broadcast_to(np.asarray(nb_points, dtype=np.intp), positions.shape)
+    indices = _indices_arcs(segments, np.diff(positions, prepend=0.0) > 0)
+    return GeometrieTube(points, indices, _abscisses_arcs(positions, angles_rad, rayons))
+
+def lra_vers_xyz(programme: ProgrammeLRA) -> ProgrammeXYZ:
+    """Sommets des tangentes d'un programme LRA"""
+    angles_rad = np.radians(programme.angles)
+    rotations = _rotations_x(np.radians(np.asarray(programme.rotations, dtype=np.float64)))
+    rotations_arcs = _transformations_arcs(angles_rad, np.zeros(angles_rad.size))
+    orientations = produits_prefixes(rotations @ rotations_arcs)[:, :3, 0]
+    directions = np.concatenate(([[1.0, 0.0, 0.0]], orientations))
+
+    # Chaque jambe va d'un sommet au suivant : tangente, droite, tangente
+    tangentes = programme.rayons * np.tan(np.abs(angles_rad) / 2)
+    jambes = np.asarray(programme.longueurs, dtype=np.float64).copy()
+    jambes[:-1] += tangentes
+    jambes[1:] += tangentes
+    sommets = np.concatenate((np.zeros((1, 3)), np.cumsum(directions * jambes[:, None], axis=0)))
+    return ProgrammeXYZ(sommets, np.asarray(programme.rayons, dtype=np.float64))
+
+def xyz_vers_lra(programme: ProgrammeXYZ) -> ProgrammeLRA:
+    """
+    Programme LRA d'une ligne de sommets 3D
+
+    Les angles obtenus sont positifs, le sens du cintrage étant porté par la
+    rotation (un cintrage plan négatif devient une rotation de 180°). La
+    rotation du premier cintrage est mesurée depuis le plan XY.
+    """
+    jambes = np.diff(np.asarray(programme.sommets, dtype=np.float64), axis=0)
+    longueurs_jambes = np.linalg.norm(jambes, axis=1)
+    if np.any(longueurs_jambes == 0):
+        raise ValueError("Deux sommets consécutifs sont confondus")
+    directions = jambes / longueurs_jambes[:, None]
+
+    cosinus = np.clip(np.einsum('ij,ij->i', directions[:-1], directions[1:]), -1.0, 1.0)
+    angles_rad = np.arccos(cosinus)
+
+    # Normale de chaque plan de cintrage. La normale de référence du premier
+    # cintrage est l'axe z, ramené perpendiculaire au premier segment
+    normales = np.cross(directions[:-1], directions[1:])
+    normes = np.linalg.norm(normales, axis=1)
+    reference = np.array([0.0, 0.0, 1.0]) - directions[0] * directions[0, 2]
+    if np.linalg.norm(reference) < 1e-12:
+        reference = np.array([0.0, 1.0, 0.0]) - directions[0] * directions[0, 1]
+    normales = np.concatenate((reference[None] / np.linalg.norm(reference), normales))
+    normes = np.concatenate(([1.0], normes))
+
+    # Un cintrage nul (segments alignés) garde le plan du précédent
+    valides = normes > 1e-12
+    derniere_valide = np.maximum.accumulate(np.where(valides, np.arange(normes.size), 0))
+    normales = normales[derniere_valide] / normes[derniere_valide, None]
+
+    # Angle signé entre deux normales successives, autour de la direction du tube
+    sinus = np.einsum('ij,ij->i', np.cross(normales[:-1], normales[1:]), directions[:-1])
+    cosinus = np.einsum('ij,ij->i', normales[:-1], normales[1:])
+    rotations = np.degrees(np.arctan2(sinus, cosinus))
+
+    rayons = np.asarray(programme.rayons, dtype=np.float64)
+    tangentes = rayons * np.tan(angles_rad / 2)
+    longueurs = longueurs_jambes.copy()
+    longueurs[:-1] -= tangentes
+    longueurs[1:] -= tangentes
+    return ProgrammeLRA(longueurs, rotations, np.degrees(angles_rad), rayons)
+
+def lra_vers_ybc(programme: ProgrammeLRA, coefficient_retour_elastique: float) -> ProgrammeYBC:
+    """Programme machine : angle C compensé du retour élastique, rayon de l'outil"""
+    return ProgrammeYBC(np.asarray(programme.longueurs, dtype=np.float64).copy(),
+                        np.asarray(programme.rotations, dtype=np.float64).copy(),
+                        np.asarray(programme.angles) / coefficient_retour_elastique,
+                        np.asarray(programme.rayons) * coefficient_retour_elastique)
+
+def ybc_vers_lra(programme: ProgrammeYBC, coefficient_retour_elastique: float) -> ProgrammeLRA:
+    return ProgrammeLRA(np.asarray(programme.avances, dtype=np.float64).copy(),
+                        np.asarray(programme.rotations, dtype=np.float64).copy(),
+                        np.asarray(programme.angles) * coefficient_retour_elastique,
+                        np.asarray(programme.rayons) / coefficient_retour_elastique)
@@ -0,0 +1,165 @@
+"""
+Instrumentation optionnelle des chemins critiques
+
+Désactivée par défaut : chaque point de mesure se réduit alors à la lecture
+d'un booléen. Activation par la variable d'environnement
+CINTREUSE_INSTRUMENTATION ("1", ou "statut" pour afficher un résumé dans la
+barre de statut), ou par activer(). CINTREUSE_PROFIL=fichier.prof (ou
+l'option --profil) enregistre en plus un profil cProfile complet.
+
+Les mesures sont regroupées dans l'objet global `statistiques` :
+    compteurs : nombre d'appels, de points, d'éléments créés, d'octets écrits...
+    chronos   : nombre, durée totale et durée maximale par nom de section
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional
+
+_mode = os.environ.get("CINTREUSE_INSTRUMENTATION", "").strip().lower()
+ACTIF = _mode not in ("", "0", "non", "false")
+AFFICHER_STATUT = _mode == "statut"
+
+class Statistiques:
+    def __init__(self):
+        self.compteurs: Dict[str, float] = {}
+        self.chronos: Dict[str, list] = {}  # nom -> [nombre, total (s), maximum (s)]
+        self._verrou = threading.Lock()  # Mesures possibles depuis les threads de travail
+
+    def compter(self, nom: str, valeur: float = 1):
+        with self._verrou:
+            self.compteurs[nom] = self.compteurs.get(nom, 0) + valeur
+
+    def enregistrer_duree(self, nom: str, duree: float):
+        with self._verrou:
+            chrono = self.chronos.get(nom)
+            if chrono is None:
+                self.chronos[nom] = [1, duree, duree]
+            else:
+                chrono[0] += 1
+                chrono[1] += duree
+                chrono[2] = max(chrono[2], duree)
+
+    def instantane(self) -> dict:
+        """Copie des mesures, sérialisable en JSON (durées en millisecondes)"""
+        with self._verrou:
+            return {
+                "compteurs": dict(self.compteurs),
+                "chronos": {nom: {"nombre": n, "total_ms": round(total * 1000, 3),
+                                  "moyenne_ms": round(total * 1000 / n, 3), "max_ms": round(maximum * 1000, 3)}
+                            for nom, (n, total, maximum) in self.chronos.items()}
+            }
+
+    def vers_json(self, chemin: Optional[str] = None) -> str:
+        """Mesures au format JSON, écrites dans chemin s'il est donné"""
+        import json
+        texte = json.dumps(self.instantane(), indent=2, ensure_ascii=False)
+        if chemin:
+            with open(chemin, 'w', encoding='utf-8') as f:
+                f.write(texte)
+        return texte
+
+    def resume(self) -> str:
+        """Résumé d'une ligne pour la barre de statut"""
+        mesures = self.instantane()
+        compteurs = mesures["compteurs"]
+        morceaux = [f"{nom.split('.')[-1]} {c['moyenne_ms']:.1f} ms" for nom, c in mesures["chronos"].items()]
+        succes, echecs = compteurs.get("calculs.cache_succes", 0), compteurs.get("calculs.cache_echecs", 0)
+        if succes + echecs:
+            morceaux.append(f"cache {succes:.0f}/{succes + echecs:.0f}")
+        if "calculs.points" in compteurs:
+            morceaux.append(f"{compteurs['calculs.points']:.0f} points")
+        return " | ".join(morceaux)
+
+    def reinitialiser(self):
+        with self._verrou:
+            self.compteurs.clear()
+            self.chronos.clear()
+
+statistiques = Statistiques()
+_profils_fils = None  # Profils des threads de travail pendant une capture
+
+def activer(actif: bool = True, afficher_statut: bool = None):
+    global ACTIF, AFFICHER_STATUT
+    ACTIF = actif
+    if afficher_statut is not None:
+        AFFICHER_STATUT = afficher_statut
+
+def compter(nom: str, valeur: float = 1):
+    if ACTIF:
+        statistiques.compter(nom, valeur)
+
+@contextmanager
+def chrono(nom: str):
+    """Mesure la durée du bloc (sans effet si l'instrumentation est désactivée)"""
+    if not ACTIF:
+        yield
+        return
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        statistiques.enregistrer_duree(nom, time.perf_counter() - debut)
+
+def chronometre(nom: str):
+    """Décorateur : mesure la durée de chaque appel de la fonction"""
+    def decorateur(fonction):
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not ACTIF:
+                return fonction(*args, **kwargs)
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                statistiques.enregistrer_duree(nom, time.perf_counter() - debut)
+        return enveloppe
+    return decorateur
+
+def profiler_fil(fonction, *args, **kwargs):
+    """
+    Exécute fonction sur le thread courant ; pendant une capture profil(),
+    son profil est ajouté à celui du thread principal
+    """
+    profils = _profils_fils
+    if profils is None:
+        return fonction(*args, **kwargs)
+    import cProfile
+    profileur = cProfile.Profile()
+    try:
+        return profileur.runcall(fonction, *args, **kwargs)
+    finally:
+        profils.append(profileur)
+
+@contextmanager
+def profil(chemin: Optional[str] = None, lignes: int = 25, sortie=sys.stderr):
+    """
+    Capture cProfile du bloc, par défaut dans le fichier de CINTREUSE_PROFIL
+    Sans fichier, le bloc s'exécute sans profilage. Les tâches lancées par
+    profiler_fil sur d'autres threads sont incluses. Le profil est enregistré
+    (lisible par pstats ou snakeviz) et les fonctions les plus coûteuses affichées.
+    """
+    global _profils_fils
+    chemin = chemin or os.environ.get("CINTREUSE_PROFIL")
+    if not chemin:
+        yield None
+        return
+    # Modules de profilage chargés seulement pour une capture (coût d'import au démarrage)
+    import cProfile
+    import pstats
+    _profils_fils = []
+    profileur = cProfile.Profile()
+    profileur.enable()
+    try:
+        yield profileur
+    finally:
+        profileur.disable()
+        profils, _profils_fils = _profils_fils, None
+        resultats = pstats.Stats(profileur, stream=sortie)
+        for profil_fil in profils:
+            resultats.add(profil_fil)
+        resultats.dump_stats(chemin)
+        resultats.sort_stats("cumulative").print_stats(lignes)
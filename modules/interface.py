@@ -1,13 +1,33 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import math
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from modules import instrumentation
+from modules.apercu import Apercu
 from modules.calculs import ParametresTube, ParametresCintrage
+from modules.points import TamponPoints
+from modules.rendu import RenduTube
+from modules.vue import NiveauxDetail, Vue
 
 class Interface:
+    DELAI_SONDAGE = 30  # ms entre deux lectures des résultats des threads de travail
+    FACTEUR_ZOOM = 1.2  # Zoom par cran de molette
+    DELAI_APERCU = 25   # ms sans nouvelle saisie avant la mise à jour de l'aperçu
+    
     def __init__(self, master, calculateur):
         self.master = master
         self.calculateur = calculateur
         
+        # Calculs et exports hors du thread Tk
+        self._executeur = ThreadPoolExecutor(max_workers=2, thread_name_prefix="calcul")
+        self._resultats = queue.Queue()
+        self._taches = {}
+        self._generations = {}
+        self._sondage = None
+        
         # Configuration du style
         self.setup_style()
         
@@ -27,11 +47,41 @@ class Interface:
         
         self.canvas = tk.Canvas(self.canvas_frame, bg='white', width=1024, height=600)
         self.canvas.pack(expand=True, fill='both', padx=5, pady=5)
+        self.rendu = RenduTube(self.canvas)
+        
+        # Vue zoomable : le tube affiché et ses niveaux de détail sont gardés
+        # pour redessiner à chaque zoom ou déplacement sans recalcul
+        self.vue = Vue()
+        self._source = None
+        self._points = None
+        self._indices_cintrages = None
+        self._niveaux = None
+        self._redessin = None
+        self._souris = None
+        self._vue_libre = False  # Vrai après un zoom ou un déplacement : un nouveau dessin garde la vue
+        self.canvas.bind('<MouseWheel>', self._molette)
+        self.canvas.bind('<Button-4>', self._molette)
+        self.canvas.bind('<Button-5>', self._molette)
+        self.canvas.bind('<ButtonPress-1>', self._debut_deplacement)
+        self.canvas.bind('<B1-Motion>', self._deplacement)
+        self.canvas.bind('<Double-Button-1>', lambda e: self.ajuster_vue())
+        self.canvas.bind('<Configure>', lambda e: self.planifier_redessin())
         self.dessiner_grille()
         
+        # Aperçu en direct : les champs saisis sont prévisualisés sans cliquer sur Simuler
+        self._apercu = Apercu(calculateur)
+        self._apercu_planifie = None
+        self._candidat = False        # Les champs du cintrage diffèrent du programme
+        self._remplissage = False     # Champs remplis par la sélection, pas par la saisie
+        self._cintrage_apercu = None  # Index du cintrage mis en évidence dans le tube affiché
+        
         # Panneau de contrôle
         self.setup_control_panel()
         
+    def fermer(self):
+        # Les tâches en attente sont abandonnées à la fermeture
+        self._executeur.shutdown(wait=False, cancel_futures=True)
+        
     def setup_style(self):
         style = ttk.Style()
         
@@ -53,12 +103,11 @@ class Interface:
                        font=('Arial', 9))
         
     def dessiner_grille(self):
-        # Dessiner une grille légère pour mieux visualiser les dimensions
-        for i in range(0, 801, 50):
-            # Lignes verticales
-            self.canvas.create_line(i, 0, i, 600, fill='#d0d0d0')
-            # Lignes horizontales
-            self.canvas.create_line(0, i, 800, i, fill='#d0d0d0')
+        # Dessiner une grille légère pour mieux visualiser les dimensions :
+        # lignes à des cotes rondes (1, 2 ou 5 x 10^k mm), qui suivent zoom et déplacement
+        pas = self.vue.pas_grille()
+        self.rendu.dessiner_grille(self.canvas.winfo_width(), self.canvas.winfo_height(),
+                                   pas * self.vue.echelle, (self.vue.dx, self.vue.dy))
         
     def setup_control_panel(self):
         # Frame de contrôle avec style
@@ -70,18 +119,21 @@ class Interface:
         cintrages_frame.pack(fill='x', pady=5)
         
         # Treeview pour afficher les cintrages
-        self.cintrages_tree = ttk.Treeview(cintrages_frame, columns=('Position', 'Angle', 'Rayon', 'A'), 
+        self.cintrages_tree = ttk.Treeview(cintrages_frame, columns=('Position', 'Angle', 'Rayon', 'Rotation', 'A'), 
                                          show='headings', height=5)
         self.cintrages_tree.heading('Position', text='Position (mm)')
         self.cintrages_tree.heading('Angle', text='Angle (°)')
         self.cintrages_tree.heading('Rayon', text='Rayon (mm)')
+        self.cintrages_tree.heading('Rotation', text='Rotation (°)')
         self.cintrages_tree.heading('A', text='A (mm)')
         self.cintrages_tree.pack(fill='x', pady=2)
+        self.cintrages_tree.bind('<<TreeviewSelect>>', self._selection_cintrage)
         
         # Boutons pour gérer les cintrages
         btn_frame = ttk.Frame(cintrages_frame)
         btn_frame.pack(fill='x', pady=2)
         ttk.Button(btn_frame, text="Ajouter", command=self.ajouter_cintrage).pack(side='left', padx=2)
+        ttk.Button(btn_frame, text="Modifier", command=self.modifier_cintrage).pack(side='left', padx=2)
         ttk.Button(btn_frame, text="Supprimer", command=self.supprimer_cintrage).pack(side='left', padx=2)
         
         # Section Paramètres du tube
@@ -96,6 +148,7 @@ class Interface:
         ]):
             ttk.Label(tube_frame, text=label).grid(row=i, column=0, sticky='w', pady=2)
             setattr(self, var, tk.StringVar(value=default))
+            getattr(self, var).trace_add("write", self._planifier_apercu)
             entry = ttk.Entry(tube_frame, textvariable=getattr(self, var), width=10)
             entry.grid(row=i, column=1, padx=5, pady=2)
             self.create_tooltip(entry, tooltip)
@@ -107,10 +160,12 @@ class Interface:
         for i, (label, var, default, tooltip) in enumerate([
             ("Position (mm)", "position_var", "200", "Distance depuis le début du tube jusqu'au point de cintrage"),
             ("Angle (degrés)", "angle_var", "90", "Angle de cintrage désiré"),
-            ("Rayon (mm)", "rayon_var", "50", "Rayon de cintrage intérieur")
+            ("Rayon (mm)", "rayon_var", "50", "Rayon de cintrage intérieur"),
+            ("Rotation (degrés)", "rotation_var", "0", "Rotation du plan de cintrage par rapport au cintrage précédent")
         ]):
             ttk.Label(cintrage_frame, text=label).grid(row=i, column=0, sticky='w', pady=2)
             setattr(self, var, tk.StringVar(value=default))
+            getattr(self, var).trace_add("write", self._saisie_cintrage)
             entry = ttk.Entry(cintrage_frame, textvariable=getattr(self, var), width=10)
             entry.grid(row=i, column=1, padx=5, pady=2)
             self.create_tooltip(entry, tooltip)
@@ -159,21 +214,52 @@ class Interface:
             params_cintrage = ParametresCintrage(
                 angle=float(self.angle_var.get()),
                 rayon=float(self.rayon_var.get()),
-                position=float(self.position_var.get())
+                position=float(self.position_var.get()),
+                rotation=float(self.rotation_var.get())
             )
             
             self.calculateur.multi_cintrage.ajouter_cintrage(params_cintrage)
+            self._annuler_calcul("simulation")
             self.mettre_a_jour_liste_cintrages()
+            self._candidat = False
+            self._planifier_apercu()
             
         except ValueError as e:
             tk.messagebox.showerror("Erreur", str(e))
             
+    def modifier_cintrage(self):
+        # Les champs remplacent le cintrage sélectionné, qui garde son identifiant
+        index = self.index_selectionne()
+        if index is None:
+            tk.messagebox.showerror("Erreur", "Sélectionnez le cintrage à modifier")
+            return
+        try:
+            params_cintrage = ParametresCintrage(
+                angle=float(self.angle_var.get()),
+                rayon=float(self.rayon_var.get()),
+                position=float(self.position_var.get()),
+                rotation=float(self.rotation_var.get())
+            )
+            identifiant = self.calculateur.multi_cintrage.ids[index]
+            self.calculateur.multi_cintrage.modifier_cintrage(index, params_cintrage)
+        except ValueError as e:
+            tk.messagebox.showerror("Erreur", str(e))
+            return
+        self._annuler_calcul("simulation")
+        self._candidat = False
+        self.mettre_a_jour_liste_cintrages()
+        self.cintrages_tree.selection_set(str(identifiant))
+            
     def supprimer_cintrage(self):
         selection = self.cintrages_tree.selection()
         if selection:
-            index = self.cintrages_tree.index(selection[0])
-            self.calculateur.multi_cintrage.supprimer_cintrage(index)
+            # L'identifiant de la ligne est celui du cintrage
+            for item in selection:
+                self.calculateur.multi_cintrage.supprimer_cintrage_par_id(int(item))
+            self._annuler_calcul("simulation")
             self.mettre_a_jour_liste_cintrages()
+            self._candidat = False
+            self._planifier_apercu()
             
     def mettre_a_jour_liste_cintrages(self):
         # Effacer la liste actuelle
@@ -181,153 +267,355 @@ class Interface:
             self.cintrages_tree.delete(item)
             
         # Ajouter les cintrages
-        for cintrage in self.calculateur.multi_cintrage.cintrages:
-            if abs(cintrage.angle - 90) < 0.1:
-                valeur_a = f"{self.calculateur.calculer_valeur_A(cintrage.rayon, cintrage.angle):.1f}"
-            else:
-                valeur_a = "-"
-            self.cintrages_tree.insert('', 'end', values=(
+        multi_cintrage = self.calculateur.multi_cintrage
+        for identifiant, cintrage in zip(multi_cintrage.ids, multi_cintrage.cintrages):
+            # Valeur A pour tout angle, sauf à partir de 180° (tangentes parallèles)
+            valeur_a = self.calculateur.calculer_valeur_A(cintrage.rayon, cintrage.angle)
+            valeur_a = f"{valeur_a:.1f}" if math.isfinite(valeur_a) else "-"
+            self.cintrages_tree.insert('', 'end', iid=str(identifiant), values=(
                 f"{cintrage.position:.1f}",
                 f"{cintrage.angle:.1f}",
                 f"{cintrage.rayon:.1f}",
+                f"{cintrage.rotation:.1f}",
                 valeur_a
             ))
             
-    def simuler_cintrage(self):
+    def index_selectionne(self):
+        """Index du cintrage sélectionné dans la liste, None sans sélection"""
+        selection = self.cintrages_tree.selection()
+        if not selection:
+            return None
+        index = self.calculateur.multi_cintrage.index_cintrage(int(selection[0]))
+        return index if index >= 0 else None
+        
+    def _selection_cintrage(self, event=None):
+        # Les champs reprennent le cintrage sélectionné, mis en évidence dans l'aperçu
+        index = self.index_selectionne()
+        if index is not None:
+            cintrage = self.calculateur.multi_cintrage.cintrages[index]
+            self._remplissage = True
+            try:
+                for var, valeur in ((self.position_var, cintrage.position), (self.angle_var, cintrage.angle),
+                                    (self.rayon_var, cintrage.rayon), (self.rotation_var, cintrage.rotation)):
+                    var.set(f"{valeur:g}")
+            finally:
+                self._remplissage = False
+        self._candidat = False
+        self._planifier_apercu()
+        
+    def _saisie_cintrage(self, *_):
+        # Les champs du cintrage décrivent un cintrage à ajouter, ou qui remplace le cintrage sélectionné
+        if not self._remplissage:
+            self._candidat = True
+        self._planifier_apercu()
+        
+    def _planifier_apercu(self, *_):
+        # Une rafale de frappes ne donne qu'une mise à jour, DELAI_APERCU après la dernière
+        if self._apercu_planifie is not None:
+            self.master.after_cancel(self._apercu_planifie)
+        self._apercu_planifie = self.master.after(self.DELAI_APERCU, self.mettre_a_jour_apercu)
+        
+    @instrumentation.chronometre("interface.apercu")
+    def mettre_a_jour_apercu(self):
+        """
+        Aperçu du programme avec les valeurs saisies : le cintrage des champs
+        remplace le cintrage sélectionné, ou s'ajoute au programme s'il n'y a pas
+        de sélection. Seul ce qui a changé depuis l'aperçu précédent est recalculé
+        et les éléments du canvas sont mis à jour.
+        """
+        self._apercu_planifie = None
         try:
-            self.status_var.set("Calcul en cours...")
-            self.master.update()
-            
-            # Récupération des paramètres du tube
             params_tube = ParametresTube(
                 diametre=float(self.diametre_var.get()),
                 epaisseur=float(self.epaisseur_var.get()),
                 longueur=float(self.longueur_var.get())
             )
+            candidat = ParametresCintrage(
+                angle=float(self.angle_var.get()),
+                rayon=float(self.rayon_var.get()),
+                position=float(self.position_var.get()),
+                rotation=float(self.rotation_var.get())
+            ) if self._candidat else None
+        except ValueError:
+            self.status_var.set("Aperçu: valeurs incomplètes")
+            return
             
-            # Calcul des points du tube (mode multi-cintrage)
-            points = self.calculateur.calculer_points_tube(params_tube)
-            
-            # Dessin du tube
-            self.reinitialiser(False)  # False pour ne pas effacer la liste des cintrages
-            self.dessiner_tube(points)
+        debut = time.perf_counter()
+        cintrages = list(self.calculateur.multi_cintrage.cintrages)
+        index = self.index_selectionne()
+        nouveau = candidat is not None and index is None
+        if candidat is not None:
+            # Le résultat d'une simulation encore en cours serait moins récent que l'aperçu
+            self._annuler_calcul("simulation")
+            if index is None:
+                cintrages.append(candidat)
+                index = len(cintrages) - 1
+            else:
+                cintrages[index] = candidat
+        resultat = self._apercu.mettre_a_jour(params_tube, cintrages, index)
+        
+        self._cintrage_apercu = resultat.index
+        self.dessiner_tube(resultat.geometrie.points, resultat.geometrie.indices_cintrages)
+        self.afficher_informations(params_tube, resultat.cintrages)
+        duree = (time.perf_counter() - debut) * 1000
+        if resultat.index is None:
+            self.status_var.set(f"Aperçu du programme ({duree:.1f} ms)")
+        else:
+            self.status_var.set(f"Aperçu: {'nouveau cintrage' if nouveau else 'cintrage'} #{resultat.index + 1} "
+                                f"(recalcul {resultat.recalcul}, {duree:.1f} ms)")
             
-            # Préparation des informations de cintrage
-            info = "Cintrages:\n"
+    def executer_en_arriere_plan(self, canal, tache, rappel, message="Calcul en cours...", erreur=None):
+        """
+        Exécute tache() sur un thread de travail sans bloquer la boucle Tk
+
+        Le résultat est transmis à rappel(resultat) sur le thread Tk, via une file
+        lue par after(). Un nouvel appel sur le même canal annule la tâche
+        précédente : si elle n'a pas démarré elle est abandonnée, sinon son
+        résultat est ignoré. La tâche peut recevoir une fonction progression(message)
+        pour afficher son avancement dans la barre de statut.
+
+        Args:
+            canal: Nom du canal ("simulation", "export"...), une seule tâche active par canal
+            tache: Fonction exécutée sur le thread de travail, appelée avec progression
+            rappel: Fonction appelée sur le thread Tk avec le résultat
+            message: Message affiché dans la barre de statut au lancement
+            erreur: Fonction appelée sur le thread Tk avec l'exception en cas d'échec
+        """
+        generation = self._annuler_calcul(canal)
+        self.status_var.set(message)
+        
+        def progression(texte):
+            self._resultats.put(("progression", canal, generation, texte))
             
-            # Informations pour chaque cintrage
-            for i, cintrage in enumerate(self.calculateur.multi_cintrage.cintrages):
-                angle_reel = self.calculateur.calculer_retour_elastique(cintrage.angle)
-                valeur_a = self.calculateur.calculer_valeur_A(cintrage.rayon, cintrage.angle)
-                info += f"#{i+1}: pos={cintrage.position:.0f}, "
-                info += f"angle={angle_reel:.1f}°"
-                if abs(cintrage.angle - 90) < 0.1:
-                    info += f", A={valeur_a:.1f}mm"
-                info += "\n"
+        def executer():
+            try:
+                resultat = instrumentation.profiler_fil(tache, progression)
+                self._resultats.put(("resultat", canal, generation, (rappel, resultat)))
+            except Exception as e:
+                self._resultats.put(("erreur", canal, generation, (erreur, e)))
                 
-            # Ajout de la longueur développée totale
-            longueur_dev = self.calculateur.calculer_longueur_developpee(params_tube)
-            info += f"\nLongueur développée:\n{longueur_dev:.1f} mm"
-            
-            # Mise à jour du label des informations de cintrage
-            self.cintrages_info.configure(text=info)
+        self._taches[canal] = self._executeur.submit(executer)
+        if self._sondage is None:
+            self._sondage = self.master.after(self.DELAI_SONDAGE, self._verifier_resultats)
             
-            self.status_var.set("Simulation terminée")
+    def _annuler_calcul(self, canal):
+        """Rend obsolète la tâche en cours sur le canal et retourne la nouvelle génération"""
+        self._generations[canal] = self._generations.get(canal, 0) + 1
+        tache = self._taches.pop(canal, None)
+        if tache is not None:
+            tache.cancel()
+        return self._generations[canal]
+        
+    def _verifier_resultats(self):
+        # Traitement des messages des threads de travail sur le thread Tk
+        while True:
+            try:
+                nature, canal, generation, contenu = self._resultats.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generations.get(canal):
+                continue  # Tâche obsolète
+            if nature == "progression":
+                self.status_var.set(contenu)
+                continue
+            self._taches.pop(canal, None)
+            fonction, valeur = contenu
+            if nature == "resultat":
+                fonction(valeur)
+            elif fonction is not None:
+                fonction(valeur)
+            else:
+                self.status_var.set(f"Erreur: {valeur}")
+                tk.messagebox.showerror("Erreur", str(valeur))
+                
+        # Le sondage continue tant qu'une tâche est en cours
+        if self._taches or not self._resultats.empty():
+            self._sondage = self.master.after(self.DELAI_SONDAGE, self._verifier_resultats)
+        else:
+            self._sondage = None
             
+    def simuler_cintrage(self):
+        try:
+            # Récupération des paramètres du tube
+            params_tube = ParametresTube(
+                diametre=float(self.diametre_var.get()),
+                epaisseur=float(self.epaisseur_var.get()),
+                longueur=float(self.longueur_var.get())
+            )
         except ValueError as e:
             self.status_var.set("Erreur: valeurs invalides")
             tk.messagebox.showerror("Erreur", "Veuillez entrer des valeurs numériques valides")
+            return
+            
+        # Copie des cintrages : le thread de travail ne lit pas la liste partagée
+        cintrages = list(self.calculateur.multi_cintrage.cintrages)
+        debut = time.perf_counter()
+        
+        def calculer(progression):
+            # Calcul des points du tube et de l'index des cintrages (mode multi-cintrage)
+            geometrie = self.calculateur.calculer_geometrie(params_tube, cintrages)
+            return geometrie, self.calculateur.verifier_interferences(params_tube, cintrages)
+            
+        def afficher(resultat):
+            geometrie, interference = resultat
+            # Dessin du tube (les éléments existants sont mis à jour), cintrage sélectionné en évidence
+            self._cintrage_apercu = self.index_selectionne()
+            self.dessiner_tube(geometrie.points, geometrie.indices_cintrages)
+            self.afficher_informations(params_tube, cintrages, interference)
+            statut = f"Simulation terminée ({(time.perf_counter() - debut) * 1000:.0f} ms)"
+            if instrumentation.ACTIF and instrumentation.AFFICHER_STATUT:
+                statut += " - " + instrumentation.statistiques.resume()
+            self.status_var.set(statut)
+            
+        self.executer_en_arriere_plan("simulation", calculer, afficher, "Calcul en cours...")
+        
+    def afficher_informations(self, params_tube, cintrages, interference=None):
+        # Préparation des informations de cintrage
+        info = "Cintrages:\n"
+        
+        # Informations pour chaque cintrage
+        for i, cintrage in enumerate(cintrages):
+            angle_reel = self.calculateur.calculer_retour_elastique(cintrage.angle)
+            valeur_a = self.calculateur.calculer_valeur_A(cintrage.rayon, cintrage.angle)
+            info += f"#{i+1}: pos={cintrage.position:.0f}, "
+            info += f"angle={angle_reel:.1f}°"
+            if math.isfinite(valeur_a):
+                info += f", A={valeur_a:.1f}mm"
+            info += "\n"
+            
+        # Ajout de la longueur développée totale
+        longueur_dev = self.calculateur.calculer_longueur_developpee(params_tube, cintrages=cintrages)
+        info += f"\nLongueur développée:\n{longueur_dev:.1f} mm"
+        
+        # Interférence du tube avec lui-même
+        if interference is not None and interference.interference:
+            info += f"\n\n⚠ Le tube se traverse ({len(interference.paires)} couples de segments en contact)"
+        
+        # Mise à jour du label des informations de cintrage
+        self.cintrages_info.configure(text=info)
         
     def reinitialiser(self, tout=True):
-        self.canvas.delete("all")
+        self._annuler_calcul("simulation")
+        if self._apercu_planifie is not None:
+            self.master.after_cancel(self._apercu_planifie)
+            self._apercu_planifie = None
+        self._source = self._points = self._indices_cintrages = self._niveaux = None
+        self._candidat = self._vue_libre = False
+        self._cintrage_apercu = None
+        self._apercu.vider()
+        self.rendu.effacer()
         if tout:
-            self.calculateur.multi_cintrage.cintrages.clear()
+            self.calculateur.multi_cintrage.vider()
             self.mettre_a_jour_liste_cintrages()
-        else:
-            self.dessiner_grille()
-        
-    def dessiner_tube(self, points):
-        if not points:
+
+    def piece_courante(self, nom=""):
+        """Tube, cintrages et coefficient affichés, sous forme de pièce (modules.projet)"""
+        from modules.projet import Piece
+        params_tube = ParametresTube(
+            diametre=float(self.diametre_var.get()),
+            epaisseur=float(self.epaisseur_var.get()),
+            longueur=float(self.longueur_var.get())
+        )
+        return Piece(nom, params_tube, list(self.calculateur.multi_cintrage.cintrages),
+                     self.calculateur.coefficient_retour_elastique)
+
+    def charger_piece(self, piece):
+        """Remplace le programme affiché par celui d'une pièce (projet ou bibliothèque), puis le simule"""
+        self.reinitialiser()
+        self.calculateur.multi_cintrage.ajouter_cintrages(piece.cintrages)
+        self.calculateur.coefficient_retour_elastique = piece.coefficient_retour_elastique
+        self.diametre_var.set(f"{piece.tube.diametre:g}")
+        self.epaisseur_var.set(f"{piece.tube.epaisseur:g}")
+        self.longueur_var.set(f"{piece.tube.longueur:g}")
+        self.mettre_a_jour_liste_cintrages()
+        self.simuler_cintrage()
+
+    @instrumentation.chronometre("interface.dessiner_tube")
+    def dessiner_tube(self, points, indices_cintrages=None):
+        """
+        Dessine le tube; indices_cintrages (voir CalculateurCintrage.calculer_geometrie)
+        donne pour chaque cintrage l'indice de ses points de début et de fin
+        """
+        if len(points) == 0:
             return
             
-        self.dessiner_grille()
-            
-        # Facteur d'échelle et décalage pour centrer le dessin
-        x_min = min(p[0] for p in points)
-        x_max = max(p[0] for p in points)
-        y_min = min(p[1] for p in points)
-        y_max = max(p[1] for p in points)
-        
-        largeur_dessin = x_max - x_min
-        hauteur_dessin = y_max - y_min
-        
-        # Calcul de l'échelle pour utiliser 90% de l'espace disponible
-        echelle_x = (self.canvas.winfo_width() * 0.9) / largeur_dessin if largeur_dessin > 0 else 1
-        echelle_y = (self.canvas.winfo_height() * 0.9) / hauteur_dessin if hauteur_dessin > 0 else 1
-        echelle = min(echelle_x, echelle_y)
-        
-        # Décalage pour centrer
-        dx = (self.canvas.winfo_width() - largeur_dessin * echelle) / 2 - x_min * echelle
-        dy = (self.canvas.winfo_height() - hauteur_dessin * echelle) / 2 - y_min * echelle
-        
-        # Conversion des points en coordonnées canvas
-        points_canvas = [(x * echelle + dx, y * echelle + dy) for x, y in points]
-        
-        # Dessin du tube avec effet 3D amélioré
-        
-        # Ombre portée
-        for i in range(len(points_canvas) - 1):
-            x1, y1 = points_canvas[i]
-            x2, y2 = points_canvas[i + 1]
-            self.canvas.create_line(x1+4, y1+4, x2+4, y2+4, 
-                                  width=10, 
-                                  fill="#90CAF9",  # Bleu plus prononcé pour l'ombre
-                                  capstyle="round", 
-                                  joinstyle="round")
-        
-        # Tube principal - contour
-        for i in range(len(points_canvas) - 1):
-            x1, y1 = points_canvas[i]
-            x2, y2 = points_canvas[i + 1]
-            self.canvas.create_line(x1, y1, x2, y2, 
-                                  width=10, 
-                                  fill="#0D47A1",  # Bleu plus foncé pour plus de contraste
-                                  capstyle="round", 
-                                  joinstyle="round")
+        if indices_cintrages is None:
+            indices_cintrages = np.zeros((0, 2), dtype=np.intp)
+        # Niveaux de détail recalculés seulement pour un nouveau tube
+        if self._niveaux is None or points is not self._source:
+            self._source = points
+            points = points if isinstance(points, TamponPoints) else TamponPoints(points)
+            if self._niveaux is None:
+                self._niveaux = NiveauxDetail(points.tableau, indices_cintrages.ravel())
+            else:
+                self._niveaux.definir_points(points.tableau, indices_cintrages.ravel())
+            self._points = points
+        self._indices_cintrages = indices_cintrages
+        if self._vue_libre:
+            self.redessiner()
+        else:
+            self.ajuster_vue()
+        
+    def ajuster_vue(self):
+        """Centre le tube en utilisant 90% de l'espace disponible"""
+        self._vue_libre = False
+        if self._points is not None:
+            self.vue.ajuster(*self._points.emprise(), self.canvas.winfo_width(), self.canvas.winfo_height())
+        self.redessiner()
+        
+    def planifier_redessin(self):
+        # Les événements de souris rapprochés ne donnent qu'un redessin, quand Tk est libre
+        if self._redessin is None:
+            self._redessin = self.canvas.after_idle(self.redessiner)
             
-        # Tube principal - effet de brillance
-        for i in range(len(points_canvas) - 1):
-            x1, y1 = points_canvas[i]
-            x2, y2 = points_canvas[i + 1]
-            self.canvas.create_line(x1-1, y1-1, x2-1, y2-1, 
-                                  width=6, 
-                                  fill="#42A5F5",  # Bleu brillant plus vif
-                                  capstyle="round", 
-                                  joinstyle="round")
+    @instrumentation.chronometre("interface.redessiner")
+    def redessiner(self):
+        """Redessine la grille et la partie visible du tube avec la vue courante"""
+        if self._redessin is not None:
+            self.canvas.after_cancel(self._redessin)
+            self._redessin = None
+        self.dessiner_grille()
+        if self._points is None:
+            return
+        largeur, hauteur = self.canvas.winfo_width(), self.canvas.winfo_height()
+        
+        # Dessin du tube avec effet 3D : une ligne multi-points par couche et
+        # par morceau visible, simplifiée à la résolution de l'écran
+        self.rendu.dessiner_tube(self._niveaux.morceaux_visibles(self.vue, largeur, hauteur))
             
-        # Points de cintrage avec effet métallique
-        for i, cintrage in enumerate(self.calculateur.multi_cintrage.cintrages):
-            for j in range(len(points_canvas) - 1):
-                x1, y1 = points_canvas[j]
-                if abs(x1 - cintrage.position * echelle - dx) < 1:
-                    # Ombre du point
-                    self.canvas.create_oval(x1-7, y1-7, x1+7, y1+7, 
-                                         fill="#F57C00",  # Orange plus foncé
-                                         outline="#E65100", 
-                                         width=2)
-                    # Effet de brillance
-                    self.canvas.create_oval(x1-5, y1-5, x1+5, y1+5, 
-                                         fill="#FFB74D",  # Orange plus chaud
-                                         outline="")
-                    # Point central
-                    self.canvas.create_oval(x1-2, y1-2, x1+2, y1+2, 
-                                         fill="#FFFFFF",  # Blanc
-                                         outline="")
-                    break
+        # Points de cintrage avec effet métallique, au début de chaque arc visible
+        tableau = self._points.tableau
+        self.rendu.dessiner_marqueurs(self.vue.reperes_visibles(
+            tableau[self._indices_cintrages[:, 0]], largeur, hauteur).tolist())
+        
+        # Cintrage en aperçu ou sélectionné, mis en évidence
+        index = self._cintrage_apercu
+        if index is not None and index < len(self._indices_cintrages):
+            debut, fin = self._indices_cintrages[index]
+            self.rendu.dessiner_surbrillance([self.vue.vers_canvas(tableau[debut:fin + 1])], f"#{index + 1}")
+        else:
+            self.rendu.dessiner_surbrillance([])
         
         # Affichage des dimensions
-        self.afficher_dimensions(points_canvas, points)
+        self.afficher_dimensions(self.vue.vers_canvas(tableau[[0, -1]]).tolist(), tableau)
+        
+    def _molette(self, event):
+        # Zoom autour du pointeur : delta sous Windows et macOS, boutons 4 et 5 sous X11
+        zoom_avant = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.vue.zoomer(self.FACTEUR_ZOOM if zoom_avant else 1 / self.FACTEUR_ZOOM, event.x, event.y)
+        self._vue_libre = True
+        self.planifier_redessin()
         
+    def _debut_deplacement(self, event):
+        self._souris = (event.x, event.y)
+        
+    def _deplacement(self, event):
+        if self._souris is None:
+            return
+        self.vue.deplacer(event.x - self._souris[0], event.y - self._souris[1])
+        self._vue_libre = True
+        self._souris = (event.x, event.y)
+        self.planifier_redessin()
         
     def afficher_cote_a(self, point, valeur_a):
         """Affiche la cote A sur le dessin"""
@@ -368,14 +656,14 @@ class Interface:
         
         # Point de départ
         x0, y0 = points_canvas[0]
-        self.canvas.create_text(x0-10, y0-10, 
-                              text="Début", 
-                              anchor="se",
-                              **style_texte)
+        self.rendu.texte("debut", x0-10, y0-10, 
+                         text="Début", 
+                         anchor="se",
+                         **style_texte)
         
         # Point final
         xn, yn = points_canvas[-1]
-        self.canvas.create_text(xn+10, yn+10, 
-                              text=f"Fin\n{longueur_reelle:.1f}mm", 
-                              anchor="nw",
-                              **style_texte)
+        self.rendu.texte("fin", xn+10, yn+10, 
+                         text=f"Fin\n{longueur_reelle:.1f}mm", 
+                         anchor="nw",
+                         **style_texte)
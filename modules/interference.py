@@ -0,0 +1,328 @@
+"""
+Détection des interférences du tube avec lui-même et avec la machine
+
+Le tube est modélisé par des capsules : chaque segment de la ligne moyenne
+entouré d'un rayon égal au demi-diamètre du tube. Les segments consécutifs
+sont regroupés en blocs rangés dans une grille uniforme (hachage spatial) :
+seuls les segments de blocs qui partagent une cellule sont comparés, au
+lieu de tous les couples.
+
+Repère machine d'une étape de cintrage : origine au point où le tube quitte
+la matrice côté chariot, x dans l'axe du tube vers la partie non cintrée,
+y vers le centre de la matrice, z = x ^ y. Les obstacles de la machine sont
+des boîtes alignées sur ces axes.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from modules.geometrie3d import _rotations_x, _transformations_arcs, calculer_geometrie_3d, reperes_programme
+
+TOLERANCE_CONTACT = 1e-6  # Un contact tangent (mm) n'est pas une interférence
+COUPLES_PAR_LOT = 1 << 18  # Couples de segments candidats développés en mémoire à la fois
+
+@dataclass
+class Obstacle:
+    nom: str
+    minimum: Tuple[float, float, float]  # Coin inférieur de la boîte, repère machine (mm)
+    maximum: Tuple[float, float, float]  # Coin supérieur de la boîte, repère machine (mm)
+
+@dataclass
+class ResultatInterference:
+    paires: np.ndarray     # (k, 2) indices des segments en interférence
+    distances: np.ndarray  # (k,) distance entre les axes de ces segments (mm)
+    jeu_minimal: float     # Plus petit jeu entre surfaces (mm), négatif en cas d'interférence, inf au-delà de la marge
+    paire_minimale: Optional[Tuple[int, int]] = None
+
+    @property
+    def interference(self) -> bool:
+        return len(self.paires) > 0
+
+@dataclass
+class EtapeCintrage:
+    index_cintrage: int
+    avancement: float  # Fraction de l'angle du cintrage déjà réalisée (1 = terminé)
+    interference: ResultatInterference
+    collisions_machine: Dict[str, np.ndarray] = field(default_factory=dict)  # Segments touchant chaque obstacle
+
+    @property
+    def collision(self) -> bool:
+        return self.interference.interference or bool(self.collisions_machine)
+
+def _en_3d(points) -> np.ndarray:
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[1] == 2:
+        points = np.column_stack((points, np.zeros(len(points))))
+    return points
+
+def _paires_voisines(minimums: np.ndarray, maximums: np.ndarray, cellule: float, filtre=None) -> np.ndarray:
+    """
+    Couples (i, j), i < j, de boîtes qui partagent au moins une cellule de la grille
+    filtre(i, j) peut écarter des couples avant le dédoublonnage
+    """
+    bas = np.floor(minimums / cellule).astype(np.int64)
+    etendues = np.floor(maximums / cellule).astype(np.int64) - bas + 1
+    nb_cellules = etendues.prod(axis=1)
+
+    # Une entrée par couple (segment, cellule couverte)
+    segment = np.repeat(np.arange(len(bas)), nb_cellules)
+    rang = np.arange(nb_cellules.sum()) - np.repeat(np.cumsum(nb_cellules) - nb_cellules, nb_cellules)
+    etendue = etendues[segment]
+    cellules = bas[segment] + np.column_stack((
+        rang % etendue[:, 0],
+        (rang // etendue[:, 0]) % etendue[:, 1],
+        rang // (etendue[:, 0] * etendue[:, 1])
+    ))
+    cellules -= cellules.min(axis=0)
+    dimensions = cellules.max(axis=0) + 1
+    cles = (cellules[:, 0] * dimensions[1] + cellules[:, 1]) * dimensions[2] + cellules[:, 2]
+
+    # Après tri, les segments d'une même cellule sont contigus : on compare
+    # chaque entrée à ses suivantes tant qu'elles sont dans la même cellule
+    ordre = np.lexsort((segment, cles))
+    cles, segment = cles[ordre], segment[ordre]
+    premiers, seconds = [], []
+    decalage = 1
+    while decalage < len(cles):
+        meme_cellule = cles[:-decalage] == cles[decalage:]
+        if not meme_cellule.any():
+            break
+        # Dans une cellule, les segments sont triés : i < j
+        i, j = segment[:-decalage][meme_cellule], segment[decalage:][meme_cellule]
+        gardes = i != j if filtre is None else (i != j) & filtre(i, j)
+        premiers.append(i[gardes])
+        seconds.append(j[gardes])
+        decalage += 1
+    if not premiers:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    codes = np.unique(np.concatenate(premiers) * len(bas) + np.concatenate(seconds))
+    return np.column_stack((codes // len(bas), codes % len(bas)))
+
+def distances_segments(p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray) -> np.ndarray:
+    """
+    Distances entre les segments [p1, q1] et [p2, q2], tableaux (k, 3)
+    """
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.maximum(np.einsum('ij,ij->i', d1, d1), 1e-24)
+    e = np.maximum(np.einsum('ij,ij->i', d2, d2), 1e-24)
+    b = np.einsum('ij,ij->i', d1, d2)
+    c = np.einsum('ij,ij->i', d1, r)
+    f = np.einsum('ij,ij->i', d2, r)
+
+    # Paramètres des points les plus proches, s sur le premier segment et t sur le second
+    denominateur = a * e - b * b
+    paralleles = denominateur < 1e-12 * a * e
+    s = np.where(paralleles, 0.0, np.clip((b * f - c * e) / np.where(paralleles, 1.0, denominateur), 0.0, 1.0))
+    t = (b * s + f) / e
+    s = np.where(t < 0, np.clip(-c / a, 0.0, 1.0), np.where(t > 1, np.clip((b - c) / a, 0.0, 1.0), s))
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(r + d1 * s[:, None] - d2 * t[:, None], axis=1)
+
+def verifier_auto_interference(points, diametre: float, longueur_exclusion: float = None,
+                               marge: float = None) -> ResultatInterference:
+    """
+    Recherche les segments du tube qui se touchent
+
+    Deux segments trop proches le long du tube (moins de longueur_exclusion
+    entre eux, par défaut un demi-tour sur un rayon égal au demi-diamètre)
+    ne sont pas comparés : leur proximité vient du cintrage lui-même.
+
+    Args:
+        points: Ligne moyenne du tube, tableau (N, 2) ou (N, 3)
+        diametre: Diamètre extérieur du tube (mm)
+        longueur_exclusion: Distance minimale le long du tube entre deux segments comparés (mm)
+        marge: Le jeu minimal n'est exact qu'en dessous de cette valeur (mm), par défaut le diamètre
+
+    Returns:
+        Un ResultatInterference : couples de segments en interférence et jeu minimal
+    """
+    points = _en_3d(points)
+    if longueur_exclusion is None:
+        longueur_exclusion = np.pi * diametre / 2
+    if marge is None:
+        marge = diametre
+    aucun = ResultatInterference(np.zeros((0, 2), dtype=np.int64), np.zeros(0), np.inf)
+    if len(points) < 3:
+        return aucun
+
+    debuts, fins = points[:-1], points[1:]
+    longueurs = np.linalg.norm(fins - debuts, axis=1)
+    abscisses = np.concatenate(([0.0], np.cumsum(longueurs)))
+
+    # Boîtes élargies : deux capsules à moins de la marge ont des boîtes qui se chevauchent
+    demi_portee = (diametre + marge) / 2
+    minimums = np.minimum(debuts, fins) - demi_portee
+    maximums = np.maximum(debuts, fins) + demi_portee
+
+    def chevauchement(i, j, mini, maxi):
+        return np.all((mini[i] <= maxi[j]) & (mini[j] <= maxi[i]), axis=1)
+
+    # Blocs de segments consécutifs sur une demi-longueur d'exclusion : deux
+    # segments d'un même bloc ou de blocs contigus ne sont jamais comparés
+    if longueur_exclusion > 0:
+        numeros = np.floor(abscisses[:-1] / (longueur_exclusion / 2))
+        premiers = np.flatnonzero(np.diff(numeros, prepend=-1))
+    else:
+        premiers = np.arange(len(debuts))
+    derniers = np.append(premiers[1:], len(debuts)) - 1
+    minimums_blocs = np.minimum.reduceat(minimums, premiers)
+    maximums_blocs = np.maximum.reduceat(maximums, premiers)
+
+    def filtre_blocs(a, b):
+        # Écart maximal le long du tube entre un segment de a et un segment de b
+        gardes = abscisses[derniers[b]] - abscisses[premiers[a] + 1] >= longueur_exclusion
+        return gardes & chevauchement(a, b, minimums_blocs, maximums_blocs)
+
+    cellule = max(diametre + marge, float(np.median((maximums_blocs - minimums_blocs).max(axis=1))))
+    paires_blocs = _paires_voisines(minimums_blocs, maximums_blocs, cellule, filtre_blocs)
+    if len(paires_blocs) == 0:
+        return aucun
+
+    # Couples de segments des blocs retenus, lot par lot : mêmes tests par segment, puis distances
+    paires, distances_contact = [], []
+    jeu_minimal, paire_minimale = np.inf, None
+    for i, j in _couples_segments(paires_blocs, premiers, derniers):
+        gardes = (abscisses[j] - abscisses[i + 1] >= longueur_exclusion) & chevauchement(i, j, minimums, maximums)
+        i, j = i[gardes], j[gardes]
+        if len(i) == 0:
+            continue
+        distances = distances_segments(debuts[i], fins[i], debuts[j], fins[j])
+        jeux = distances - diametre
+        plus_proche = int(np.argmin(jeux))
+        if jeux[plus_proche] < jeu_minimal:
+            jeu_minimal = float(jeux[plus_proche])
+            paire_minimale = (int(i[plus_proche]), int(j[plus_proche]))
+        en_contact = jeux < -TOLERANCE_CONTACT
+        paires.append(np.column_stack((i[en_contact], j[en_contact])))
+        distances_contact.append(distances[en_contact])
+    if not paires:
+        return aucun
+    if jeu_minimal >= marge:
+        jeu_minimal, paire_minimale = np.inf, None
+    return ResultatInterference(np.concatenate(paires), np.concatenate(distances_contact),
+                                jeu_minimal, paire_minimale)
+
+def _couples_segments(paires_blocs: np.ndarray, premiers: np.ndarray, derniers: np.ndarray):
+    """
+    Couples (i, j) de segments des couples de blocs, par lots d'au plus
+    COUPLES_PAR_LOT couples : un couple de blocs n'est jamais coupé entre deux lots
+    """
+    a, b = paires_blocs[:, 0], paires_blocs[:, 1]
+    tailles_b = derniers[b] - premiers[b] + 1
+    nombres = (derniers[a] - premiers[a] + 1) * tailles_b
+    cumul = np.cumsum(nombres)
+    debut = 0
+    while debut < len(a):
+        fin = max(debut + 1, int(np.searchsorted(cumul, cumul[debut] - nombres[debut] + COUPLES_PAR_LOT,
+                                                 side='right')))
+        nombres_lot = nombres[debut:fin]
+        paire = np.repeat(np.arange(fin - debut), nombres_lot)
+        rang = np.arange(nombres_lot.sum()) - np.repeat(np.cumsum(nombres_lot) - nombres_lot, nombres_lot)
+        taille_b = tailles_b[debut:fin][paire]
+        yield (premiers[a[debut:fin]][paire] + rang // taille_b,
+               premiers[b[debut:fin]][paire] + rang % taille_b)
+        debut = fin
+
+def _distances_boite(debuts: np.ndarray, fins: np.ndarray, minimum, maximum, iterations: int = 40) -> np.ndarray:
+    """
+    Distances des segments à une boîte alignée sur les axes
+    La distance à un convexe est convexe le long du segment : recherche par section dorée
+    """
+    minimum, maximum = np.asarray(minimum, dtype=np.float64), np.asarray(maximum, dtype=np.float64)
+
+    def distance(t):
+        p = debuts + (fins - debuts) * t[:, None]
+        return np.linalg.norm(p - np.clip(p, minimum, maximum), axis=1)
+
+    nombre_or = (np.sqrt(5) - 1) / 2
+    bas, haut = np.zeros(len(debuts)), np.ones(len(debuts))
+    for _ in range(iterations):
+        t1 = haut - nombre_or * (haut - bas)
+        t2 = bas + nombre_or * (haut - bas)
+        gauche = distance(t1) < distance(t2)
+        haut = np.where(gauche, t2, haut)
+        bas = np.where(gauche, bas, t1)
+    return np.minimum.reduce((distance(np.zeros(len(debuts))), distance(np.ones(len(debuts))),
+                              distance((bas + haut) / 2)))
+
+def verifier_obstacles(points, diametre: float, obstacles: Sequence[Obstacle]) -> Dict[str, np.ndarray]:
+    """
+    Segments du tube qui touchent chaque obstacle
+
+    Returns:
+        Dictionnaire nom de l'obstacle -> indices des segments en collision,
+        limité aux obstacles touchés
+    """
+    points = _en_3d(points)
+    debuts, fins = points[:-1], points[1:]
+    rayon = diametre / 2
+    minimums = np.minimum(debuts, fins) - rayon
+    maximums = np.maximum(debuts, fins) + rayon
+
+    collisions = {}
+    for obstacle in obstacles:
+        # Filtre par boîtes englobantes, puis distance exacte
+        candidats = np.all((minimums <= obstacle.maximum) & (maximums >= obstacle.minimum), axis=1).nonzero()[0]
+        if len(candidats) == 0:
+            continue
+        distances = _distances_boite(debuts[candidats], fins[candidats], obstacle.minimum, obstacle.maximum)
+        touches = candidats[distances < rayon - TOLERANCE_CONTACT]
+        if len(touches):
+            collisions[obstacle.nom] = touches
+    return collisions
+
+def verifier_etapes_programme(longueur: float, positions, angles, rayons, rotations, diametre: float,
+                              nb_points=40, obstacles: Sequence[Obstacle] = (), sous_etapes: int = 1,
+                              marge: float = None) -> List[EtapeCintrage]:
+    """
+    Vérifie chaque étape du cintrage : interférences du tube avec lui-même et
+    collisions avec la machine, exprimées dans le repère machine du cintrage en cours
+
+    Args:
+        longueur, positions, angles, rayons, rotations, nb_points: Programme, comme calculer_geometrie_3d
+        diametre: Diamètre extérieur du tube (mm)
+        obstacles: Boîtes de la machine dans le repère machine
+        sous_etapes: Nombre de positions vérifiées pendant chaque cintrage (1 = cintrage terminé seulement)
+
+    Returns:
+        Une EtapeCintrage par cintrage et par sous-étape, dans l'ordre de fabrication
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    rayons = np.asarray(rayons, dtype=np.float64)
+    rotations = np.asarray(rotations, dtype=np.float64)
+    segments = np.broadcast_to(np.asarray(nb_points, dtype=np.intp), positions.shape)
+    if positions.size == 0:
+        return []
+
+    # Tube terminé et repères de début des arcs, calculés une seule fois : au
+    # cintrage k, le tube jusqu'au début de l'arc k est déjà dans sa forme finale
+    complete = calculer_geometrie_3d(longueur, positions, angles, rayons, rotations, segments)
+    reperes, _ = reperes_programme(np.maximum(np.diff(positions, prepend=0.0), 0.0), rotations, angles, rayons)
+    retournement = _rotations_x(np.array([np.pi]))[0]
+
+    etapes = []
+    for k in range(positions.size):
+        prefixe = complete.points[:complete.indices_cintrages[k, 0]]
+        fractions = np.arange(segments[k] + 1) / segments[k]
+        restante = longueur - positions[k]
+        for avancement in np.arange(1, sous_etapes + 1) / sous_etapes:
+            # Cintrage k réalisé en partie : arc dans le repère de son début, puis reste du tube droit
+            angle = np.radians(angles[k] * avancement)
+            fin_arc = reperes[k] @ _transformations_arcs(np.array([angle]), rayons[k:k + 1])[0]
+            a = angle * fractions
+            arc = np.column_stack((rayons[k] * np.sin(a), rayons[k] * (1 - np.cos(a)), np.zeros(a.size)))
+            troncon = arc @ reperes[k][:3, :3].T + reperes[k][:3, 3]
+            if restante > 0:
+                troncon = np.concatenate((troncon, [fin_arc[:3, 0] * restante + fin_arc[:3, 3]]))
+            points = np.concatenate((prefixe, troncon))
+            interference = verifier_auto_interference(points, diametre, marge=marge)
+
+            collisions = {}
+            if obstacles:
+                # Repère machine : fin de l'arc en cours, matrice toujours du côté +y
+                repere = fin_arc @ retournement if angles[k] < 0 else fin_arc
+                locaux = (points - repere[:3, 3]) @ repere[:3, :3]
+                collisions = verifier_obstacles(locaux, diametre, obstacles)
+            etapes.append(EtapeCintrage(k, float(avancement), interference, collisions))
+    return etapes
@@ -0,0 +1,238 @@
+"""
+Calcul inverse : d'une ligne de sommets cible au programme de cintrage
+
+Les sommets sont les intersections des segments droits prolongés, comme sur
+un plan client. Pour chaque sommet intérieur, l'angle de cintrage est l'angle
+entre les deux segments ; la tangente R·tan(A/2), avec le rayon effectif
+(rayon de la matrice corrigé du retour élastique), est retranchée des deux
+segments pour obtenir les longueurs droites, donc les positions.
+
+Le mode lot résout des milliers de pièces en un seul appel : les sommets de
+toutes les pièces sont concaténés et chaque calcul est fait sur l'ensemble,
+les pièces étant repérées par leur numéro.
+"""
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+import numpy as np
+from modules.calculs import CalculateurCintrage, ParametresCintrage
+from modules.geometrie3d import calculer_geometrie_3d
+
+@dataclass
+class ProgrammesResolus:
+    decalages: np.ndarray     # (P + 1,) les cintrages de la pièce p sont [decalages[p]:decalages[p + 1]]
+    longueurs: np.ndarray     # (P,) longueur droite totale de chaque pièce (ParametresTube.longueur)
+    positions: np.ndarray     # (B,) position de chaque cintrage (mm)
+    angles: np.ndarray        # (B,) angle désiré (degrés)
+    rotations: np.ndarray     # (B,) rotation du plan de cintrage par rapport au précédent (degrés)
+    rayons: np.ndarray        # (B,) rayon de la matrice (mm)
+    angles_machine: np.ndarray  # (B,) angle à réaliser, retour élastique compensé (degrés)
+    valeurs_a: np.ndarray     # (B,) valeur A à retrancher (mm)
+    longueurs_developpees: np.ndarray  # (P,) longueur de la ligne moyenne, droits et arcs (mm)
+    valides: np.ndarray       # (P,) faux si deux cintrages se chevauchent (segment trop court pour les tangentes)
+    demi_tours: np.ndarray    # (B,) vrai si le tube revient sur lui-même au sommet (180°), jamais réalisable
+
+    def cintrages(self, piece: int) -> List[ParametresCintrage]:
+        """Cintrages d'une pièce, prêts pour CalculMultiCintrage"""
+        tranche = slice(self.decalages[piece], self.decalages[piece + 1])
+        return [ParametresCintrage(angle=float(a), rayon=float(r), position=float(p), rotation=float(rot))
+                for a, r, p, rot in zip(self.angles[tranche], self.rayons[tranche],
+                                        self.positions[tranche], self.rotations[tranche])]
+
+def _en_3d(sommets: np.ndarray) -> np.ndarray:
+    """Sommets (k, 3), les sommets plans (k, 2) étant mis à z = 0"""
+    if sommets.shape[1] == 2:
+        sommets = np.column_stack((sommets, np.zeros(len(sommets))))
+    return sommets
+
+def _en_lot(sommets: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatène les sommets de plusieurs pièces (liste de tableaux (k, 2) ou (k, 3), mêlés ou non)"""
+    tableaux = [_en_3d(np.asarray(s, dtype=np.float64).reshape(len(s), -1)) for s in sommets]
+    return np.concatenate(tableaux), np.array([len(s) for s in tableaux], dtype=np.intp)
+
+def _reperes_initiaux(directions: np.ndarray) -> np.ndarray:
+    """
+    Repères (P, 3, 3) de départ des pièces : x selon le premier segment, z selon
+    l'axe z ramené perpendiculaire à x (l'axe y si le segment est vertical)
+    """
+    x = directions
+    z = np.array([0.0, 0.0, 1.0]) - x * x[:, 2:3]
+    verticaux = np.linalg.norm(z, axis=1) < 1e-12
+    z[verticaux] = np.array([0.0, 1.0, 0.0]) - x[verticaux] * x[verticaux, 1:2]
+    z /= np.linalg.norm(z, axis=1)[:, None]
+    return np.stack((x, np.cross(z, x), z), axis=2)
+
+class SolveurInverse:
+    def __init__(self, calculateur: CalculateurCintrage = None):
+        # Le calculateur fournit le retour élastique et la valeur A
+        self.calculateur = calculateur or CalculateurCintrage()
+
+    def resoudre(self, sommets, rayon_matrice: float) -> Tuple[float, List[ParametresCintrage]]:
+        """
+        Programme de cintrage d'une pièce
+
+        Args:
+            sommets: Sommets cible (k, 2) ou (k, 3), début et fin du tube compris (mm)
+            rayon_matrice: Rayon de la matrice de cintrage (mm)
+
+        Returns:
+            (longueur du tube, liste des cintrages triée par position)
+        """
+        sommets = np.asarray(sommets, dtype=np.float64)
+        resultat = self.resoudre_lot(sommets, [len(sommets)], rayon_matrice)
+        if resultat.demi_tours.any():
+            sommet = int(np.flatnonzero(resultat.demi_tours)[0]) + 1
+            raise ValueError(f"Demi-tour (180°) au sommet {sommet} : le tube revient sur lui-même")
+        if not resultat.valides[0]:
+            raise ValueError("Segment trop court pour le rayon de cintrage")
+        return float(resultat.longueurs[0]), resultat.cintrages(0)
+
+    def resoudre_lot(self, sommets, nb_sommets, rayons_matrice) -> ProgrammesResolus:
+        """
+        Programmes de cintrage de plusieurs pièces en un seul calcul vectorisé
+
+        Args:
+            sommets: Sommets de toutes les pièces concaténés, (V, 2) ou (V, 3),
+                ou liste de tableaux de sommets (nb_sommets est alors ignoré)
+            nb_sommets: Nombre de sommets de chaque pièce (P,), au moins 2
+            rayons_matrice: Rayon de la matrice, commun ou par pièce (P,)
+
+        Returns:
+            Un ProgrammesResolus. Les angles sont positifs, le sens du cintrage
+            étant porté par la rotation : dans le plan, un cintrage vers la
+            droite suit une rotation de 180°. Une pièce avec un demi-tour
+            (segments consécutifs opposés) n'est pas valide
+        """
+        if not isinstance(sommets, np.ndarray):
+            sommets, nb_sommets = _en_lot(sommets)
+        nb_sommets = np.asarray(nb_sommets, dtype=np.intp)
+        if np.any(nb_sommets < 2):
+            raise ValueError("Chaque pièce doit avoir au moins deux sommets")
+        sommets = _en_3d(sommets)
+        nb_pieces = len(nb_sommets)
+        coefficient = self.calculateur.coefficient_retour_elastique
+
+        # Segments : tous les couples de sommets consécutifs d'une même pièce
+        piece_sommet = np.repeat(np.arange(nb_pieces), nb_sommets)
+        dans_piece = piece_sommet[:-1] == piece_sommet[1:]
+        vecteurs = np.diff(sommets, axis=0)[dans_piece]
+        piece_segment = piece_sommet[:-1][dans_piece]
+        longueurs_segments = np.linalg.norm(vecteurs, axis=1)
+        if np.any(longueurs_segments == 0):
+            raise ValueError("Deux sommets consécutifs sont confondus")
+        directions = vecteurs / longueurs_segments[:, None]
+
+        # Cintrages : couples de segments consécutifs d'une même pièce
+        nb_segments = nb_sommets - 1
+        premiers_segments = np.cumsum(nb_segments) - nb_segments
+        meme_piece = piece_segment[:-1] == piece_segment[1:]
+        entrees, sorties = directions[:-1][meme_piece], directions[1:][meme_piece]
+        piece_cintrage = piece_segment[:-1][meme_piece]
+        cosinus = np.einsum('ij,ij->i', entrees, sorties)
+        demi_tours = cosinus < -1 + 1e-12  # Tangentes parallèles : aucun arc ne les relie
+        angles_rad = np.arccos(np.clip(cosinus, -1.0, 1.0))
+        rotations = self._rotations(np.cross(entrees, sorties), entrees, directions[premiers_segments], piece_cintrage)
+
+        # Tangentes retranchées des segments, avec le rayon effectif
+        rayons_matrice = np.broadcast_to(np.asarray(rayons_matrice, dtype=np.float64), (nb_pieces,))
+        rayons_effectifs = rayons_matrice[piece_cintrage] / coefficient
+        tangentes = rayons_effectifs * np.tan(angles_rad / 2)
+        droits = longueurs_segments.copy()
+        droits[:-1][meme_piece] -= tangentes
+        droits[1:][meme_piece] -= tangentes
+
+        # Positions : longueurs droites cumulées depuis le début de chaque pièce
+        cumul = np.cumsum(droits)
+        debut_piece = np.repeat(cumul[premiers_segments] - droits[premiers_segments], nb_segments)
+        positions = (cumul - debut_piece)[:-1][meme_piece]
+        longueurs = np.add.reduceat(droits, premiers_segments)
+
+        arcs = np.bincount(piece_cintrage, rayons_effectifs * angles_rad, minlength=nb_pieces)
+        valides = ((np.bincount(piece_segment, droits < -1e-9, minlength=nb_pieces) == 0)
+                   & (np.bincount(piece_cintrage, demi_tours, minlength=nb_pieces) == 0))
+
+        angles = np.degrees(angles_rad)
+        rayons = rayons_matrice[piece_cintrage]
+        return ProgrammesResolus(
+            np.concatenate(([0], np.cumsum(nb_sommets - 2))),
+            longueurs,
+            positions,
+            angles,
+            np.degrees(rotations),
+            rayons,
+            self.calculateur.calculer_retour_elastique(angles),
+            self.calculateur.calculer_valeur_A(rayons, angles),
+            longueurs + arcs,
+            valides,
+            demi_tours
+        )
+
+    def _rotations(self, normales, entrees, premieres_directions, piece_cintrage) -> np.ndarray:
+        """
+        Rotation de chaque plan de cintrage par rapport au précédent de la même
+        pièce, la référence du premier cintrage étant le repère initial
+        """
+        nb_cintrages = len(normales)
+        normes = np.linalg.norm(normales, axis=1)
+
+        # La normale de référence est insérée devant les cintrages de chaque pièce
+        premiers = np.flatnonzero(np.diff(piece_cintrage, prepend=-1))
+        references = _reperes_initiaux(premieres_directions)[piece_cintrage[premiers], :, 2]
+        rang = np.arange(nb_cintrages) + np.searchsorted(premiers, np.arange(nb_cintrages), side='right')
+        toutes = np.zeros((nb_cintrages + len(premiers), 3))
+        toutes_normes = np.ones(len(toutes))
+        toutes[rang], toutes_normes[rang] = normales, normes
+        places_references = premiers + np.arange(len(premiers))
+        toutes[places_references] = references
+
+        # Un cintrage nul (segments alignés) garde le plan du précédent
+        valides = toutes_normes > 1e-12
+        derniere_valide = np.maximum.accumulate(np.where(valides, np.arange(len(toutes)), 0))
+        toutes = toutes[derniere_valide] / toutes_normes[derniere_valide, None]
+
+        precedentes, courantes = toutes[rang - 1], toutes[rang]
+        sinus = np.einsum('ij,ij->i', np.cross(precedentes, courantes), entrees)
+        cosinus = np.einsum('ij,ij->i', precedentes, courantes)
+        return np.arctan2(sinus, cosinus)
+
+    def verifier_lot(self, resultat: ProgrammesResolus, sommets, nb_sommets=None) -> np.ndarray:
+        """
+        Recalcule chaque pièce valide avec le moteur direct (calculer_geometrie_3d)
+        et mesure l'écart aux sommets cible : points de tangence de chaque arc
+        et extrémité du tube, après recalage du début de la pièce
+
+        Returns:
+            Écart maximal (mm) de chaque pièce (P,), inf pour une pièce non valide
+        """
+        if not isinstance(sommets, np.ndarray):
+            sommets, nb_sommets = _en_lot(sommets)
+        nb_sommets = np.asarray(nb_sommets, dtype=np.intp)
+        sommets = _en_3d(sommets)
+        coefficient = self.calculateur.coefficient_retour_elastique
+
+        # Cible ramenée dans le repère initial du moteur
+        premiers_sommets = np.cumsum(nb_sommets) - nb_sommets
+        reperes = _reperes_initiaux(self._normaliser(sommets[premiers_sommets + 1] - sommets[premiers_sommets]))
+
+        ecarts = np.full(len(nb_sommets), np.inf)
+        for piece in np.flatnonzero(resultat.valides).tolist():
+            debut = premiers_sommets[piece]
+            cible = (sommets[debut:debut + nb_sommets[piece]] - sommets[debut]) @ reperes[piece]
+            tranche = slice(resultat.decalages[piece], resultat.decalages[piece + 1])
+            rayons = resultat.rayons[tranche] / coefficient
+            # Un segment par arc suffit : seules ses extrémités sont comparées
+            geometrie = calculer_geometrie_3d(resultat.longueurs[piece], resultat.positions[tranche],
+                                              resultat.angles[tranche], rayons, resultat.rotations[tranche], 1)
+            obtenus = geometrie.points[np.append(geometrie.indices_cintrages.T.ravel(), -1)]
+
+            # Points de tangence de part et d'autre de chaque sommet intérieur
+            tangentes = (rayons * np.tan(np.radians(resultat.angles[tranche]) / 2))[:, None]
+            interieurs = cible[1:-1]
+            attendus = np.concatenate((interieurs - self._normaliser(interieurs - cible[:-2]) * tangentes,
+                                       interieurs + self._normaliser(cible[2:] - interieurs) * tangentes,
+                                       cible[-1:]))
+            ecarts[piece] = np.linalg.norm(obtenus - attendus, axis=1).max()
+        return ecarts
+
+    @staticmethod
+    def _normaliser(vecteurs: np.ndarray) -> np.ndarray:
+        return vecteurs / np.linalg.norm(vecteurs, axis=1)[:, None]
@@ -0,0 +1,66 @@
+"""
+Tampon de points compact, partagé sans copie entre calculs, exports et rendu
+
+Les points sont stockés dans un seul tableau NumPy (N, 2) de float64
+contigu, au lieu d'une liste de tuples (un tuple et deux flottants Python
+par point). np.asarray(tampon) et memoryview() donnent accès aux mêmes
+données sans copie. L'itération et l'indexation renvoient encore des tuples
+(x, y), pour le code qui traitait les points comme une liste.
+"""
+from typing import Iterator, Tuple
+import numpy as np
+
+class TamponPoints:
+    __slots__ = ("_donnees",)
+
+    def __init__(self, points):
+        donnees = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._donnees = donnees if donnees.flags.c_contiguous else np.ascontiguousarray(donnees)
+
+    @classmethod
+    def vide(cls, nombre: int) -> "TamponPoints":
+        """Tampon de nombre points, non initialisé, à remplir par transformer()"""
+        return cls(np.empty((nombre, 2)))
+
+    @property
+    def tableau(self) -> np.ndarray:
+        """Vue NumPy (N, 2) des points, sans copie"""
+        return self._donnees
+
+    def memoryview(self) -> memoryview:
+        """Vue mémoire (format 'd', forme (N, 2)) des points, sans copie"""
+        return memoryview(self._donnees)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self._donnees.dtype:
+            return self._donnees.copy() if copy else self._donnees
+        return self._donnees.astype(dtype)
+
+    def __len__(self) -> int:
+        return len(self._donnees)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y = self._donnees[index]
+            return float(x), float(y)
+        return TamponPoints(self._donnees[index])
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self._donnees[:, 0].tolist(), self._donnees[:, 1].tolist())
+
+    def emprise(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Coins minimum et maximum (x, y) des points"""
+        return self._donnees.min(axis=0), self._donnees.max(axis=0)
+
+    def transformer(self, echelle: float, dx: float, dy: float, sortie: "TamponPoints" = None) -> "TamponPoints":
+        """
+        Points transformés p * echelle + (dx, dy), écrits dans sortie si elle est
+        donnée (de même taille, réutilisable d'un appel à l'autre), sinon dans un
+        nouveau tampon : les points de ce tampon, souvent partagés avec le cache
+        des géométries, ne sont jamais modifiés
+        """
+        if sortie is None:
+            return TamponPoints(self._donnees * echelle + (dx, dy))
+        np.multiply(self._donnees, echelle, out=sortie._donnees)
+        sortie._donnees += (dx, dy)
+        return sortie
@@ -0,0 +1,279 @@
+"""
+Enregistrement des projets et bibliothèque binaire de pièces
+
+Projet : fichier JSON lisible, même description de pièce que le mode batch
+(tube, cintrages) avec le coefficient de retour élastique.
+
+Bibliothèque : fichier binaire compact pour des dizaines de milliers de
+pièces standard, lu par projection mémoire (mmap). Aucune lecture complète
+à l'ouverture : une pièce est chargée en temps constant par son numéro ou
+par son nom (table de hachage stockée dans le fichier).
+
+Disposition du fichier (petit-boutiste, champs alignés sur 8 octets) :
+    en-tête    ENTETE (64 octets) : signature, version, nombres et positions des sections
+    index      une entrée FORMAT_PIECE par pièce : tube, coefficient, premier
+               cintrage et nombre de cintrages, position du nom
+    hachage    table à adressage ouvert (empreinte du nom, numéro de pièce + 1)
+    cintrages  une entrée FORMAT_CINTRAGE par cintrage, pièce après pièce
+    noms       noms UTF-8 concaténés
+
+Création depuis un fichier de pièces du mode batch :
+
+    python -m modules.projet pieces.jsonl bibliotheque.cbib
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from modules.calculs import ParametresCintrage, ParametresTube
+from modules.export import ecriture_atomique
+
+FORMAT_PROJET = "cintreuse-projet"
+VERSION_PROJET = 1
+
+SIGNATURE = b"CINTBIB\0"
+VERSION_BIBLIOTHEQUE = 1
+ENTETE = struct.Struct("<8sII5Q")  # signature, version, réservé, pièces, cintrages, positions hachage/cintrages/noms
+TAILLE_ENTETE = 64
+FORMAT_PIECE = np.dtype([
+    ("diametre", "<f8"), ("epaisseur", "<f8"), ("longueur", "<f8"), ("coefficient", "<f8"),
+    ("premier_cintrage", "<u8"), ("nb_cintrages", "<u4"), ("longueur_nom", "<u4"), ("position_nom", "<u8")
+])
+FORMAT_CINTRAGE = np.dtype([("position", "<f8"), ("angle", "<f8"), ("rayon", "<f8"), ("rotation", "<f8")])
+FORMAT_HACHAGE = np.dtype([("empreinte", "<u8"), ("piece", "<u8")])  # piece = numéro + 1, 0 pour une case vide
+
+@dataclass
+class Piece:
+    nom: str
+    tube: ParametresTube
+    cintrages: List[ParametresCintrage]
+    coefficient_retour_elastique: float = 0.975
+
+def _empreinte(nom: str) -> int:
+    return int.from_bytes(hashlib.blake2b(nom.encode("utf-8"), digest_size=8).digest(), "little")
+
+# --- Projets -----------------------------------------------------------------
+
+def piece_vers_dict(piece: Piece) -> dict:
+    return {
+        "id": piece.nom,
+        "tube": asdict(piece.tube),
+        "coefficient_retour_elastique": piece.coefficient_retour_elastique,
+        "cintrages": [asdict(c) for c in piece.cintrages]
+    }
+
+def dict_vers_piece(donnees: dict) -> Piece:
+    tube = donnees["tube"]
+    return Piece(
+        str(donnees.get("id", "")),
+        ParametresTube(diametre=float(tube["diametre"]), epaisseur=float(tube["epaisseur"]),
+                       longueur=float(tube["longueur"])),
+        [ParametresCintrage(angle=float(c["angle"]), rayon=float(c["rayon"]), position=float(c["position"]),
+                            rotation=float(c.get("rotation", 0.0)))
+         for c in donnees.get("cintrages", [])],
+        float(donnees.get("coefficient_retour_elastique", 0.975))
+    )
+
+def enregistrer_projet(chemin: str, piece: Piece):
+    """Enregistre un projet au format JSON"""
+    donnees = {"format": FORMAT_PROJET, "version": VERSION_PROJET, **piece_vers_dict(piece)}
+    with ecriture_atomique(chemin, 'w', encoding='utf-8') as f:
+        json.dump(donnees, f, indent=2, ensure_ascii=False)
+
+def charger_projet(chemin: str) -> Piece:
+    with open(chemin, encoding="utf-8") as f:
+        donnees = json.load(f)
+    if donnees.get("format") != FORMAT_PROJET:
+        raise ValueError("Ce fichier n'est pas un projet de cintrage")
+    if donnees.get("version", 0) > VERSION_PROJET:
+        raise ValueError(f"Version de projet non prise en charge: {donnees['version']}")
+    return dict_vers_piece(donnees)
+
+# --- Bibliothèque binaire ----------------------------------------------------
+
+def ecrire_bibliotheque(chemin: str, pieces: Iterable[Piece]) -> int:
+    """
+    Écrit une bibliothèque de pièces (les noms doivent être uniques)
+
+    Returns:
+        Le nombre de pièces écrites
+    """
+    pieces = list(pieces)
+    nb_cintrages = np.array([len(p.cintrages) for p in pieces], dtype=np.uint64)
+    noms = [p.nom.encode("utf-8") for p in pieces]
+    longueurs_noms = np.array([len(n) for n in noms], dtype=np.uint64)
+
+    index = np.zeros(len(pieces), dtype=FORMAT_PIECE)
+    index["diametre"] = [p.tube.diametre for p in pieces]
+    index["epaisseur"] = [p.tube.epaisseur for p in pieces]
+    index["longueur"] = [p.tube.longueur for p in pieces]
+    index["coefficient"] = [p.coefficient_retour_elastique for p in pieces]
+    index["premier_cintrage"] = np.cumsum(nb_cintrages) - nb_cintrages
+    index["nb_cintrages"] = nb_cintrages
+    index["longueur_nom"] = longueurs_noms
+    index["position_nom"] = np.cumsum(longueurs_noms) - longueurs_noms
+
+    cintrages = np.array([(c.position, c.angle, c.rayon, c.rotation) for p in pieces for c in p.cintrages],
+                         dtype=FORMAT_CINTRAGE)
+
+    # Table de hachage à adressage ouvert, remplie au plus à moitié
+    taille_table = 1 << max(1, (2 * len(pieces)).bit_length())
+    masque = taille_table - 1
+    empreintes = [0] * taille_table
+    numeros = [0] * taille_table
+    for numero, piece in enumerate(pieces):
+        empreinte = _empreinte(piece.nom)
+        case = empreinte & masque
+        while numeros[case]:
+            if empreintes[case] == empreinte and pieces[numeros[case] - 1].nom == piece.nom:
+                raise ValueError(f"Nom de pièce en double: {piece.nom}")
+            case = (case + 1) & masque
+        empreintes[case], numeros[case] = empreinte, numero + 1
+    table = np.zeros(taille_table, dtype=FORMAT_HACHAGE)
+    table["empreinte"] = empreintes
+    table["piece"] = numeros
+
+    position_index = TAILLE_ENTETE
+    position_hachage = position_index + index.nbytes
+    position_cintrages = position_hachage + table.nbytes
+    position_noms = position_cintrages + cintrages.nbytes
+
+    with ecriture_atomique(chemin, 'wb') as f:
+        entete = ENTETE.pack(SIGNATURE, VERSION_BIBLIOTHEQUE, 0, len(pieces), len(cintrages),
+                             position_hachage, position_cintrages, position_noms)
+        f.write(entete.ljust(TAILLE_ENTETE, b"\0"))
+        f.write(index.tobytes())
+        f.write(table.tobytes())
+        f.write(cintrages.tobytes())
+        f.write(b"".join(noms))
+    return len(pieces)
+
+class BibliothequePieces:
+    """
+    Lecture d'une bibliothèque par projection mémoire
+
+    L'ouverture ne lit que l'en-tête ; l'index, la table de hachage et les
+    cintrages sont des vues NumPy sur le fichier projeté, lues à la demande.
+    """
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self._fichier = open(chemin, "rb")
+        try:
+            self._memoire = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fichier.close()
+            raise ValueError("Bibliothèque vide ou invalide")
+        if len(self._memoire) < TAILLE_ENTETE:
+            self.fermer()
+            raise ValueError("Bibliothèque vide ou invalide")
+        (signature, version, _, nb_pieces, nb_cintrages,
+         position_hachage, position_cintrages, position_noms) = ENTETE.unpack_from(self._memoire)
+        if signature != SIGNATURE:
+            self.fermer()
+            raise ValueError("Ce fichier n'est pas une bibliothèque de pièces")
+        if version > VERSION_BIBLIOTHEQUE:
+            self.fermer()
+            raise ValueError(f"Version de bibliothèque non prise en charge: {version}")
+
+        self._index = np.frombuffer(self._memoire, FORMAT_PIECE, nb_pieces, TAILLE_ENTETE)
+        self._table = np.frombuffer(self._memoire, FORMAT_HACHAGE,
+                                    (position_cintrages - position_hachage) // FORMAT_HACHAGE.itemsize,
+                                    position_hachage)
+        self._cintrages = np.frombuffer(self._memoire, FORMAT_CINTRAGE, nb_cintrages, position_cintrages)
+        self._position_noms = position_noms
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def __contains__(self, nom: str) -> bool:
+        return self.trouver(nom) is not None
+
+    def nom(self, numero: int) -> str:
+        entree = self._index[numero]
+        debut = self._position_noms + int(entree["position_nom"])
+        return self._memoire[debut:debut + int(entree["longueur_nom"])].decode("utf-8")
+
+    def trouver(self, nom: str) -> Optional[int]:
+        """Numéro de la pièce de ce nom, None si elle n'existe pas"""
+        empreinte = _empreinte(nom)
+        masque = len(self._table) - 1
+        case = empreinte & masque
+        while True:
+            piece = int(self._table["piece"][case])
+            if piece == 0:
+                return None
+            if int(self._table["empreinte"][case]) == empreinte and self.nom(piece - 1) == nom:
+                return piece - 1
+            case = (case + 1) & masque
+
+    def cintrages_bruts(self, numero: int) -> np.ndarray:
+        """
+        Cintrages de la pièce, FORMAT_CINTRAGE. Copie des quelques enregistrements
+        de la pièce : une vue sur la projection empêcherait sa fermeture
+        """
+        entree = self._index[numero]
+        debut = int(entree["premier_cintrage"])
+        return self._cintrages[debut:debut + int(entree["nb_cintrages"])].copy()
+
+    def charger(self, cle) -> Piece:
+        """Charge une pièce par son numéro ou par son nom"""
+        if isinstance(cle, str):
+            numero = self.trouver(cle)
+            if numero is None:
+                raise KeyError(cle)
+        else:
+            numero = int(cle)
+            if not 0 <= numero < len(self):
+                raise IndexError(numero)
+        entree = self._index[numero]
+        return Piece(
+            self.nom(numero),
+            ParametresTube(diametre=float(entree["diametre"]), epaisseur=float(entree["epaisseur"]),
+                           longueur=float(entree["longueur"])),
+            [ParametresCintrage(angle=a, rayon=r, position=p, rotation=rot)
+             for p, a, r, rot in self.cintrages_bruts(numero).tolist()],
+            float(entree["coefficient"])
+        )
+
+    def fermer(self):
+        # Les vues NumPy doivent disparaître avant la fermeture de la projection ;
+        # le fichier est fermé dans tous les cas
+        self._index = self._table = self._cintrages = None
+        try:
+            if self._memoire is not None:
+                memoire, self._memoire = self._memoire, None
+                memoire.close()
+        finally:
+            self._fichier.close()
+
+def main(argv=None):
+    from modules.batch import lire_pieces, piece_lue
+
+    parser = argparse.ArgumentParser(description="Création d'une bibliothèque binaire de pièces")
+    parser.add_argument("entree", help="Fichier de pièces du mode batch (.jsonl ou .csv)")
+    parser.add_argument("sortie", help="Bibliothèque à créer")
+    parser.add_argument("--coefficient", type=float, default=0.975,
+                        help="Coefficient de retour élastique des pièces qui n'en précisent pas")
+    args = parser.parse_args(argv)
+
+    nombre = ecrire_bibliotheque(args.sortie, (piece_lue(piece, args.coefficient)
+                                               for piece in lire_pieces(args.entree)))
+    print(f"{nombre} pièces écrites dans {args.sortie}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Rendu du tube sur le canvas Tk en réutilisant les éléments existants
+
+Chaque couche du tube (ombre, contour, brillance) est un élément ligne
+multi-points par morceau visible (voir modules.vue). Les redessins déplacent
+les éléments avec canvas.coords() au lieu de tout supprimer et recréer : le
+coût d'un redessin est proportionnel au nombre de morceaux, pas au nombre de
+segments. Les éléments en trop sont masqués et gardés pour un prochain
+dessin. Les coordonnées ne sont converties qu'une fois pour toutes les
+couches, décalées ensuite par canvas.move(). La grille réutilise de même
+ses lignes.
+"""
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from modules import instrumentation
+
+# Couches du tube avec effet 3D : (nom, décalage, épaisseur, couleur)
+COUCHES_TUBE = (
+    ("ombre", 4, 10, "#90CAF9"),       # Ombre portée, bleu plus prononcé
+    ("contour", 0, 10, "#0D47A1"),     # Bleu plus foncé pour plus de contraste
+    ("brillance", -1, 6, "#42A5F5"),   # Effet de brillance, bleu brillant plus vif
+)
+
+# Marqueurs de cintrage avec effet métallique : (rayon, remplissage, contour, épaisseur)
+COUCHES_MARQUEUR = (
+    (7, "#F57C00", "#E65100", 2),  # Ombre du point, orange plus foncé
+    (5, "#FFB74D", "", 1),         # Effet de brillance, orange plus chaud
+    (2, "#FFFFFF", "", 1),         # Point central blanc
+)
+
+# Mise en évidence du cintrage en aperçu : (couleur, épaisseur)
+COULEUR_SURBRILLANCE = ("#FF5722", 6)
+
+class RenduTube:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._couches: Dict[str, List[int]] = {nom: [] for nom, _, _, _ in COUCHES_TUBE}
+        self._grille: List[int] = []
+        self._surbrillance: List[int] = []
+        self._marqueurs: List[Tuple[int, ...]] = []
+        self._textes: Dict[str, int] = {}
+
+    def dessiner_grille(self, largeur: int = 800, hauteur: int = 600, pas: float = 50,
+                        origine: Tuple[float, float] = (0, 0)):
+        """
+        Grille de fond sous le tag "grille" : une ligne tous les pas pixels à
+        partir de origine, sur toute la zone largeur x hauteur
+        """
+        x0, y0 = origine
+        lignes = [(x, 0, x, hauteur) for x in np.arange(x0 % pas, largeur + 1, pas).tolist()]
+        lignes += [(0, y, largeur, y) for y in np.arange(y0 % pas, hauteur + 1, pas).tolist()]
+        while len(self._grille) < len(lignes):
+            self._grille.append(self.canvas.create_line(0, 0, 0, 0, fill='#d0d0d0', tags="grille"))
+            instrumentation.compter("rendu.elements_crees")
+        for item, ligne in zip(self._grille, lignes):
+            self.canvas.coords(item, *ligne)
+            self.canvas.itemconfigure(item, state="normal")
+        for item in self._grille[len(lignes):]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self.canvas.tag_lower("grille")
+
+    def dessiner_tube(self, morceaux):
+        """
+        Met à jour les couches du tube à partir des points (N, 2) en coordonnées
+        canvas (TamponPoints ou tableau NumPy, lu sans copie), ou d'une liste de
+        morceaux (N, 2) dessinés séparément
+        """
+        coords = _coordonnees(morceaux)
+        cree = False
+        for nom, decalage, epaisseur, couleur in COUCHES_TUBE:
+            cree |= self._lignes(self._couches[nom], coords, decalage, width=epaisseur, fill=couleur,
+                                 capstyle="round", joinstyle="round", tags=("tube", "tube_" + nom))
+        if cree:
+            # Les éléments ajoutés passent sous les couches suivantes
+            for nom, _, _, _ in COUCHES_TUBE:
+                self.canvas.tag_raise("tube_" + nom)
+            self._ordonner()
+
+    def dessiner_surbrillance(self, morceaux, libelle: str = ""):
+        """
+        Met en évidence une partie du tube (cintrage en aperçu), avec libelle
+        au début du premier morceau ; une liste vide efface la mise en évidence
+        """
+        coords = _coordonnees(morceaux)
+        if self._lignes(self._surbrillance, coords, 0, width=COULEUR_SURBRILLANCE[1],
+                        fill=COULEUR_SURBRILLANCE[0], capstyle="round", tags="surbrillance"):
+            self._ordonner()
+        if coords and libelle:
+            x, y = coords[0][:2]
+            self.texte("surbrillance", x + 12, y - 12, text=libelle, anchor="sw",
+                       font=("Arial", 9, "bold"), fill=COULEUR_SURBRILLANCE[0])
+        elif "surbrillance" in self._textes:
+            self.canvas.itemconfigure(self._textes["surbrillance"], state="hidden")
+
+    def _lignes(self, items: List[int], coords: List[List[float]], decalage: float, **options) -> bool:
+        """
+        Une ligne par liste de coordonnées, en réutilisant les éléments de items
+        (complétée au besoin) ; les éléments en trop sont masqués. Vrai si des
+        éléments ont été créés.
+        """
+        cree = False
+        for i, points in enumerate(coords):
+            if i == len(items):
+                items.append(self.canvas.create_line(*points, **options))
+                instrumentation.compter("rendu.elements_crees")
+                cree = True
+            else:
+                self.canvas.coords(items[i], points)
+                self.canvas.itemconfigure(items[i], state="normal")
+            if decalage:
+                self.canvas.move(items[i], decalage, decalage)
+        for item in items[len(coords):]:
+            self.canvas.itemconfigure(item, state="hidden")
+        return cree
+
+    def _ordonner(self):
+        # Ordre d'empilement : tube, mise en évidence, marqueurs, textes
+        for tag in ("surbrillance", "marqueur", "texte"):
+            self.canvas.tag_raise(tag)
+
+    def dessiner_marqueurs(self, positions: Sequence[Tuple[float, float]]):
+        """
+        Place un marqueur sur chaque point de cintrage, en réutilisant les marqueurs existants
+        """
+        while len(self._marqueurs) < len(positions):
+            self._marqueurs.append(tuple(
+                self.canvas.create_oval(0, 0, 0, 0, fill=remplissage, outline=contour,
+                                        width=epaisseur, tags="marqueur")
+                for _, remplissage, contour, epaisseur in COUCHES_MARQUEUR))
+            instrumentation.compter("rendu.elements_crees", len(COUCHES_MARQUEUR))
+
+        for i, items in enumerate(self._marqueurs):
+            if i < len(positions):
+                x, y = positions[i]
+                for item, (rayon, _, _, _) in zip(items, COUCHES_MARQUEUR):
+                    self.canvas.coords(item, x - rayon, y - rayon, x + rayon, y + rayon)
+                    self.canvas.itemconfigure(item, state="normal")
+            else:
+                for item in items:
+                    self.canvas.itemconfigure(item, state="hidden")
+        self.canvas.tag_raise("marqueur")
+
+    def texte(self, nom: str, x: float, y: float, **options):
+        """
+        Affiche ou déplace le texte identifié par nom
+        """
+        item = self._textes.get(nom)
+        if item is None:
+            self._textes[nom] = self.canvas.create_text(x, y, tags="texte", **options)
+            instrumentation.compter("rendu.elements_crees")
+        else:
+            self.canvas.coords(item, x, y)
+            self.canvas.itemconfigure(item, state="normal", **options)
+
+    def effacer(self):
+        """
+        Masque le tube, les marqueurs et les textes sans supprimer les éléments
+        """
+        for tag in ("tube", "surbrillance", "marqueur", "texte"):
+            self.canvas.itemconfigure(tag, state="hidden")
+
+def _coordonnees(morceaux) -> List[List[float]]:
+    """Coordonnées à plat de chaque morceau d'au moins deux points (un seul tableau accepté)"""
+    if not isinstance(morceaux, list):
+        morceaux = [morceaux]
+    return [np.asarray(morceau, dtype=np.float64).ravel().tolist() for morceau in morceaux if len(morceau) >= 2]
@@ -0,0 +1,221 @@
+"""
+Vue du canvas : zoom, déplacement, niveaux de détail et élimination hors champ
+
+Vue garde la transformation monde (mm) -> canvas (pixels) :
+    canvas = monde * echelle + (dx, dy)
+
+NiveauxDetail simplifie une polyligne à la résolution de l'écran. Pour un
+niveau k, les points sont regroupés par cellules carrées de côté
+cote_base * 2**k :
+    - d'une suite de points consécutifs dans la même cellule, seuls le
+      premier et le dernier sont gardés (écart au tracé inférieur à la
+      diagonale d'une cellule) ;
+    - un segment qui relie deux cellules déjà reliées par un segment
+      précédent, ou deux cellules voisines déjà atteintes, n'est pas
+      redessiné (tube qui repasse sur lui-même), sauf s'il est le seul à
+      toucher un point gardé (début et fin des arcs).
+Chaque niveau est calculé à la première demande puis gardé en cache sous
+forme compacte : zoomer ne fait que choisir un niveau. Seuls les morceaux
+qui touchent la zone visible sont ensuite envoyés au canvas.
+
+Aucune dépendance à tkinter : le calcul d'une image se teste et se mesure
+sans affichage.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+TOLERANCE_PIXEL = 0.5   # Côté d'une cellule de simplification, en pixels
+MARGE_PIXEL = 20        # Marge autour de la zone visible (épaisseur du tube, ombre)
+NIVEAUX_MAX = 40
+INTERRUPTION_MAX = 16   # Segments omis redessinés quand ils interrompent le tracé sur moins que cela
+ZOOM_MIN = 0.25         # Échelles extrêmes, relatives à l'échelle ajustée à la pièce
+ZOOM_MAX = 1e4
+PAS_GRILLE_MIN = 50     # Écart minimal, en pixels, entre deux lignes de la grille
+
+class Vue:
+    def __init__(self, echelle: float = 1.0, dx: float = 0.0, dy: float = 0.0):
+        self.echelle = echelle
+        self.dx = dx
+        self.dy = dy
+        self.echelle_ajustee = echelle
+
+    def ajuster(self, minimum, maximum, largeur: float, hauteur: float, remplissage: float = 0.9):
+        """Centre l'emprise (minimum, maximum) en occupant remplissage de la zone largeur x hauteur"""
+        (x_min, y_min), (x_max, y_max) = minimum, maximum
+        largeur_dessin = x_max - x_min
+        hauteur_dessin = y_max - y_min
+        echelle_x = (largeur * remplissage) / largeur_dessin if largeur_dessin > 0 else 1
+        echelle_y = (hauteur * remplissage) / hauteur_dessin if hauteur_dessin > 0 else 1
+        self.echelle = self.echelle_ajustee = min(echelle_x, echelle_y)
+        self.dx = (largeur - largeur_dessin * self.echelle) / 2 - x_min * self.echelle
+        self.dy = (hauteur - hauteur_dessin * self.echelle) / 2 - y_min * self.echelle
+
+    def zoomer(self, facteur: float, x: float, y: float):
+        """Zoom de facteur autour du point (x, y) du canvas, qui reste fixe"""
+        echelle = min(max(self.echelle * facteur, self.echelle_ajustee * ZOOM_MIN),
+                      self.echelle_ajustee * ZOOM_MAX)
+        facteur = echelle / self.echelle
+        self.dx = x - (x - self.dx) * facteur
+        self.dy = y - (y - self.dy) * facteur
+        self.echelle = echelle
+
+    def deplacer(self, dx: float, dy: float):
+        """Déplacement de (dx, dy) pixels"""
+        self.dx += dx
+        self.dy += dy
+
+    def vers_canvas(self, points) -> np.ndarray:
+        return np.asarray(points, dtype=np.float64) * self.echelle + (self.dx, self.dy)
+
+    def vers_monde(self, x: float, y: float) -> Tuple[float, float]:
+        return (x - self.dx) / self.echelle, (y - self.dy) / self.echelle
+
+    def pas_grille(self, pas_min: float = PAS_GRILLE_MIN) -> float:
+        """Pas de la grille en mm : 1, 2 ou 5 x 10^k, le plus petit qui fasse au moins pas_min pixels"""
+        brut = pas_min / self.echelle
+        puissance = 10.0 ** math.floor(math.log10(brut))
+        return next(m * puissance for m in (1, 2, 5, 10) if m * puissance >= brut * (1 - 1e-9))
+
+    def emprise_visible(self, largeur: float, hauteur: float,
+                        marge: float = MARGE_PIXEL) -> Tuple[np.ndarray, np.ndarray]:
+        """Coins minimum et maximum, en coordonnées monde, de la zone visible élargie de marge pixels"""
+        minimum = np.array(self.vers_monde(-marge, -marge))
+        maximum = np.array(self.vers_monde(largeur + marge, hauteur + marge))
+        return minimum, maximum
+
+    def reperes_visibles(self, points, largeur: float, hauteur: float,
+                         marge: float = MARGE_PIXEL) -> np.ndarray:
+        """Points (N, 2) de la zone visible en coordonnées canvas, un seul par pixel"""
+        canvas = self.vers_canvas(points).reshape(-1, 2)
+        visibles = ((canvas >= -marge) & (canvas <= (largeur + marge, hauteur + marge))).all(axis=1)
+        _, premiers = np.unique(np.round(canvas[visibles]), axis=0, return_index=True)
+        return canvas[visibles][np.sort(premiers)]
+
+class NiveauxDetail:
+    def __init__(self, points, gardes: Optional[Sequence[int]] = None):
+        """
+        Args:
+            points: Points (N, 2) de la polyligne, en coordonnées monde
+            gardes: Indices toujours conservés (début et fin des arcs par exemple)
+        """
+        self.definir_points(points, gardes)
+
+    def definir_points(self, points, gardes: Optional[Sequence[int]] = None):
+        """Remplace la polyligne (voir __init__) ; les niveaux déjà calculés sont oubliés"""
+        self.points = np.ascontiguousarray(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        n = len(self.points)
+        self.minimum = self.points.min(axis=0) if n else np.zeros(2)
+        self.maximum = self.points.max(axis=0) if n else np.zeros(2)
+        etendue = float(max(self.maximum - self.minimum)) if n else 0.0
+        # Niveau 0 : cellules assez petites pour ne rien simplifier à toute échelle utile
+        self.cote_base = (etendue or 1.0) * 2.0 ** -30
+        gardes = np.zeros(0, dtype=np.intp) if gardes is None else np.asarray(gardes, dtype=np.intp).ravel()
+        self._gardes = np.unique(np.concatenate((gardes, [0, max(n - 1, 0)])))[:n]
+        self._niveaux: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def niveau(self, echelle: float) -> int:
+        """Niveau le plus simplifié dont les cellules restent sous TOLERANCE_PIXEL à cette échelle"""
+        tolerance = TOLERANCE_PIXEL / echelle
+        return min(max(int(math.floor(math.log2(tolerance / self.cote_base))), 0), NIVEAUX_MAX)
+
+    def points_niveau(self, echelle: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Points gardés pour un dessin à cette échelle (pixels par mm), et pour
+        chaque segment entre deux points consécutifs, s'il doit être dessiné
+        """
+        k = self.niveau(echelle)
+        niveau = self._niveaux.get(k)
+        if niveau is None:
+            niveau = self._niveaux[k] = self._simplifier(self.cote_base * 2.0 ** k)
+        return niveau
+
+    def _simplifier(self, cote: float) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(self.points)
+        if n <= 2:
+            return self.points, np.ones(max(n - 1, 0), dtype=bool)
+        cellules = np.floor((self.points - self.minimum) / cote).astype(np.int64)
+        change = (cellules[1:] != cellules[:-1]).any(axis=1)
+        # Premier et dernier point de chaque suite de points dans la même cellule
+        garde = np.zeros(n, dtype=bool)
+        garde[1:] |= change
+        garde[:-1] |= change
+        garde[self._gardes] = True
+        indices = garde.nonzero()[0]
+
+        # Segments déjà dessinés : mêmes cellules d'extrémité, dans un sens ou dans
+        # l'autre, ou segment court qui arrive dans une cellule déjà atteinte
+        # (l'encre y est déjà, à moins d'une cellule près)
+        gardees = cellules[indices]
+        # Numéro de cellule : x et y tiennent sur 31 bits (au plus 2**30 cellules d'étendue)
+        _, premieres_visites, numeros = np.unique(gardees[:, 0] << 31 | gardees[:, 1],
+                                                  return_index=True, return_inverse=True)
+        numeros = numeros.ravel()
+        a, b = numeros[:-1], numeros[1:]
+        _, premiers = np.unique(np.minimum(a, b) * len(premieres_visites) + np.maximum(a, b),
+                                return_index=True)
+        uniques = np.zeros(len(a), dtype=bool)
+        uniques[premiers] = True
+        deja_atteinte = premieres_visites[b] < np.arange(1, len(indices))
+        voisines = np.abs(gardees[1:] - gardees[:-1]).max(axis=1) <= 1
+        uniques &= ~(deja_atteinte & voisines)
+        # Les courtes interruptions sont redessinées : moins de morceaux, donc
+        # moins d'objets sur le canvas, pour un peu de tracé en double
+        omis = np.diff(np.concatenate(([0], (~uniques).astype(np.int8), [0])))
+        debuts, fins = (omis == 1).nonzero()[0], (omis == -1).nonzero()[0]
+        courts = (fins - debuts <= INTERRUPTION_MAX) & (debuts > 0) & (fins < len(uniques))
+        if courts.any():
+            repris = np.zeros(len(uniques) + 1, dtype=np.int8)
+            repris[debuts[courts]] = 1
+            repris[fins[courts]] = -1
+            uniques |= np.cumsum(repris[:-1]) > 0
+        # Les points gardés restent dans le tracé : au moins un segment dessiné les touche
+        rangs = np.searchsorted(indices, self._gardes)
+        touches = np.zeros(len(indices), dtype=bool)
+        touches[:-1] |= uniques
+        touches[1:] |= uniques
+        isoles = rangs[~touches[rangs]]
+        uniques[np.minimum(isoles, len(uniques) - 1)] = True
+        if uniques.all():
+            return self.points[indices], uniques
+
+        # Forme compacte : les suites de segments uniques, mises bout à bout
+        selection, continus = _suites(uniques)
+        return self.points[indices[selection]], continus
+
+    def morceaux_visibles(self, vue: Vue, largeur: float, hauteur: float,
+                          marge: float = MARGE_PIXEL) -> List[np.ndarray]:
+        """
+        Morceaux de la polyligne simplifiée qui touchent la zone visible, en
+        coordonnées canvas : une suite de segments consécutifs visibles par morceau
+        """
+        points, continus = self.points_niveau(vue.echelle)
+        if len(points) < 2:
+            return []
+        minimum, maximum = vue.emprise_visible(largeur, hauteur, marge)
+        debuts, fins = points[:-1], points[1:]
+        visibles = (continus
+                    & (np.maximum(debuts, fins) >= minimum).all(axis=1)
+                    & (np.minimum(debuts, fins) <= maximum).all(axis=1))
+        if visibles.all():
+            return [vue.vers_canvas(points)]
+        if not visibles.any():
+            return []
+        # Une seule conversion pour tous les morceaux, découpée ensuite
+        selection, continus = _suites(visibles)
+        return np.split(vue.vers_canvas(points[selection]), (~continus).nonzero()[0] + 1)
+
+def _suites(segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points des suites de segments consécutifs retenus (masque par segment),
+    mises bout à bout, et pour chaque segment du résultat s'il appartient à une suite
+    """
+    bords = np.diff(np.concatenate(([False], segments, [False])).astype(np.int8))
+    premiers = (bords == 1).nonzero()[0]
+    derniers = (bords == -1).nonzero()[0]
+    tailles = derniers - premiers + 1
+    fins_blocs = np.cumsum(tailles)
+    selection = np.arange(fins_blocs[-1]) - np.repeat(fins_blocs - tailles - premiers, tailles)
+    continus = np.ones(len(selection) - 1, dtype=bool)
+    continus[fins_blocs[:-1] - 1] = False
+    return selection, continus
@@ -0,0 +1,88 @@
+"""Aperçu en direct : nature du recalcul et géométrie, comparée au calcul complet"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from modules.apercu import AUCUN, CINTRAGE, COMPLET, LONGUEUR, Apercu
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+
+REGLAGES = ("coefficient_retour_elastique", "nb_points", "tolerance_corde", "pas_angulaire_max")
+
+@pytest.fixture
+def apercu():
+    return Apercu(CalculateurCintrage())
+
+def _verifier(apercu, params_tube, cintrages, recalcul, index=None):
+    resultat = apercu.mettre_a_jour(params_tube, cintrages, index)
+    assert resultat.recalcul == recalcul
+    # Calculateur neuf, mêmes réglages : aucune géométrie reprise d'un cache
+    calculateur = CalculateurCintrage()
+    for nom in REGLAGES:
+        setattr(calculateur, nom, getattr(apercu.calculateur, nom))
+    tries = sorted(cintrages, key=lambda c: c.position)
+    assert resultat.cintrages == tries
+    complete = calculateur.calculer_geometrie(params_tube, tries)
+    np.testing.assert_allclose(resultat.geometrie.points, complete.points, rtol=0, atol=1e-8)
+    np.testing.assert_array_equal(resultat.geometrie.indices_cintrages, complete.indices_cintrages)
+    return resultat
+
+def test_modifications(apercu):
+    tube = ParametresTube(20, 1.5, 1500)
+    cintrages = [ParametresCintrage(90, 50, 300), ParametresCintrage(-45, 60, 700), ParametresCintrage(30, 40, 1100)]
+    _verifier(apercu, tube, cintrages, COMPLET)
+    _verifier(apercu, tube, list(cintrages), AUCUN)
+
+    tube = replace(tube, longueur=1800)
+    _verifier(apercu, tube, cintrages, LONGUEUR)
+
+    cintrages[1] = replace(cintrages[1], angle=-60)
+    _verifier(apercu, tube, cintrages, CINTRAGE)
+    cintrages[0] = replace(cintrages[0], position=350)
+    _verifier(apercu, tube, cintrages, CINTRAGE)
+    # Déplacement qui change l'ordre des cintrages : plusieurs lignes du programme trié changent
+    cintrages[0] = replace(cintrages[0], position=900)
+    _verifier(apercu, tube, cintrages, COMPLET)
+    # Un cintrage et la longueur : le recalcul du cintrage l'emporte
+    cintrages[2] = replace(cintrages[2], rayon=45)
+    _verifier(apercu, replace(tube, longueur=1700), cintrages, CINTRAGE)
+
+    cintrages[0] = replace(cintrages[0], angle=80)
+    cintrages[2] = replace(cintrages[2], angle=20)
+    _verifier(apercu, tube, cintrages, COMPLET)
+    cintrages.append(ParametresCintrage(15, 50, 1400))
+    _verifier(apercu, tube, cintrages, COMPLET)
+    del cintrages[1]
+    _verifier(apercu, tube, cintrages, COMPLET)
+
+@pytest.mark.parametrize("reglage, valeur", [("coefficient_retour_elastique", 0.95), ("nb_points", 12),
+                                             ("tolerance_corde", 0.05), ("pas_angulaire_max", 3.0)])
+def test_reglages_modifies(apercu, reglage, valeur):
+    tube = ParametresTube(20, 1.5, 1000)
+    cintrages = [ParametresCintrage(90, 50, 300), ParametresCintrage(45, 50, 600)]
+    _verifier(apercu, tube, cintrages, COMPLET)
+    setattr(apercu.calculateur, reglage, valeur)
+    _verifier(apercu, tube, cintrages, COMPLET)
+    _verifier(apercu, tube, cintrages, AUCUN)
+
+def test_rotation_modifiee(apercu):
+    tube = ParametresTube(20, 1.5, 1000)
+    cintrages = [ParametresCintrage(90, 50, 300), ParametresCintrage(45, 50, 600)]
+    _verifier(apercu, tube, cintrages, COMPLET)
+    cintrages[1] = replace(cintrages[1], rotation=90)
+    _verifier(apercu, tube, cintrages, COMPLET)
+    cintrages[1] = replace(cintrages[1], rotation=0)
+    _verifier(apercu, tube, cintrages, COMPLET)
+    _verifier(apercu, tube, cintrages, AUCUN)
+
+def test_index_apres_tri(apercu):
+    cintrages = [ParametresCintrage(90, 50, 600), ParametresCintrage(45, 50, 200)]
+    resultat = _verifier(apercu, ParametresTube(20, 1.5, 1000), cintrages, COMPLET, index=0)
+    assert resultat.index == 1
+
+def test_vider(apercu):
+    tube = ParametresTube(20, 1.5, 1000)
+    cintrages = [ParametresCintrage(90, 50, 300)]
+    _verifier(apercu, tube, cintrages, COMPLET)
+    apercu.vider()
+    _verifier(apercu, tube, cintrages, COMPLET)
@@ -0,0 +1,71 @@
+"""Balayage de paramètres, comparé au calcul combinaison par combinaison"""
+import math
+
+import numpy as np
+import pytest
+
+from modules.balayage import GRANDEURS, balayer, main
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+
+ANGLES = [1.0, 30.0, 90.0, 135.0, 179.0]
+RAYONS = [5.0, 42.5, 200.0]
+COEFFICIENTS = [0.95, 0.975, 1.0]
+
+def test_grille_point_par_point():
+    balayage = balayer(ANGLES, RAYONS, COEFFICIENTS, longueur=1000.0)
+    assert balayage.forme == (len(ANGLES), len(RAYONS), len(COEFFICIENTS)) and len(balayage) == 45
+    calculateur = CalculateurCintrage()
+    tube = ParametresTube(20, 1.5, 1000.0)
+    for i, angle in enumerate(ANGLES):
+        for j, rayon in enumerate(RAYONS):
+            for k, coefficient in enumerate(COEFFICIENTS):
+                calculateur.coefficient_retour_elastique = coefficient
+                assert balayage.angle_reel[i, j, k] == pytest.approx(calculateur.calculer_retour_elastique(angle))
+                assert balayage.rayon_effectif[i, j, k] == pytest.approx(rayon / coefficient)
+                assert balayage.valeur_A[i, j, k] == pytest.approx(calculateur.calculer_valeur_A(rayon, angle))
+                attendue = calculateur.calculer_longueur_developpee(tube, ParametresCintrage(angle, rayon, 500.0))
+                assert balayage.longueur_developpee[i, j, k] == pytest.approx(attendue)
+
+def test_valeur_A_indefinie_a_partir_de_180():
+    balayage = balayer([90.0, 180.0, 200.0, -180.0], [50.0])
+    assert np.isfinite(balayage.valeur_A[0]).all()
+    assert np.isnan(balayage.valeur_A[1:]).all()
+
+def test_lecture_seule():
+    angles = np.array([30.0, 90.0])
+    balayage = balayer(angles, [50.0, 60.0], [0.95, 1.0])
+    for nom in ("angles", "rayons", "coefficients", *GRANDEURS):
+        with pytest.raises(ValueError):
+            getattr(balayage, nom)[...] = 0.0
+    # Les tableaux reçus restent modifiables
+    angles[0] = 45.0
+    assert balayage.angles[0] == 30.0
+
+def test_carte_coefficient_le_plus_proche():
+    balayage = balayer(ANGLES, RAYONS, COEFFICIENTS)
+    carte = balayage.carte("angle_reel")
+    assert carte.coefficient == 0.95
+    carte = balayage.carte("angle_reel", 0.98)
+    assert carte.coefficient == 0.975
+    np.testing.assert_array_equal(carte.valeurs, balayage.angle_reel[:, :, 1])
+    assert balayage.carte("rayon_effectif", 2.0).coefficient == 1.0
+    with pytest.raises(ValueError):
+        balayage.carte("inconnue")
+
+def test_coefficients_invalides():
+    with pytest.raises(ValueError):
+        balayer(ANGLES, RAYONS, [0.975, 0.0])
+
+def test_million_de_combinaisons():
+    balayage = balayer(np.linspace(1, 179, 100), np.linspace(5, 500, 100), np.linspace(0.9, 1.0, 100))
+    assert len(balayage) == 1_000_000
+    # Vues diffusées : aucune grandeur n'occupe un million de valeurs en mémoire
+    assert all(getattr(balayage, nom).base.size < len(balayage) for nom in GRANDEURS)
+    assert math.isclose(balayage.valeur_A[99, 99, 0], balayage.valeur_A[99, 99, 99])
+
+def test_carte_csv(tmp_path):
+    sortie = tmp_path / "carte.csv"
+    assert main(["--angles", "10:30:10", "--rayons", "20,40", "--sortie", str(sortie)]) == 0
+    lignes = sortie.read_text(encoding="utf-8").splitlines()
+    assert len(lignes) == 4 and lignes[0].endswith(",20,40")
+    assert lignes[1].startswith("10,")
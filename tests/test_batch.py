@@ -0,0 +1,52 @@
+"""Mode batch"""
+import json
+
+from modules.batch import executer_batch, exporter_pieces, piece_lue
+
+def _piece(identifiant, longueur):
+    return {"id": identifiant, "tube": {"diametre": 20, "epaisseur": 1.5, "longueur": longueur},
+            "cintrages": [{"position": 200, "angle": 90, "rayon": 50}]}
+
+def test_identifiants_en_double(tmp_path):
+    entree = tmp_path / "pieces.jsonl"
+    pieces = [_piece("P1", 1000), _piece("P2", 800), _piece("P1", 1200), _piece("P1", 900)]
+    entree.write_text("".join(json.dumps(p) + "\n" for p in pieces), encoding="utf-8")
+    manifeste = tmp_path / "manifeste.jsonl"
+    dossier = tmp_path / "plans"
+
+    with open(tmp_path / "journal.txt", "w", encoding="utf-8") as journal:
+        resume = executer_batch(str(entree), str(manifeste), str(dossier), ["svg"], workers=2, sortie_log=journal)
+    resultats = [json.loads(ligne) for ligne in manifeste.read_text(encoding="utf-8").splitlines()]
+    assert resume["pieces"] == 4 and resume["erreurs"] == 2
+    doublons = sorted(r["ligne"] for r in resultats if r["statut"] == "erreur")
+    assert doublons == [3, 4]
+    assert all("déjà présent" in r["erreur"] for r in resultats if r["statut"] == "erreur")
+    # Le fichier de P1 est celui de la première pièce de cet identifiant
+    p1 = next(r for r in resultats if r["id"] == "P1" and r["statut"] == "ok")
+    assert 1000 < p1["longueur_developpee"] < 1100
+    assert sorted(f.name for f in dossier.iterdir()) == ["P1.svg", "P2.svg"]
+
+def test_exporter_pieces(tmp_path):
+    pieces = [piece_lue({"ligne": i + 1, **_piece(f"P{i}", 1000 + i)}) for i in range(3)]
+    dossier = str(tmp_path / "plans")
+    taches = [(piece, ["dxf", "svg"], dossier) for piece in pieces]
+    # Même identifiant, même dossier (autre écriture du chemin) : refusé
+    taches.append((pieces[0], ["svg"], str(tmp_path / "plans" / ".."/ "plans"), {"ligne": 9}))
+    resultats = {(r["id"], r.get("ligne")): r for r in exporter_pieces(taches, workers=2)}
+    assert len(resultats) == 4
+    assert resultats[("P0", 9)]["statut"] == "erreur"
+    for i in range(3):
+        assert resultats[(f"P{i}", None)]["statut"] == "ok"
+        assert len(resultats[(f"P{i}", None)]["fichiers"]) == 2
+
+def test_ligne_invalide(tmp_path):
+    entree = tmp_path / "pieces.jsonl"
+    entree.write_text(json.dumps(_piece("P1", 1000)) + "\n{invalide\n", encoding="utf-8")
+    manifeste = tmp_path / "manifeste.jsonl"
+    with open(tmp_path / "journal.txt", "w", encoding="utf-8") as journal:
+        resume = executer_batch(str(entree), str(manifeste), str(tmp_path / "plans"), ["svg"], workers=1,
+                                sortie_log=journal)
+    resultats = [json.loads(ligne) for ligne in manifeste.read_text(encoding="utf-8").splitlines()]
+    assert resume["erreurs"] == 1
+    erreur = next(r for r in resultats if r["statut"] == "erreur")
+    assert erreur["ligne"] == 2 and "JSON invalide" in erreur["erreur"]
@@ -0,0 +1,177 @@
+"""Calculateur de cintrage"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, CalculMultiCintrage, ParametresCintrage, ParametresTube
+
+TUBE = ParametresTube(20, 1.5, 1000)
+PROGRAMME = [ParametresCintrage(90, 50, 200), ParametresCintrage(45, 30, 500, rotation=30)]
+
+def test_cache_geometrie():
+    calculateur = CalculateurCintrage()
+    plane = calculateur.calculer_geometrie(TUBE, PROGRAMME)
+    espace = calculateur.calculer_geometrie_3d(TUBE, PROGRAMME)
+    # Vue de dessus et ligne 3D ont des clés distinctes
+    assert plane.points.shape[1] == 2 and espace.points.shape[1] == 3
+    assert calculateur.calculer_geometrie(TUBE, PROGRAMME) is plane
+    assert calculateur.calculer_geometrie_3d(TUBE, PROGRAMME) is espace
+    statistiques = calculateur.statistiques_cache()
+    assert (statistiques["succes"], statistiques["echecs"], statistiques["taille"]) == (2, 2, 2)
+    for tableau in (espace.points, espace.indices_cintrages, espace.abscisses_cintrages):
+        with pytest.raises(ValueError):
+            tableau[...] = 0
+
+def test_cache_eviction_lru():
+    calculateur = CalculateurCintrage()
+    calculateur.taille_cache = 2
+    tubes = [ParametresTube(20, 1.5, 1000 + i) for i in range(3)]
+    premiere = calculateur.calculer_geometrie_3d(tubes[0], PROGRAMME)
+    calculateur.calculer_geometrie(tubes[1], PROGRAMME)
+    assert calculateur.calculer_geometrie_3d(tubes[0], PROGRAMME) is premiere  # Devient la plus récente
+    calculateur.calculer_geometrie(tubes[2], PROGRAMME)
+    assert calculateur.statistiques_cache()["taille"] == 2
+    assert calculateur.calculer_geometrie_3d(tubes[0], PROGRAMME) is premiere
+    calculateur.calculer_geometrie(tubes[1], PROGRAMME)
+    assert calculateur.statistiques_cache()["echecs"] == 4
+
+def test_cache_reglages():
+    calculateur = CalculateurCintrage()
+    avant = calculateur.calculer_geometrie(TUBE, PROGRAMME[:1])
+    calculateur.coefficient_retour_elastique = 0.9
+    apres = calculateur.calculer_geometrie(TUBE, PROGRAMME[:1])
+    assert apres is not avant and not np.array_equal(apres.points, avant.points)
+
+def _points_reference(longueur, cintrages, coefficient, nb_points=40):
+    """Boucle point par point du calcul d'origine, sans NumPy"""
+    if not cintrages:
+        return [(0.0, 0.0), (longueur, 0.0)]
+    points = [(0.0, 0.0)]
+    x_courant = y_courant = angle_courant = 0.0
+    for i, cintrage in enumerate(cintrages):
+        distance_segment = cintrage.position - (0 if i == 0 else cintrages[i - 1].position)
+        if distance_segment > 0:
+            x_courant += distance_segment * math.cos(angle_courant)
+            y_courant += distance_segment * math.sin(angle_courant)
+            points.append((x_courant, y_courant))
+        angle_rad = math.radians(cintrage.angle)
+        rayon_effectif = cintrage.rayon / coefficient
+        centre_x = x_courant - rayon_effectif * math.sin(angle_courant)
+        centre_y = y_courant + rayon_effectif * math.cos(angle_courant)
+        for j in range(nb_points + 1):
+            angle_arc = angle_rad * j / nb_points
+            points.append((centre_x + rayon_effectif * math.sin(angle_courant + angle_arc),
+                           centre_y - rayon_effectif * math.cos(angle_courant + angle_arc)))
+        x_courant, y_courant = points[-1]
+        angle_courant += angle_rad
+    longueur_restante = longueur - cintrages[-1].position
+    if longueur_restante > 0:
+        points.append((x_courant + longueur_restante * math.cos(angle_courant),
+                       y_courant + longueur_restante * math.sin(angle_courant)))
+    return points
+
+def _programmes_plans(nombre, graine=0):
+    aleatoire = random.Random(graine)
+    for _ in range(nombre):
+        nb = aleatoire.choice([0, 1, 2, 5, 20, 60])
+        positions = sorted(aleatoire.sample(range(0, 20 * nb + 20, 10), nb))
+        cintrages = [ParametresCintrage(aleatoire.uniform(-180, 180), aleatoire.uniform(5, 200), float(p))
+                     for p in positions]
+        yield ParametresTube(20, 1.5, max(positions, default=0) + aleatoire.choice([0.0, 150.0])), cintrages
+
+def test_moteur_vectorise_reference():
+    calculateur = CalculateurCintrage()
+    for coefficient in (1.0, 0.975):
+        calculateur.coefficient_retour_elastique = coefficient
+        for params_tube, cintrages in _programmes_plans(60):
+            np.testing.assert_allclose(calculateur.calculer_points_array(params_tube, cintrages),
+                                       _points_reference(params_tube.longueur, cintrages, coefficient),
+                                       rtol=0, atol=1e-9)
+
+def test_moteur_3d_sans_rotation():
+    calculateur = CalculateurCintrage()
+    for params_tube, cintrages in _programmes_plans(30, graine=1):
+        espace = calculateur.calculer_geometrie_3d(params_tube, cintrages).points
+        np.testing.assert_allclose(espace[:, :2], calculateur.calculer_points_array(params_tube, cintrages), atol=1e-9)
+        np.testing.assert_allclose(espace[:, 2], 0.0, atol=1e-9)
+
+def test_longueur_developpee_reference():
+    calculateur = CalculateurCintrage()
+    for params_tube, cintrages in _programmes_plans(30, graine=2):
+        attendue = params_tube.longueur + sum(math.radians(c.angle) * c.rayon
+                                              - 2 * c.rayon * math.sin(math.radians(c.angle) / 2)
+                                              for c in cintrages)
+        assert calculateur.calculer_longueur_developpee(params_tube, cintrages=cintrages) == pytest.approx(attendue)
+
+def _etat(multi):
+    return list(multi.cintrages), list(multi.ids)
+
+def test_multi_cintrage_lot_atomique():
+    multi = CalculMultiCintrage()
+    multi.ajouter_cintrages([ParametresCintrage(90, 50, 100), ParametresCintrage(90, 50, 300)])
+    avant = _etat(multi)
+    # Trop proche d'un cintrage existant, puis trop proches entre eux
+    for lot in ([ParametresCintrage(45, 50, 500), ParametresCintrage(45, 50, 305)],
+                [ParametresCintrage(45, 50, 500), ParametresCintrage(45, 50, 505)]):
+        with pytest.raises(ValueError):
+            multi.ajouter_cintrages(lot)
+        assert _etat(multi) == avant
+    assert multi.ajouter_cintrages([ParametresCintrage(45, 50, 500)]) == [3]
+
+def test_multi_cintrage_ecart_avec_les_voisins():
+    multi = CalculMultiCintrage()
+    for position in (100, 200, 300):
+        multi.ajouter_cintrage(ParametresCintrage(90, 50, position))
+    # Écart juste suffisant avec les deux voisins
+    multi.ajouter_cintrage(ParametresCintrage(90, 50, 100 + CalculMultiCintrage.ECART_MINIMAL))
+    multi.ajouter_cintrage(ParametresCintrage(90, 50, 200 - CalculMultiCintrage.ECART_MINIMAL))
+    for position in (95, 205, 299.5, 310 - 1e-9):
+        with pytest.raises(ValueError):
+            multi.ajouter_cintrage(ParametresCintrage(90, 50, position))
+    assert [c.position for c in multi.cintrages] == [100, 110, 190, 200, 300]
+
+def test_multi_cintrage_modification_annulee():
+    multi = CalculMultiCintrage()
+    ids = [multi.ajouter_cintrage(ParametresCintrage(90, 50, p)) for p in (100, 200, 300)]
+    avant = _etat(multi)
+    with pytest.raises(ValueError):
+        multi.modifier_cintrage(0, ParametresCintrage(30, 40, 295))
+    assert _etat(multi) == avant
+    assert [multi.index_cintrage(i) for i in ids] == [0, 1, 2]
+    # Un cintrage peut rester à moins de l'écart minimal de sa propre ancienne position
+    multi.modifier_cintrage(1, ParametresCintrage(30, 40, 205))
+    assert multi.cintrages[1].position == 205 and multi.ids == ids
+
+def test_multi_cintrage_identifiants_stables():
+    aleatoire = random.Random(8)
+    multi = CalculMultiCintrage()
+    attendus = {}
+    for _ in range(500):
+        choix = aleatoire.random()
+        position = aleatoire.randrange(0, 5000, 10)
+        try:
+            if choix < 0.4 or not attendus:
+                identifiant = multi.ajouter_cintrage(ParametresCintrage(90, 50, position))
+                attendus[identifiant] = position
+            elif choix < 0.5:
+                lot = [ParametresCintrage(45, 50, p) for p in aleatoire.sample(range(0, 5000, 10), 3)]
+                attendus.update(zip(multi.ajouter_cintrages(lot), (c.position for c in lot)))
+            elif choix < 0.8:
+                identifiant = aleatoire.choice(list(attendus))
+                multi.modifier_cintrage(multi.index_cintrage(identifiant), ParametresCintrage(90, 50, position))
+                attendus[identifiant] = position
+            else:
+                identifiant = aleatoire.choice(list(attendus))
+                multi.supprimer_cintrage_par_id(identifiant)
+                del attendus[identifiant]
+        except ValueError:
+            pass
+        assert sorted(attendus.items(), key=lambda x: x[1]) == [
+            (i, c.position) for i, c in zip(multi.ids, multi.cintrages)]
+        for identifiant in attendus:
+            assert multi.ids[multi.index_cintrage(identifiant)] == identifiant
+    assert multi.index_cintrage(max(multi.ids) + 1000) == -1
+    multi.vider()
+    assert multi.index_cintrage(1) == -1
@@ -0,0 +1,62 @@
+"""Catalogue SQLite des pièces"""
+import random
+
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.catalogue import CataloguePieces
+from modules.projet import Piece
+
+def _pieces(nombre, graine=0):
+    aleatoire = random.Random(graine)
+    pieces = []
+    for i in range(nombre):
+        positions = sorted(aleatoire.sample(range(0, 2000, 20), aleatoire.choice([0, 1, 2, 3, 6])))
+        cintrages = [ParametresCintrage(aleatoire.uniform(-170, 170), aleatoire.uniform(10, 200), p,
+                                        aleatoire.choice([0.0, aleatoire.uniform(-180, 180)]))
+                     for p in positions]
+        longueur = max(positions, default=0) + aleatoire.choice([0.0, aleatoire.uniform(1, 500)])
+        pieces.append(Piece(f"P{i}", ParametresTube(20, 1.5, longueur), cintrages,
+                            aleatoire.choice([0.9, 0.95, 0.975, 1.0])))
+    return pieces
+
+def _valeurs_reference(piece, tolerance_corde=None, pas_angulaire_max=None):
+    calculateur = CalculateurCintrage()
+    calculateur.coefficient_retour_elastique = piece.coefficient_retour_elastique
+    calculateur.tolerance_corde = tolerance_corde
+    calculateur.pas_angulaire_max = pas_angulaire_max
+    points = calculateur.calculer_geometrie_3d(piece.tube, piece.cintrages).points
+    rayons = [c.rayon for c in piece.cintrages]
+    return (calculateur.calculer_longueur_developpee(piece.tube, cintrages=piece.cintrages),
+            min(rayons, default=None), max(rayons, default=None),
+            *points.min(axis=0).tolist(), *points.max(axis=0).tolist())
+
+@pytest.mark.parametrize("tolerance_corde, pas_angulaire_max", [(None, None), (0.05, None), (None, 5.0)])
+def test_valeurs_derivees_lot(tolerance_corde, pas_angulaire_max):
+    pieces = _pieces(300)
+    catalogue = CataloguePieces()
+    catalogue.calculateur.tolerance_corde = tolerance_corde
+    catalogue.calculateur.pas_angulaire_max = pas_angulaire_max
+    for piece, valeurs in zip(pieces, catalogue.valeurs_derivees_lot(pieces)):
+        reference = _valeurs_reference(piece, tolerance_corde, pas_angulaire_max)
+        assert (valeurs[1] is None) == (reference[1] is None)
+        np.testing.assert_allclose([v or 0.0 for v in valeurs], [v or 0.0 for v in reference], atol=1e-9)
+
+def test_calculateur_partage_inchange():
+    calculateur = CalculateurCintrage()
+    calculateur.coefficient_retour_elastique = 0.9
+    with CataloguePieces(calculateur=calculateur) as catalogue:
+        catalogue.ajouter_pieces(_pieces(20))
+    assert calculateur.coefficient_retour_elastique == 0.9
+
+def test_ajout_et_recherche(tmp_path):
+    pieces = _pieces(50)
+    with CataloguePieces(str(tmp_path / "catalogue.db")) as catalogue:
+        assert catalogue.ajouter_pieces(iter(pieces)) == len(pieces)
+        assert catalogue.charger("P7") == pieces[7]
+        with pytest.raises(ValueError):
+            catalogue.ajouter_pieces(pieces[:1])
+        longues = catalogue.rechercher(diametre=20, longueur_developpee=(1000, None))
+        attendues = [p.nom for p in pieces if _valeurs_reference(p)[0] >= 1000]
+        assert [entree.nom for entree in longues] == attendues
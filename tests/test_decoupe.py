@@ -0,0 +1,63 @@
+"""Plans de débit : validité des plans produits par chaque méthode"""
+import random
+from collections import Counter
+
+import pytest
+
+from modules.decoupe import EPSILON, METHODES, planifier_decoupe, plans_par_section
+
+def _verifier_plan(plan, commande, stock, trait_scie, serrage):
+    # Chaque pièce commandée est coupée exactement autant de fois que sa quantité
+    coupees = Counter((c.nom, c.longueur) for b in plan.barres for c in b.coupes)
+    assert coupees == Counter({(nom, float(longueur)): quantite for nom, longueur, quantite in commande if quantite})
+
+    utilisees = Counter(b.longueur for b in plan.barres)
+    for longueur, nombre in utilisees.items():
+        assert longueur in stock
+        if isinstance(stock, dict) and stock[longueur] is not None:
+            assert nombre <= stock[longueur]
+
+    for barre in plan.barres:
+        assert barre.coupes
+        position = 0.0
+        for coupe in barre.coupes:
+            # Coupes successives depuis l'extrémité libre, séparées d'un trait de scie
+            assert coupe.position == pytest.approx(position)
+            position += coupe.longueur + trait_scie
+        assert position <= barre.longueur - serrage + EPSILON
+        assert barre.chute == pytest.approx(barre.longueur - position)
+
+def _commande(aleatoire, nombre):
+    return [(f"P{i}", round(aleatoire.uniform(200, 2500), 1), aleatoire.randint(1, 3)) for i in range(nombre)]
+
+@pytest.mark.parametrize("methode", METHODES)
+def test_plans_valides(methode):
+    aleatoire = random.Random(11)
+    for _ in range(40):
+        commande = _commande(aleatoire, 6 if methode == "exact" else aleatoire.randint(1, 60))
+        stock = aleatoire.choice([[6000.0], [6000.0, 3000.0], {6000.0: None, 4000.0: 5, 2600.0: 3}])
+        trait_scie, serrage = aleatoire.choice([(0.0, 0.0), (3.0, 50.0)])
+        plan = planifier_decoupe(commande, stock, trait_scie, serrage, methode)
+        _verifier_plan(plan, commande, stock, trait_scie, serrage)
+        assert 0.0 <= plan.taux_chute < 1.0
+
+def test_exact_au_moins_aussi_bon_que_bfd():
+    aleatoire = random.Random(5)
+    for _ in range(20):
+        commande = _commande(aleatoire, 5)
+        stock = [6000.0, 3000.0]
+        exact = planifier_decoupe(commande, stock, 3.0, 20.0, "exact")
+        bfd = planifier_decoupe(commande, stock, 3.0, 20.0, "bfd")
+        assert exact.longueur_barres <= bfd.longueur_barres + EPSILON
+
+def test_stock_insuffisant():
+    with pytest.raises(ValueError):
+        planifier_decoupe([("P1", 5000.0, 1)], [3000.0])
+    with pytest.raises(ValueError):
+        planifier_decoupe([("P1", 2000.0, 3)], {3000.0: 2})
+
+def test_plans_par_section():
+    commande = [("A", 20, 1.5, 1000.0, 2), ("B", 25, 2, 1500.0, 1), ("C", 20, 1.5, 700.0, 1)]
+    plans = plans_par_section(commande, [6000.0])
+    assert list(plans) == ["20x1.5", "25x2"]
+    _verifier_plan(plans["20x1.5"], [("A", 1000.0, 2), ("C", 700.0, 1)], [6000.0], 0.0, 0.0)
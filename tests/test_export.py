@@ -0,0 +1,43 @@
+"""Exports DXF et SVG"""
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.export import ExporteurPlans
+
+@pytest.fixture
+def points():
+    calculateur = CalculateurCintrage()
+    return calculateur.calculer_points_array(ParametresTube(20, 1.5, 1000),
+                                             [ParametresCintrage(90, 50, 200), ParametresCintrage(45, 30, 500)])
+
+def _paires(texte):
+    lignes = texte.splitlines()
+    return list(zip(lignes[0::2], lignes[1::2]))
+
+@pytest.mark.parametrize("mode", ["lignes", "polyligne"])
+def test_dxf_entites_r12(points, mode):
+    # $ACADVER AC1009 : uniquement des entités R12, sans marqueurs de sous-classe
+    texte = "".join(ExporteurPlans().generer_dxf(points, mode))
+    paires = _paires(texte)
+    assert ("1", "AC1009") in paires
+    # Variables d'en-tête définies en R12 seulement
+    variables = [valeur for code, valeur in paires if code == "9"]
+    assert variables == ["$ACADVER", "$EXTMIN", "$EXTMAX"]
+    assert not any(code == "100" for code, _ in paires)
+    entites = [valeur for code, valeur in paires if code == "0"]
+    assert "LWPOLYLINE" not in entites
+    if mode == "polyligne":
+        debut = entites.index("POLYLINE")
+        assert entites[debut + 1:debut + 1 + len(points)] == ["VERTEX"] * len(points)
+        assert entites[debut + 1 + len(points)] == "SEQEND"
+
+def test_dxf_polyligne_relue(points, tmp_path):
+    ezdxf = pytest.importorskip("ezdxf")
+    chemin = tmp_path / "tube.dxf"
+    ExporteurPlans().exporter_dxf(points, str(chemin), "polyligne")
+    document = ezdxf.readfile(str(chemin))
+    assert not document.audit().errors
+    polyligne, = document.modelspace()
+    assert polyligne.dxftype() == "POLYLINE"
+    np.testing.assert_allclose(np.array(list(polyligne.points()))[:, :2], points, atol=1e-4)
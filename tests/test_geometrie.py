@@ -0,0 +1,56 @@
+"""Tessellation des arcs et échantillonnage groupé des lignes moyennes"""
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.geometrie import nombre_segments_arcs
+from modules.geometrie3d import calculer_geometrie_3d, echantillonner_tubes
+
+@pytest.mark.parametrize("reglages", [
+    {"tolerance_corde": 0.0}, {"tolerance_corde": -0.1}, {"tolerance_corde": float("nan")},
+    {"pas_angulaire_max": 0.0}, {"pas_angulaire_max": -5.0},
+])
+def test_reglages_invalides(reglages):
+    with pytest.raises(ValueError):
+        nombre_segments_arcs([90.0], [50.0], **reglages)
+
+def test_reglages_invalides_calculateur():
+    calculateur = CalculateurCintrage()
+    calculateur.tolerance_corde = 0.0
+    with pytest.raises(ValueError, match="tolérance"):
+        calculateur.calculer_geometrie(ParametresTube(20, 1.5, 500), [ParametresCintrage(90, 50, 200)])
+
+def test_fleche_respectee():
+    angles = np.array([5.0, 45.0, 90.0, -135.0, 179.0])
+    rayons = np.array([20.0, 50.0, 100.0, 30.0, 200.0])
+    for tolerance in (0.01, 0.1, 1.0):
+        segments = nombre_segments_arcs(angles, rayons, tolerance_corde=tolerance)
+        pas = np.radians(np.abs(angles)) / segments
+        assert np.all(rayons * (1 - np.cos(pas / 2)) <= tolerance + 1e-12)
+
+def test_tolerance_au_dela_du_rayon():
+    # Une flèche plus grande que le rayon n'est atteinte par aucune corde : demi-tours au plus
+    segments = nombre_segments_arcs([90.0, 180.0, 270.0], [10.0, 10.0, 10.0], tolerance_corde=50.0)
+    np.testing.assert_array_equal(segments, [1, 1, 2])
+
+def test_pas_angulaire():
+    np.testing.assert_array_equal(nombre_segments_arcs([90.0, 10.0, 0.0], [50.0] * 3, pas_angulaire_max=7.0),
+                                  [13, 2, 1])
+
+def test_echantillonnage_groupe():
+    # Tubes droits, cintrage en début de tube, tube s'arrêtant sur son dernier arc
+    aleatoire = np.random.default_rng(4)
+    tubes = []
+    for nb in (0, 3, 1, 0, 5, 2):
+        positions = np.sort(aleatoire.uniform(0, 1000, nb))
+        if nb == 1:
+            positions[0] = 0.0
+        longueur = positions[-1] if nb == 2 else 1200.0
+        tubes.append((longueur, positions, aleatoire.uniform(-170, 170, nb), aleatoire.uniform(10, 90, nb),
+                      aleatoire.uniform(-180, 180, nb), aleatoire.integers(1, 9, nb)))
+    concatenes = [np.concatenate([t[i] for t in tubes]) for i in range(1, 6)]
+    points, debuts = echantillonner_tubes([t[0] for t in tubes], [t[1].size for t in tubes], *concatenes)
+    for numero, tube in enumerate(tubes):
+        attendus = calculer_geometrie_3d(*tube).points
+        np.testing.assert_allclose(points[debuts[numero]:debuts[numero + 1]], attendus, rtol=0, atol=1e-9)
+    assert debuts[-1] == len(points)
@@ -0,0 +1,48 @@
+"""Géométrie incrémentale, comparée au calcul complet"""
+import random
+
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+
+def _comparer(calculateur, incrementale, diametre=20):
+    cintrages = [ParametresCintrage(angle=float(a), rayon=float(r), position=float(p))
+                 for p, a, r in zip(incrementale.positions, incrementale.angles, incrementale.rayons)]
+    complete = calculateur.calculer_geometrie(ParametresTube(diametre, 1.5, incrementale.longueur), cintrages)
+    geometrie = incrementale.geometrie
+    np.testing.assert_allclose(geometrie.points, complete.points, rtol=0, atol=1e-8)
+    np.testing.assert_array_equal(geometrie.indices_cintrages, complete.indices_cintrages)
+    np.testing.assert_allclose(geometrie.abscisses_cintrages, complete.abscisses_cintrages, atol=1e-9)
+
+@pytest.mark.parametrize("tessellation", [{}, {"tolerance_corde": 0.05}, {"pas_angulaire_max": 4.0}])
+def test_modifications_successives(tessellation):
+    aleatoire = random.Random(7)
+    calculateur = CalculateurCintrage()
+    calculateur.coefficient_retour_elastique = 0.97
+    for nom, valeur in tessellation.items():
+        setattr(calculateur, nom, valeur)
+    positions = sorted(aleatoire.uniform(0, 3000) for _ in range(12))
+    cintrages = [ParametresCintrage(aleatoire.uniform(-170, 170), aleatoire.uniform(10, 150), p) for p in positions]
+    incrementale = calculateur.creer_geometrie_incrementale(ParametresTube(20, 1.5, 3200), cintrages)
+    _comparer(calculateur, incrementale)
+
+    for _ in range(300):
+        choix = aleatoire.random()
+        if choix < 0.1:
+            incrementale.modifier_longueur(aleatoire.uniform(incrementale.positions[-1] - 50,
+                                                             incrementale.positions[-1] + 500))
+        else:
+            index = aleatoire.randrange(incrementale.positions.size)
+            # Position modifiée dans le voisinage, ou ailleurs (changement d'ordre)
+            position = (incrementale.positions[index] + aleatoire.uniform(-30, 30) if choix < 0.8
+                        else aleatoire.uniform(0, 3000))
+            incrementale.modifier_cintrage(index, position=position,
+                                           angle=aleatoire.choice([None, aleatoire.uniform(-170, 170)]),
+                                           rayon=aleatoire.choice([None, aleatoire.uniform(10, 150)]))
+        _comparer(calculateur, incrementale)
+
+def test_programme_non_plan_refuse():
+    with pytest.raises(ValueError):
+        CalculateurCintrage().creer_geometrie_incrementale(
+            ParametresTube(20, 1.5, 1000), [ParametresCintrage(90, 50, 200, rotation=90)])
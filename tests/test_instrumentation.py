@@ -0,0 +1,112 @@
+"""Instrumentation : compteurs, chronos, export JSON et profil"""
+import io
+import json
+import os
+import pstats
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from modules import instrumentation
+from modules.instrumentation import Statistiques
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def statistiques(monkeypatch):
+    statistiques = Statistiques()
+    monkeypatch.setattr(instrumentation, "statistiques", statistiques)
+    monkeypatch.setattr(instrumentation, "ACTIF", instrumentation.ACTIF)
+    monkeypatch.setattr(instrumentation, "AFFICHER_STATUT", instrumentation.AFFICHER_STATUT)
+    return statistiques
+
+@instrumentation.chronometre("test.decoree")
+def _decoree(x):
+    return x * 2
+
+def _mesurer():
+    instrumentation.compter("test.appels")
+    instrumentation.compter("test.points", 250)
+    with instrumentation.chrono("test.bloc"):
+        pass
+    assert _decoree(21) == 42
+
+def test_desactive_sans_effet(statistiques):
+    instrumentation.activer(False)
+    _mesurer()
+    with pytest.raises(KeyError):
+        with instrumentation.chrono("test.erreur"):
+            raise KeyError
+    assert statistiques.compteurs == {} and statistiques.chronos == {}
+
+def test_active_cumule(statistiques):
+    instrumentation.activer(True)
+    for _ in range(3):
+        _mesurer()
+    # La durée d'un bloc interrompu par une exception est enregistrée
+    with pytest.raises(KeyError):
+        with instrumentation.chrono("test.erreur"):
+            raise KeyError
+    assert statistiques.compteurs == {"test.appels": 3, "test.points": 750}
+    assert {nom: c[0] for nom, c in statistiques.chronos.items()} == {
+        "test.bloc": 3, "test.decoree": 3, "test.erreur": 1}
+    for nombre, total, maximum in statistiques.chronos.values():
+        assert 0 <= maximum <= total
+    assert _decoree.__name__ == "_decoree"
+    statistiques.reinitialiser()
+    assert statistiques.compteurs == {} and statistiques.chronos == {}
+
+def test_vers_json_aller_retour(statistiques, tmp_path):
+    statistiques.compter("calculs.points", 1200)
+    statistiques.compter("calculs.cache_succes", 3)
+    statistiques.compter("calculs.cache_echecs")
+    statistiques.enregistrer_duree("calculs.geometrie", 0.002)
+    statistiques.enregistrer_duree("calculs.geometrie", 0.004)
+    chemin = tmp_path / "mesures.json"
+    texte = statistiques.vers_json(str(chemin))
+    assert json.loads(chemin.read_text(encoding="utf-8")) == json.loads(texte) == statistiques.instantane()
+    chrono = json.loads(texte)["chronos"]["calculs.geometrie"]
+    assert chrono == {"nombre": 2, "total_ms": 6.0, "moyenne_ms": 3.0, "max_ms": 4.0}
+    assert statistiques.resume() == "geometrie 3.0 ms | cache 3/4 | 1200 points"
+
+def _charge():
+    return sum(i * i for i in range(20000))
+
+def test_profil(tmp_path):
+    chemin = tmp_path / "capture.prof"
+    sortie = io.StringIO()
+    with instrumentation.profil(str(chemin), sortie=sortie) as profileur:
+        assert profileur is not None
+        _charge()
+        # Tâche d'un autre thread, ajoutée au profil du thread principal
+        fil = threading.Thread(target=instrumentation.profiler_fil, args=(_charge,))
+        fil.start()
+        fil.join()
+    appels = {nom: valeurs[0] for (_, _, nom), valeurs in pstats.Stats(str(chemin)).stats.items()}
+    assert appels["_charge"] == 2
+    assert "_charge" in sortie.getvalue()
+    # Hors capture, profiler_fil se contente d'appeler la fonction
+    assert instrumentation.profiler_fil(_charge) == _charge()
+
+def test_profil_variable_environnement(tmp_path, monkeypatch):
+    monkeypatch.delenv("CINTREUSE_PROFIL", raising=False)
+    with instrumentation.profil(sortie=io.StringIO()) as profileur:
+        assert profileur is None
+    chemin = tmp_path / "env.prof"
+    monkeypatch.setenv("CINTREUSE_PROFIL", str(chemin))
+    with instrumentation.profil(sortie=io.StringIO()) as profileur:
+        _charge()
+    assert profileur is not None and pstats.Stats(str(chemin)).total_calls > 0
+
+@pytest.mark.parametrize("valeur, actif, statut", [
+    ("", False, False), ("0", False, False), ("non", False, False), ("1", True, False), ("statut", True, True),
+])
+def test_variable_instrumentation(valeur, actif, statut):
+    environnement = dict(os.environ, CINTREUSE_INSTRUMENTATION=valeur)
+    resultat = subprocess.run(
+        [sys.executable, "-c", "from modules import instrumentation as i; print(i.ACTIF, i.AFFICHER_STATUT)"],
+        cwd=RACINE, env=environnement, capture_output=True, text=True)
+    assert resultat.returncode == 0, resultat.stderr
+    assert resultat.stdout.split() == [str(actif), str(statut)]
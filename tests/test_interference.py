@@ -0,0 +1,82 @@
+"""Détection des interférences, comparée à la recherche exhaustive"""
+import numpy as np
+import pytest
+
+from modules import interference
+from modules.geometrie3d import _rotations_x, calculer_geometrie_3d, reperes_programme
+from modules.interference import (TOLERANCE_CONTACT, Obstacle, distances_segments, verifier_auto_interference,
+                                  verifier_etapes_programme, verifier_obstacles)
+
+def _force_brute(points, diametre, marge):
+    debuts, fins = points[:-1], points[1:]
+    abscisses = np.concatenate(([0.0], np.cumsum(np.linalg.norm(fins - debuts, axis=1))))
+    i, j = np.triu_indices(len(debuts), 1)
+    gardes = abscisses[j] - abscisses[i + 1] >= np.pi * diametre / 2
+    i, j = i[gardes], j[gardes]
+    jeux = distances_segments(debuts[i], fins[i], debuts[j], fins[j]) - diametre
+    contacts = {(a, b) for a, b, jeu in zip(i.tolist(), j.tolist(), jeux) if jeu < -TOLERANCE_CONTACT}
+    jeu_minimal = jeux.min() if len(jeux) and jeux.min() < marge else np.inf
+    return contacts, jeu_minimal
+
+def _lignes(nombre, graine=0):
+    aleatoire = np.random.default_rng(graine)
+    for k in range(nombre):
+        points = np.cumsum(aleatoire.normal(size=(aleatoire.integers(3, 300), 3)) * aleatoire.choice([1, 5, 20]),
+                           axis=0)
+        if k % 3 == 0:
+            points = points[:, :2]
+        yield points, float(aleatoire.choice([2.0, 8.0, 20.0]))
+
+@pytest.mark.parametrize("couples_par_lot", [interference.COUPLES_PAR_LOT, 7])
+def test_auto_interference_force_brute(monkeypatch, couples_par_lot):
+    monkeypatch.setattr(interference, "COUPLES_PAR_LOT", couples_par_lot)
+    for points, diametre in _lignes(30):
+        resultat = verifier_auto_interference(points, diametre)
+        contacts, jeu_minimal = _force_brute(interference._en_3d(points), diametre, diametre)
+        assert {tuple(p) for p in resultat.paires.tolist()} == contacts
+        assert resultat.interference == bool(contacts)
+        np.testing.assert_allclose(resultat.jeu_minimal, jeu_minimal, atol=1e-9)
+
+def test_tube_droit_sans_interference():
+    points = np.column_stack((np.linspace(0, 1000, 200), np.zeros(200)))
+    resultat = verifier_auto_interference(points, 20.0)
+    assert not resultat.interference and resultat.jeu_minimal > 0
+
+def _etape_recalculee(longueur, positions, angles, rayons, rotations, segments, k, avancement, diametre, obstacles):
+    """Étape recalculée depuis le début du tube, programme tronqué au cintrage k"""
+    angles_etape = np.append(angles[:k], angles[k] * avancement)
+    points = calculer_geometrie_3d(longueur, positions[:k + 1], angles_etape, rayons[:k + 1], rotations[:k + 1],
+                                   segments[:k + 1]).points
+    _, repere = reperes_programme(np.maximum(np.diff(positions[:k + 1], prepend=0.0), 0.0), rotations[:k + 1],
+                                  angles_etape, rayons[:k + 1])
+    if angles[k] < 0:
+        repere = repere @ _rotations_x(np.array([np.pi]))[0]
+    return (verifier_auto_interference(points, diametre),
+            verifier_obstacles((points - repere[:3, 3]) @ repere[:3, :3], diametre, obstacles))
+
+def test_etapes_programme_recalcul_complet():
+    aleatoire = np.random.default_rng(3)
+    obstacles = [Obstacle("table", (-2000.0, -500.0, -400.0), (2000.0, 500.0, -60.0)),
+                 Obstacle("matrice", (-80.0, 15.0, -40.0), (80.0, 200.0, 40.0))]
+    for _ in range(6):
+        nb = int(aleatoire.integers(2, 9))
+        positions = np.sort(aleatoire.uniform(0, 1200, nb))
+        positions[0] = aleatoire.choice([0.0, positions[0]])
+        positions[-1] = positions[-2] if aleatoire.random() < 0.3 else positions[-1]
+        angles = aleatoire.uniform(-170, 170, nb)
+        rayons = aleatoire.uniform(20, 60, nb)
+        rotations = aleatoire.choice([0.0, 90.0, -45.0], nb)
+        segments = aleatoire.integers(2, 12, nb)
+        longueur = float(aleatoire.choice([positions[-1], positions[-1] + 400.0]))
+        etapes = verifier_etapes_programme(longueur, positions, angles, rayons, rotations, 20.0, segments,
+                                           obstacles, sous_etapes=3)
+        assert [(e.index_cintrage, e.avancement) for e in etapes] == [
+            (k, a) for k in range(nb) for a in (1 / 3, 2 / 3, 1.0)]
+        for etape in etapes:
+            interference, collisions = _etape_recalculee(longueur, positions, angles, rayons, rotations, segments,
+                                                         etape.index_cintrage, etape.avancement, 20.0, obstacles)
+            np.testing.assert_array_equal(etape.interference.paires, interference.paires)
+            np.testing.assert_allclose(etape.interference.jeu_minimal, interference.jeu_minimal, atol=1e-9)
+            assert etape.collisions_machine.keys() == collisions.keys()
+            for nom, touches in collisions.items():
+                np.testing.assert_array_equal(etape.collisions_machine[nom], touches)
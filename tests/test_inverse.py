@@ -0,0 +1,64 @@
+"""Calcul inverse : aller-retour avec le moteur direct"""
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.inverse import SolveurInverse
+
+RAYON = 40.0
+
+def _programmes(nombre, graine=0):
+    aleatoire = np.random.default_rng(graine)
+    for _ in range(nombre):
+        nb = int(aleatoire.integers(1, 6))
+        positions = 100.0 + np.cumsum(aleatoire.uniform(150, 300, nb))
+        cintrages = [ParametresCintrage(angle=float(a), rayon=RAYON, position=float(p), rotation=float(r))
+                     for a, p, r in zip(aleatoire.uniform(10, 170, nb), positions,
+                                        aleatoire.uniform(-170, 170, nb))]
+        yield ParametresTube(20, 1.5, float(positions[-1] + aleatoire.uniform(50, 300))), cintrages
+
+def _ecart_angulaire(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0)
+
+def test_aller_retour():
+    calculateur = CalculateurCintrage()
+    solveur = SolveurInverse(calculateur)
+    for params_tube, cintrages in _programmes(50):
+        sommets = calculateur.programme_xyz(params_tube, cintrages).sommets
+        longueur, resolus = solveur.resoudre(sommets, RAYON)
+        assert longueur == pytest.approx(params_tube.longueur)
+        np.testing.assert_allclose([c.position for c in resolus], [c.position for c in cintrages], atol=1e-9)
+        np.testing.assert_allclose([c.angle for c in resolus], [c.angle for c in cintrages], atol=1e-9)
+        assert _ecart_angulaire([c.rotation for c in resolus], [c.rotation for c in cintrages]).max() < 1e-7
+        np.testing.assert_allclose(calculateur.calculer_geometrie_3d(ParametresTube(20, 1.5, longueur), resolus).points,
+                                   calculateur.calculer_geometrie_3d(params_tube, cintrages).points, atol=1e-8)
+
+def test_verification_lot():
+    calculateur = CalculateurCintrage()
+    solveur = SolveurInverse(calculateur)
+    sommets = [calculateur.programme_xyz(t, c).sommets for t, c in _programmes(30, graine=1)]
+    resultat = solveur.resoudre_lot(sommets, None, RAYON)
+    assert resultat.valides.all()
+    assert solveur.verifier_lot(resultat, sommets).max() < 1e-8
+
+def test_lot_plan_et_3d_meles():
+    solveur = SolveurInverse()
+    plan = np.array([[0.0, 0.0], [300.0, 0.0], [300.0, 400.0]])
+    espace = np.array([[0.0, 0.0, 0.0], [300.0, 0.0, 0.0], [300.0, 400.0, 0.0]])
+    resultat = solveur.resoudre_lot([plan, espace], None, RAYON)
+    np.testing.assert_allclose(resultat.positions[0], resultat.positions[1])
+    np.testing.assert_allclose(resultat.angles, [90.0, 90.0])
+    assert solveur.verifier_lot(resultat, [plan, espace]).max() < 1e-9
+
+def test_demi_tour():
+    solveur = SolveurInverse()
+    sommets = np.array([[0.0, 0.0], [500.0, 0.0], [500.0, 300.0], [100.0, 300.0], [900.0, 300.0]])
+    with pytest.raises(ValueError, match="Demi-tour.*sommet 3"):
+        solveur.resoudre(sommets, RAYON)
+    resultat = solveur.resoudre_lot([sommets, sommets[:3]], None, RAYON)
+    np.testing.assert_array_equal(resultat.valides, [False, True])
+    assert np.isinf(solveur.verifier_lot(resultat, [sommets, sommets[:3]])[0])
+
+def test_segment_trop_court():
+    with pytest.raises(ValueError, match="trop court"):
+        SolveurInverse().resoudre(np.array([[0.0, 0.0], [30.0, 0.0], [30.0, 30.0], [0.0, 30.0]]), RAYON)
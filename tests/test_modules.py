@@ -0,0 +1,31 @@
+"""Paquet modules : cœur sans tkinter, noms publics chargés à la demande"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import modules
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COEUR = ["calculs", "export", "batch", "projet", "catalogue", "decoupe", "balayage", "inverse", "apercu", "vue",
+         "interference", "instrumentation"]
+
+def test_coeur_sans_tkinter():
+    code = ("import sys\n"
+            + "".join(f"import modules.{nom}\n" for nom in COEUR)
+            + "import modules\n"
+            + "".join(f"modules.{nom}\n" for nom in modules._API)
+            + "assert 'tkinter' not in sys.modules, 'tkinter importé'\n")
+    resultat = subprocess.run([sys.executable, "-c", code], cwd=RACINE, capture_output=True, text=True)
+    assert resultat.returncode == 0, resultat.stderr
+
+@pytest.mark.parametrize("nom", sorted(modules._API))
+def test_noms_publics(nom):
+    valeur = getattr(modules, nom)
+    assert valeur.__module__ == f"modules.{modules._API[nom]}"
+    assert nom in modules.__all__ and nom in dir(modules)
+
+def test_nom_inconnu():
+    with pytest.raises(AttributeError):
+        modules.Inconnu
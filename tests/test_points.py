@@ -0,0 +1,26 @@
+"""Tampon de points"""
+import numpy as np
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.points import TamponPoints
+
+def test_transformer_sans_sortie_ne_modifie_pas_le_cache():
+    calculateur = CalculateurCintrage()
+    tampon = calculateur.calculer_points_tube(ParametresTube(20, 1.5, 500), ParametresCintrage(90, 50, 200))
+    avant = np.array(tampon, copy=True)
+    resultat = tampon.transformer(2.0, 10.0, -5.0)
+    assert resultat is not tampon
+    np.testing.assert_array_equal(np.asarray(tampon), avant)
+    np.testing.assert_allclose(resultat.tableau, avant * 2.0 + (10.0, -5.0))
+
+def test_transformer_tampon_inscriptible():
+    donnees = np.arange(10.0).reshape(5, 2)
+    tampon = TamponPoints(donnees)
+    tampon.transformer(3.0, 1.0, 1.0)
+    np.testing.assert_array_equal(donnees, np.arange(10.0).reshape(5, 2))
+
+def test_transformer_dans_sortie():
+    tampon = TamponPoints(np.arange(10.0).reshape(5, 2))
+    sortie = TamponPoints.vide(len(tampon))
+    assert tampon.transformer(0.5, -1.0, 2.0, sortie) is sortie
+    np.testing.assert_allclose(sortie.tableau, np.arange(10.0).reshape(5, 2) * 0.5 + (-1.0, 2.0))
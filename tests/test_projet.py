@@ -0,0 +1,54 @@
+"""Projets JSON et bibliothèque binaire de pièces"""
+import mmap
+
+import numpy as np
+import pytest
+
+from modules.calculs import ParametresCintrage, ParametresTube
+from modules.projet import (BibliothequePieces, Piece, charger_projet, ecrire_bibliotheque,
+                            enregistrer_projet)
+
+def _pieces(nombre):
+    return [Piece(f"P{i}", ParametresTube(20 + i, 1.5, 1000 + i),
+                  [ParametresCintrage(90 - j, 50, 200 + 100 * j, rotation=10.0 * j) for j in range(i % 4)],
+                  0.95 + i / 1000)
+            for i in range(nombre)]
+
+def test_projet_aller_retour(tmp_path):
+    piece = _pieces(4)[3]
+    chemin = tmp_path / "piece.json"
+    enregistrer_projet(str(chemin), piece)
+    assert charger_projet(str(chemin)) == piece
+
+def test_bibliotheque_aller_retour(tmp_path):
+    pieces = _pieces(50)
+    chemin = str(tmp_path / "pieces.bib")
+    assert ecrire_bibliotheque(chemin, pieces) == len(pieces)
+    with BibliothequePieces(chemin) as bibliotheque:
+        assert len(bibliotheque) == len(pieces)
+        assert "P17" in bibliotheque and "P50" not in bibliotheque
+        for piece in pieces:
+            assert bibliotheque.charger(piece.nom) == piece
+
+def test_cintrages_bruts_survivent_a_la_fermeture(tmp_path):
+    chemin = str(tmp_path / "pieces.bib")
+    ecrire_bibliotheque(chemin, _pieces(4))
+    bibliotheque = BibliothequePieces(chemin)
+    cintrages = bibliotheque.cintrages_bruts(bibliotheque.trouver("P3"))
+    bibliotheque.fermer()
+    assert bibliotheque._fichier.closed
+    np.testing.assert_array_equal(cintrages["position"], [200, 300, 400])
+
+def test_fermeture_avec_vue_exportee(tmp_path):
+    # Une vue encore tenue sur la projection empêche sa fermeture, pas celle du fichier
+    chemin = str(tmp_path / "pieces.bib")
+    ecrire_bibliotheque(chemin, _pieces(4))
+    bibliotheque = BibliothequePieces(chemin)
+    memoire = bibliotheque._memoire
+    vue = np.frombuffer(memoire, np.uint8)
+    with pytest.raises(BufferError):
+        bibliotheque.fermer()
+    assert bibliotheque._fichier.closed
+    del vue
+    memoire.close()
+    assert isinstance(memoire, mmap.mmap) and memoire.closed
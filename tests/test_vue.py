@@ -0,0 +1,101 @@
+"""Niveaux de détail et élimination hors champ"""
+import numpy as np
+import pytest
+
+from modules.calculs import CalculateurCintrage, ParametresCintrage, ParametresTube
+from modules.vue import NiveauxDetail, Vue
+
+ECHELLES = [0.01, 0.1, 0.5, 2.0, 20.0, 500.0]
+
+def _serpentin():
+    """Tube en serpentin qui repasse sur lui-même, et indices de début et de fin de ses arcs"""
+    cintrages = [ParametresCintrage(angle=180.0 if i % 2 else -180.0, rayon=40.0 + (i % 3), position=300.0 * (i + 1))
+                 for i in range(20)]
+    geometrie = CalculateurCintrage().calculer_geometrie(ParametresTube(20, 1.5, 6300), cintrages)
+    return geometrie.points, geometrie.indices_cintrages.ravel()
+
+def _marche_aleatoire():
+    return np.cumsum(np.random.default_rng(2).normal(size=(3000, 2)), axis=0), np.array([700, 1500, 2200])
+
+def _segments_dessines(points, continus):
+    return points[:-1][continus], points[1:][continus]
+
+def _distances(points, debuts, fins):
+    """Distance de chaque point au plus proche des segments (debuts, fins)"""
+    direction = fins - debuts
+    longueurs = np.maximum(np.einsum('ij,ij->i', direction, direction), 1e-300)
+    distances = np.empty(len(points))
+    for i in range(0, len(points), 256):
+        bloc = points[i:i + 256, None, :]
+        t = np.clip(np.einsum('pij,ij->pi', bloc - debuts, direction) / longueurs, 0.0, 1.0)
+        ecarts = bloc - (debuts + t[..., None] * direction)
+        distances[i:i + 256] = np.sqrt(np.einsum('pij,pij->pi', ecarts, ecarts)).min(axis=1)
+    return distances
+
+@pytest.mark.parametrize("polyligne", [_serpentin, _marche_aleatoire])
+def test_niveaux_a_moins_d_un_pixel(polyligne):
+    points, gardes = polyligne()
+    niveaux = NiveauxDetail(points, gardes)
+    for echelle in ECHELLES:
+        simplifies, continus = niveaux.points_niveau(echelle)
+        assert len(continus) == len(simplifies) - 1
+        # Chaque point du tracé complet est à moins d'un pixel d'un segment dessiné
+        distances = _distances(points, *_segments_dessines(simplifies, continus))
+        assert distances.max() * echelle <= 1.0
+
+@pytest.mark.parametrize("polyligne", [_serpentin, _marche_aleatoire])
+def test_extremites_et_cintrages_gardes(polyligne):
+    points, gardes = polyligne()
+    niveaux = NiveauxDetail(points, gardes)
+    for echelle in ECHELLES:
+        simplifies, _ = niveaux.points_niveau(echelle)
+        gardes_simplifies = {tuple(p) for p in simplifies}
+        for indice in (0, len(points) - 1, *gardes):
+            assert tuple(points[indice]) in gardes_simplifies
+
+def test_simplification_effective():
+    points, gardes = _marche_aleatoire()
+    niveaux = NiveauxDetail(points, gardes)
+    assert len(niveaux.points_niveau(0.01)[0]) < len(points) // 10
+    np.testing.assert_array_equal(niveaux.points_niveau(1e6)[0], points)
+
+def test_morceaux_traversant_le_bord():
+    # Segment dont les deux extrémités sont hors champ mais qui traverse la zone
+    # visible, puis segment entièrement hors champ
+    niveaux = NiveauxDetail([[-5000.0, 100.0], [5000.0, 100.0], [5000.0, 5000.0], [6000.0, 5000.0]])
+    vue = Vue()
+    morceaux = niveaux.morceaux_visibles(vue, 800, 600, marge=0)
+    assert len(morceaux) == 1
+    np.testing.assert_allclose(morceaux[0], [[-5000.0, 100.0], [5000.0, 100.0]])
+    # Segment qui n'entre que dans la marge
+    vue.deplacer(0.0, -110.0)
+    assert niveaux.morceaux_visibles(vue, 800, 600, marge=0) == []
+    assert len(niveaux.morceaux_visibles(vue, 800, 600, marge=20)) == 1
+
+def test_morceaux_visibles_et_masques():
+    points, gardes = _serpentin()
+    niveaux = NiveauxDetail(points, gardes)
+    vue = Vue()
+    vue.ajuster(niveaux.minimum, niveaux.maximum, 800, 600)
+    x, y = vue.vers_canvas(points[len(points) // 2])
+    vue.zoomer(8.0, x, y)
+    morceaux = niveaux.morceaux_visibles(vue, 800, 600, marge=0)
+    assert morceaux
+    for morceau in morceaux:
+        # Chaque segment de chaque morceau touche la zone visible
+        debuts, fins = morceau[:-1], morceau[1:]
+        assert (np.maximum(debuts, fins) >= 0).all() and (np.minimum(debuts, fins) <= (800, 600)).all()
+    vue.deplacer(1e6, 0.0)
+    assert niveaux.morceaux_visibles(vue, 800, 600) == []
+
+def test_cache_invalide_par_nouveaux_points():
+    points, gardes = _serpentin()
+    niveaux = NiveauxDetail(points, gardes)
+    avant, _ = niveaux.points_niveau(1.0)
+    assert niveaux.points_niveau(1.0)[0] is avant
+
+    decales = points + (1000.0, 0.0)
+    niveaux.definir_points(decales, gardes)
+    apres, _ = niveaux.points_niveau(1.0)
+    np.testing.assert_allclose(apres, avant + (1000.0, 0.0))
+    np.testing.assert_allclose(niveaux.minimum, decales.min(axis=0))